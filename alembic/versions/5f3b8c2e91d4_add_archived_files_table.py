@@ -0,0 +1,45 @@
+"""Add archived_files table
+
+Revision ID: 5f3b8c2e91d4
+Revises: d4dddf066a16
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3b8c2e91d4'
+down_revision: Union[str, Sequence[str], None] = 'd4dddf066a16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archived_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=512), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('archive_day', sa.Date(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('bundle_path', sa.String(length=512), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('path')
+    )
+    op.create_index(op.f('ix_archived_files_kind'), 'archived_files', ['kind'], unique=False)
+    op.create_index(op.f('ix_archived_files_archive_day'), 'archived_files', ['archive_day'], unique=False)
+    op.create_index(op.f('ix_archived_files_sha256'), 'archived_files', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_archived_files_sha256'), table_name='archived_files')
+    op.drop_index(op.f('ix_archived_files_archive_day'), table_name='archived_files')
+    op.drop_index(op.f('ix_archived_files_kind'), table_name='archived_files')
+    op.drop_table('archived_files')
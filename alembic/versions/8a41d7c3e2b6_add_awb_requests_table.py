@@ -0,0 +1,48 @@
+"""Add awb_requests table
+
+Revision ID: 8a41d7c3e2b6
+Revises: 5f3b8c2e91d4
+Create Date: 2026-10-19 11:04:17.582913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8a41d7c3e2b6'
+down_revision: Union[str, Sequence[str], None] = '5f3b8c2e91d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('awb_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('account_key', sa.String(length=64), nullable=False),
+    sa.Column('idempotency_key', sa.String(length=64), server_default='', nullable=False),
+    sa.Column('status', sa.String(length=16), nullable=False),
+    sa.Column('awb', sa.String(length=64), nullable=True),
+    sa.Column('shipment_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'account_key', 'idempotency_key', name='uq_awb_requests_order_account_key')
+    )
+    op.create_index(op.f('ix_awb_requests_order_id'), 'awb_requests', ['order_id'], unique=False)
+    op.create_index(op.f('ix_awb_requests_status'), 'awb_requests', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_awb_requests_status'), table_name='awb_requests')
+    op.drop_index(op.f('ix_awb_requests_order_id'), table_name='awb_requests')
+    op.drop_table('awb_requests')
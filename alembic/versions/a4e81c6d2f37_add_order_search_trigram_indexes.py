@@ -0,0 +1,44 @@
+"""Add pg_trgm indexes for order search
+
+Revision ID: a4e81c6d2f37
+Revises: f2c7d19b6a48
+Create Date: 2026-10-19 17:08:51.330962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e81c6d2f37'
+down_revision: Union[str, Sequence[str], None] = 'f2c7d19b6a48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Expresiile trebuie să fie identice cu cele din services/search_service.py.
+TRIGRAM_INDEXES = [
+    ('ix_orders_name_trgm', 'orders', "lower(name)"),
+    ('ix_orders_customer_trgm', 'orders', "lower(customer)"),
+    ('ix_orders_phone_digits_trgm', 'orders', "regexp_replace(shipping_phone, '[^0-9]', '', 'g')"),
+    ('ix_shipments_awb_trgm', 'shipments', "lower(awb)"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY nu blochează scrierile sincronizării, dar nu poate rula într-o tranzacție
+    with op.get_context().autocommit_block():
+        for name, table, expr in TRIGRAM_INDEXES:
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} USING gin (({expr}) gin_trgm_ops)")
+        # căutarea exactă după numărul comenzii ("#1234")
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_orders_name ON orders (name)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_orders_name")
+        for name, _, _ in reversed(TRIGRAM_INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
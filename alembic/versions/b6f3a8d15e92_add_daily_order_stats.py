@@ -0,0 +1,45 @@
+"""Add daily_order_stats rollup table
+
+Revision ID: b6f3a8d15e92
+Revises: a4e81c6d2f37
+Create Date: 2026-10-19 18:21:37.504118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f3a8d15e92'
+down_revision: Union[str, Sequence[str], None] = 'a4e81c6d2f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_order_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('courier', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('orders_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('revenue_total', sa.Float(), server_default='0', nullable=False),
+    sa.Column('cod_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('cod_total', sa.Float(), server_default='0', nullable=False),
+    sa.Column('shipped_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('delivery_seconds_total', sa.Float(), server_default='0', nullable=False),
+    sa.Column('delivery_samples', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('refreshed_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'store_id', 'courier', 'status')
+    )
+    op.create_index('ix_daily_order_stats_store_day', 'daily_order_stats', ['store_id', 'day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_order_stats_store_day', table_name='daily_order_stats')
+    op.drop_table('daily_order_stats')
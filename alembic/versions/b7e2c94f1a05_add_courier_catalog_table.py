@@ -0,0 +1,40 @@
+"""Add courier_catalog table
+
+Revision ID: b7e2c94f1a05
+Revises: 8a41d7c3e2b6
+Create Date: 2026-10-19 12:21:48.311072
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c94f1a05'
+down_revision: Union[str, Sequence[str], None] = '8a41d7c3e2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('courier_catalog',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('account_key', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('lookup_key', sa.String(length=255), server_default='', nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('fetched_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('expires_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_key', 'kind', 'lookup_key', name='uq_courier_catalog_entry')
+    )
+    op.create_index(op.f('ix_courier_catalog_expires_at'), 'courier_catalog', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_courier_catalog_expires_at'), table_name='courier_catalog')
+    op.drop_table('courier_catalog')
@@ -0,0 +1,55 @@
+"""Add dpd_sites and dpd_streets nomenclature tables
+
+Revision ID: c3f9a0d8e4b7
+Revises: b7e2c94f1a05
+Create Date: 2026-10-19 13:02:55.940316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a0d8e4b7'
+down_revision: Union[str, Sequence[str], None] = 'b7e2c94f1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dpd_sites',
+    sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('name_norm', sa.String(length=255), nullable=False),
+    sa.Column('municipality', sa.String(length=255), nullable=True),
+    sa.Column('region', sa.String(length=255), nullable=True),
+    sa.Column('region_norm', sa.String(length=255), nullable=True),
+    sa.Column('post_code', sa.String(length=16), nullable=True),
+    sa.Column('refreshed_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dpd_sites_name_norm'), 'dpd_sites', ['name_norm'], unique=False)
+    op.create_index(op.f('ix_dpd_sites_post_code'), 'dpd_sites', ['post_code'], unique=False)
+    op.create_table('dpd_streets',
+    sa.Column('id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('site_id', sa.BigInteger(), nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('name_norm', sa.String(length=255), nullable=False),
+    sa.Column('refreshed_at', postgresql.TIMESTAMP(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_dpd_streets_site_name', 'dpd_streets', ['site_id', 'name_norm'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_dpd_streets_site_name', table_name='dpd_streets')
+    op.drop_table('dpd_streets')
+    op.drop_index(op.f('ix_dpd_sites_post_code'), table_name='dpd_sites')
+    op.drop_index(op.f('ix_dpd_sites_name_norm'), table_name='dpd_sites')
+    op.drop_table('dpd_sites')
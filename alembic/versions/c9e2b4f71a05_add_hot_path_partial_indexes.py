@@ -0,0 +1,63 @@
+"""Add partial and composite indexes for the hot operational predicates
+
+Revision ID: c9e2b4f71a05
+Revises: b6f3a8d15e92
+Create Date: 2026-10-19 19:04:12.238841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e2b4f71a05'
+down_revision: Union[str, Sequence[str], None] = 'b6f3a8d15e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Predicatele WHERE trebuie să fie identice cu cele din cod (listele se trimit inline,
+# cu literal_execute), altfel planner-ul nu poate folosi indexul parțial:
+#   - courier_service.FINAL_STATUSES        (track_and_update_shipments)
+#   - Print Hub: printed_at IS NULL AND awb IS NOT NULL
+#   - routes/validation.AWAITING_VALIDATION_STATUSES
+#   - routes/financials.PENDING_PAYMENT_STATUSES
+# (nume, tabelă, coloane, predicat parțial sau None)
+INDEXES = [
+    (
+        'ix_shipments_open_tracking', 'shipments', 'fulfillment_created_at',
+        "awb IS NOT NULL AND (last_status IS NULL OR lower(last_status) NOT IN ("
+        "'delivered', 'refused', 'returned', 'canceled', 'livrat', 'refuzat', 'returnat', 'anulat', "
+        "'unknown', 'not found', 'error', 'tracking-error'))",
+    ),
+    ('ix_shipments_unprinted', 'shipments', 'order_id, id', "printed_at IS NULL AND awb IS NOT NULL"),
+    (
+        'ix_orders_awaiting_validation', 'orders', 'created_at DESC',
+        "address_status IN ('pending', 'invalid', 'partial_match', 'failed')",
+    ),
+    (
+        'ix_orders_pending_payment', 'orders', 'created_at DESC, id DESC',
+        "lower(financial_status) IN ('pending', 'payment pending', 'cod_pending')",
+    ),
+    # ultima expediere per comandă (max(id) / ORDER BY id DESC LIMIT 1): Print Hub, Financials
+    ('ix_shipments_order_id_id', 'shipments', 'order_id, id', None),
+]
+
+
+def index_ddl(name: str, table: str, columns: str, where: Union[str, None], concurrently: bool = True) -> str:
+    ddl = f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} ON {table} ({columns})"
+    return f"{ddl} WHERE {where}" if where else ddl
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.execute(index_ddl(*index))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, *_ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,43 @@
+"""Add shipment_profile_rules table
+
+Revision ID: d1a6e5b3c820
+Revises: c3f9a0d8e4b7
+Create Date: 2026-10-19 13:47:10.228164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1a6e5b3c820'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a0d8e4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shipment_profile_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('profile_id', sa.Integer(), nullable=False),
+    sa.Column('priority', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('store_category_id', sa.Integer(), nullable=True),
+    sa.Column('payment_method', sa.String(length=64), nullable=True),
+    sa.Column('sku_patterns', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('sku_mode', sa.String(length=8), nullable=False),
+    sa.Column('min_quantity', sa.Integer(), nullable=True),
+    sa.Column('max_quantity', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['profile_id'], ['shipment_profiles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['store_category_id'], ['store_categories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('shipment_profile_rules')
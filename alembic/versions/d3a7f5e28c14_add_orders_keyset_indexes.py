@@ -0,0 +1,46 @@
+"""Add composite indexes for keyset pagination of the orders list
+
+Revision ID: d3a7f5e28c14
+Revises: c9e2b4f71a05
+Create Date: 2026-10-19 21:37:48.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a7f5e28c14'
+down_revision: Union[str, Sequence[str], None] = 'c9e2b4f71a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Ordinea coloanelor trebuie să fie cea din filter_service.sort_ordering, ca și comparația pe
+# tuplu din `_after` / `_before` să devină un index scan (înainte sau înapoi, pentru „prev”):
+#   - created_at_desc: created_at DESC NULLS LAST, id DESC
+#   - order_name_asc:  name ASC NULLS LAST, id ASC
+# (nume, tabelă, coloane, predicat parțial sau None)
+INDEXES = [
+    ('ix_orders_created_at_id', 'orders', 'created_at DESC NULLS LAST, id DESC', None),
+    ('ix_orders_name_id', 'orders', 'name, id', None),
+]
+
+
+def index_ddl(name: str, table: str, columns: str, where: Union[str, None], concurrently: bool = True) -> str:
+    ddl = f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} ON {table} ({columns})"
+    return f"{ddl} WHERE {where}" if where else ddl
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for index in INDEXES:
+            op.execute(index_ddl(*index))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, *_ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,37 @@
+"""Add sku_catalog table
+
+Revision ID: e8b4f27a9c13
+Revises: d1a6e5b3c820
+Create Date: 2026-10-19 14:30:42.671059
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4f27a9c13'
+down_revision: Union[str, Sequence[str], None] = 'd1a6e5b3c820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sku_catalog',
+    sa.Column('sku', sa.String(length=128), nullable=False),
+    sa.Column('weight_kg', sa.Float(), nullable=False),
+    sa.Column('length_cm', sa.Float(), nullable=True),
+    sa.Column('width_cm', sa.Float(), nullable=True),
+    sa.Column('height_cm', sa.Float(), nullable=True),
+    sa.Column('units_per_parcel', sa.Integer(), nullable=True),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('sku')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sku_catalog')
@@ -0,0 +1,49 @@
+"""Add shopify_fulfillment_outbox table
+
+Revision ID: f2c7d19b6a48
+Revises: e8b4f27a9c13
+Create Date: 2026-10-19 15:52:08.114502
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c7d19b6a48'
+down_revision: Union[str, Sequence[str], None] = 'e8b4f27a9c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('shopify_fulfillment_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shipment_id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('store_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default='pending', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('shopify_fulfillment_id', sa.String(length=50), nullable=True),
+    sa.Column('next_attempt_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['store_id'], ['stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shipment_id')
+    )
+    op.create_index(op.f('ix_shopify_fulfillment_outbox_store_id'), 'shopify_fulfillment_outbox', ['store_id'], unique=False)
+    op.create_index('ix_shopify_fulfillment_outbox_due', 'shopify_fulfillment_outbox', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shopify_fulfillment_outbox_due', table_name='shopify_fulfillment_outbox')
+    op.drop_index(op.f('ix_shopify_fulfillment_outbox_store_id'), table_name='shopify_fulfillment_outbox')
+    op.drop_table('shopify_fulfillment_outbox')
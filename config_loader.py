@@ -1,30 +1,113 @@
 # config_loader.py
+#
+# Registrul fișierelor JSON din config/: încărcate o singură dată, servite din memorie.
+# Un watcher de fundal (`watch`) compară mtime-urile și reîncarcă doar fișierele modificate,
+# astfel încât handler-ele de request nu ating niciodată sistemul de fișiere.
+import asyncio
 import json
+import logging
 from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
 
 CONFIG_PATH = Path(__file__).parent / "config"
+WATCH_INTERVAL_SECONDS = 5
+
 
 class ConfigLoader:
-    def __init__(self):
-        self._configs = {}
+    def __init__(self, path: Path = CONFIG_PATH):
+        self._path = path
+        self._configs: Dict[str, Any] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._listeners: List[Callable[[], None]] = []
+        self._courier_tracking_map: Dict[str, str] = {}
         self._load_all_configs()
 
-    def _load_all_configs(self):
-        """Încarcă toate fișierele .json din directorul de configurare."""
-        for config_file in CONFIG_PATH.glob("*.json"):
+    def _load_all_configs(self) -> bool:
+        """Încarcă fișierele .json noi sau modificate; întoarce True dacă s-a schimbat ceva."""
+        changed = False
+        seen = set()
+        for config_file in self._path.glob("*.json"):
+            name = config_file.stem
+            seen.add(name)
             try:
-                with open(config_file, "r") as f:
-                    self._configs[config_file.stem] = json.load(f)
+                mtime = config_file.stat().st_mtime
+                if self._mtimes.get(name) == mtime:
+                    continue
+                with open(config_file, "r", encoding="utf-8") as f:
+                    self._configs[name] = json.load(f)
+                self._mtimes[name] = mtime
+                changed = True
             except (IOError, json.JSONDecodeError) as e:
-                print(f"Eroare la încărcarea {config_file.name}: {e}")
+                # păstrăm versiunea anterioară (ex. fișier salvat pe jumătate)
+                logger.error("Eroare la încărcarea %s: %s", config_file.name, e)
+        for name in set(self._configs) - seen:
+            self._configs.pop(name, None)
+            self._mtimes.pop(name, None)
+            changed = True
+        if changed:
+            self._courier_tracking_map = self._build_courier_tracking_map()
+        return changed
+
+    def _build_courier_tracking_map(self) -> Dict[str, str]:
+        """Numele curierului din courier_map -> tracking_url din config/{curier}.json (ex. 'dpd' din 'dpd-ro')."""
+        tracking: Dict[str, str] = {}
+        for courier_name, courier_slug in self.courier_map().items():
+            courier_config = self._configs.get(str(courier_slug).split("-")[0])
+            if isinstance(courier_config, dict) and courier_config.get("tracking_url"):
+                tracking[courier_name] = courier_config["tracking_url"]
+        return tracking
+
+    def reload_if_changed(self) -> bool:
+        if not self._load_all_configs():
+            return False
+        logger.info("Configurările din %s au fost reîncărcate.", self._path)
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error("Eroare la aplicarea configurărilor reîncărcate: %s", e)
+        return True
+
+    def on_reload(self, listener: Callable[[], None]) -> None:
+        """Înregistrează un callback apelat după fiecare reîncărcare (ex. actualizarea `settings`)."""
+        self._listeners.append(listener)
+
+    async def watch(self, interval: float = WATCH_INTERVAL_SECONDS) -> None:
+        """Bucla de fundal pornită la startup; stat-urile rulează într-un thread."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception as e:
+                logger.error("Verificarea configurărilor a eșuat: %s", e)
 
     def get_config(self, name: str) -> dict:
         """Returnează configurarea pentru un nume dat (ex: 'dpd', 'sameday')."""
         return self._configs.get(name, {})
 
+    # --- accesori tipizați ---
+
+    def courier_map(self) -> Dict[str, str]:
+        return self.get_config("courier_map")
+
+    def payment_map(self) -> Dict[str, List[str]]:
+        return self.get_config("payment_map")
+
+    def courier_status_map(self) -> Dict[str, Any]:
+        return self.get_config("courier_status_map")
+
+    def courier_tracking_map(self) -> Dict[str, str]:
+        return self._courier_tracking_map
+
+    def courier_credentials(self, courier: str) -> Dict[str, Any]:
+        return self.get_config(courier.lower())
+
+
 # Creăm o singură instanță pe care o vom importa în restul aplicației
 config_loader = ConfigLoader()
 
 # Pentru a putea accesa usor setările
 def get_courier_settings(courier_name: str) -> dict:
-    return config_loader.get_config(courier_name.lower())
\ No newline at end of file
+    return config_loader.get_config(courier_name.lower())
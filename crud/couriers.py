@@ -12,6 +12,11 @@ async def get_courier_accounts(db: AsyncSession):
     result = await db.execute(select(models.CourierAccount).options(selectinload(models.CourierAccount.mappings)))
     return result.scalars().all()
 
+async def get_courier_account_by_key(db: AsyncSession, account_key: str):
+    """Preia contul de curier după account_key (None dacă nu există)."""
+    result = await db.execute(select(models.CourierAccount).where(models.CourierAccount.account_key == account_key))
+    return result.scalar_one_or_none()
+
 async def get_courier_mappings(db: AsyncSession):
     """Preia toate mapările de curieri din baza de date."""
     result = await db.execute(select(models.CourierMapping))
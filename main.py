@@ -4,17 +4,21 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
+import asyncio
 
 from routes import (
     store_categories, printing, logs, orders, sync, labels, actions,
     settings as settings_router, validation, webhooks, processing,
-    background, profiles,
+    background, profiles, dashboard,
     couriers as couriers_routes,
     financials # <-- MODIFICARE: Am adăugat noul router
 )
 from websocket_manager import manager
+from services import label_service, awb_job_service
 from settings import settings
+from config_loader import config_loader
 from database import engine
+from services.filter_service import ORDERS_VIEW_SQL
 import logging
 
 from routes.financials import router as financials_router
@@ -27,7 +31,8 @@ from routes.financials import router as financials_router
 
 # Optional: close shared HTTP client used by courier services
 try:
-    from services.couriers import _http_client as couriers_http_client
+    from services.couriers import get_http_client
+    couriers_http_client = get_http_client()
 except Exception:
     couriers_http_client = None
 
@@ -74,6 +79,7 @@ app.include_router(store_categories.router, tags=["Store Categories"])
 app.include_router(background.router, tags=["Background Tasks"])
 app.include_router(financials.router, tags=["Financials"]) # <-- MODIFICARE: Am inclus router-ul aici
 app.include_router(actions.router)
+app.include_router(dashboard.router)
 app.include_router(profiles.html_router) 
 app.include_router(profiles.api_router)
 
@@ -81,33 +87,22 @@ app.include_router(profiles.api_router)
 @app.on_event("startup")
 async def on_startup():
     # Asigură-te că vizualizarea orders_view există
-    view_sql = """
-    CREATE OR REPLACE VIEW orders_view AS
-    WITH latest_shipment AS (
-      SELECT s.order_id, s.last_status, s.last_status_at, s.id,
-             ROW_NUMBER() OVER (PARTITION BY s.order_id ORDER BY s.last_status_at NULLS LAST, s.id DESC) AS rn
-      FROM shipments s
-    )
-    SELECT
-      o.id,
-      CASE
-        WHEN ls.last_status ILIKE 'delivered%%' OR ls.last_status ILIKE '%%livrat%%' THEN 'delivered'
-        WHEN ls.last_status ILIKE '%%refus%%' OR ls.last_status ILIKE '%%return%%' THEN 'refused'
-        WHEN ls.last_status ILIKE '%%cancel%%' OR ls.last_status ILIKE '%%anulat%%' THEN 'canceled'
-        WHEN ls.last_status ILIKE '%%locker%%' OR ls.last_status ILIKE '%%parcelshop%%' OR ls.last_status ILIKE '%%pick-up%%' THEN 'pickup_office'
-        WHEN ls.last_status ILIKE '%%in curs%%' OR ls.last_status ILIKE '%%tranzit%%' OR ls.last_status ILIKE 'out for delivery%%' OR ls.last_status ILIKE 'in transit%%' THEN 'in_transit'
-        WHEN ls.last_status ILIKE '%%expediat%%' OR ls.last_status ILIKE '%%warehouse%%' OR ls.last_status ILIKE '%%pick-up%%' THEN 'shipped'
-        WHEN ls.last_status ILIKE '%%proces%%' OR ls.last_status ILIKE '%%registered%%' OR ls.last_status ILIKE '%%awb%%' THEN 'processed'
-        ELSE NULL
-      END AS mapped_courier_status
-    FROM orders o
-    LEFT JOIN latest_shipment ls ON ls.order_id = o.id AND ls.rn = 1;
-    """
     async with engine.begin() as conn:
-        await conn.execute(text(view_sql))
+        await conn.execute(text(ORDERS_VIEW_SQL))
+
+    # Progresul joburilor de creare AWB vine din worker pe Redis și se retransmite pe /ws/status
+    app.state.awb_progress_relay = asyncio.create_task(awb_job_service.relay_progress_to_websockets())
+    # Fișierele din config/ se reîncarcă la modificare, fără citiri pe request
+    app.state.config_watcher = asyncio.create_task(config_loader.watch())
 
 @app.on_event("shutdown")
 async def on_shutdown():
+    label_service.shutdown_pdf_pool()
+    for task_name in ("awb_progress_relay", "config_watcher"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+    await awb_job_service.close_redis_pool()
     if couriers_http_client:
         try:
             await couriers_http_client.aclose()
@@ -1,7 +1,7 @@
 # /models.py
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, Table, Index, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, Float, Table, Index, Boolean, Date, BigInteger
 from sqlalchemy.dialects.postgresql import TIMESTAMP, JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import JSON
@@ -212,3 +212,157 @@ class ShipmentProfile(Base):
     default_packing = sa.Column(sa.String(20), nullable=True)  # DPD: BOX | PALLET | ENVELOPE | BAG | WRAP
 
     account = relationship("CourierAccount")
+
+
+class AwbRequest(Base):
+    """
+    Registrul cererilor de creare AWB: o singură cerere la curier per
+    (comandă, cont, cheie de idempotență). Reîncercările primesc AWB-ul deja creat.
+    """
+    __tablename__ = 'awb_requests'
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
+    account_key = Column(String(64), nullable=False)
+    idempotency_key = Column(String(64), nullable=False, server_default='')  # '' = un AWB per comandă și cont
+    status = Column(String(16), nullable=False, index=True)  # in_flight | succeeded | failed
+    awb = Column(String(64), nullable=True)
+    shipment_id = Column(Integer, ForeignKey('shipments.id', ondelete='SET NULL'), nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, server_default='1')
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    __table_args__ = (
+        sa.UniqueConstraint('order_id', 'account_key', 'idempotency_key', name='uq_awb_requests_order_account_key'),
+    )
+
+
+class ShopifyFulfillmentOutbox(Base):
+    """
+    Outbox-ul notificărilor de expediere către Shopify: un rând per shipment, scris în aceeași
+    tranzacție cu AWB-ul și golit în loturi de worker; reîncercările sunt idempotente.
+    """
+    __tablename__ = 'shopify_fulfillment_outbox'
+    id = Column(Integer, primary_key=True)
+    shipment_id = Column(Integer, ForeignKey('shipments.id', ondelete='CASCADE'), nullable=False, unique=True)
+    order_id = Column(Integer, ForeignKey('orders.id', ondelete='CASCADE'), nullable=False)
+    store_id = Column(Integer, ForeignKey('stores.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = Column(String(16), nullable=False, server_default='pending')  # pending | sent | failed
+    attempts = Column(Integer, nullable=False, server_default='0')
+    last_error = Column(Text, nullable=True)
+    shopify_fulfillment_id = Column(String(50), nullable=True)
+    next_attempt_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    __table_args__ = (Index('ix_shopify_fulfillment_outbox_due', 'status', 'next_attempt_at'),)
+
+
+class SkuCatalogItem(Base):
+    """Greutate și dimensiuni per SKU, pentru estimarea greutății/coletelor la crearea AWB."""
+    __tablename__ = 'sku_catalog'
+    sku = Column(String(128), primary_key=True)
+    weight_kg = Column(Float, nullable=False)
+    length_cm = Column(Float, nullable=True)
+    width_cm = Column(Float, nullable=True)
+    height_cm = Column(Float, nullable=True)
+    units_per_parcel = Column(Integer, nullable=True)  # câte bucăți încap într-un colet; gol = se combină cu restul
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ShipmentProfileRule(Base):
+    """
+    Regulă de auto-alocare a profilului de expediție, evaluată la sincronizare.
+    Câmpurile goale înseamnă „orice”; prima regulă potrivită (după priority) câștigă.
+    """
+    __tablename__ = 'shipment_profile_rules'
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    profile_id = Column(Integer, ForeignKey('shipment_profiles.id', ondelete='CASCADE'), nullable=False)
+    priority = Column(Integer, nullable=False, default=100)
+    is_active = Column(Boolean, nullable=False, default=True)
+    store_category_id = Column(Integer, ForeignKey('store_categories.id', ondelete='CASCADE'), nullable=True)
+    payment_method = Column(String(64), nullable=True)  # valoare din Order.mapped_payment
+    sku_patterns = Column(JSONB, nullable=True)  # ex. ["TRX-*", "MAT-01"] (fnmatch)
+    sku_mode = Column(String(8), nullable=False, default='any')  # any = măcar un SKU; only = toate SKU-urile
+    min_quantity = Column(Integer, nullable=True)
+    max_quantity = Column(Integer, nullable=True)
+
+    profile = relationship("ShipmentProfile")
+
+
+class CourierCatalogEntry(Base):
+    """
+    Cache pentru nomenclatoarele curierului (servicii, servicii per destinație, localități, străzi),
+    per cont. `lookup_key` identifică interogarea (ex. 'pc:060274', 'site:642279'), '' pentru lista generală.
+    """
+    __tablename__ = 'courier_catalog'
+    id = Column(Integer, primary_key=True)
+    account_key = Column(String(64), nullable=False)
+    kind = Column(String(32), nullable=False)  # services | destination
+    lookup_key = Column(String(255), nullable=False, server_default='')
+    payload = Column(JSONB, nullable=False)
+    fetched_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    __table_args__ = (
+        sa.UniqueConstraint('account_key', 'kind', 'lookup_key', name='uq_courier_catalog_entry'),
+    )
+
+
+class DpdSite(Base):
+    """Oglinda locală a nomenclatorului de localități DPD (id-ul este siteId-ul DPD)."""
+    __tablename__ = 'dpd_sites'
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    type = Column(String(32), nullable=True)
+    name = Column(String(255), nullable=False)
+    name_norm = Column(String(255), nullable=False, index=True)  # address_service.norm_text(name)
+    municipality = Column(String(255), nullable=True)
+    region = Column(String(255), nullable=True)
+    region_norm = Column(String(255), nullable=True)
+    post_code = Column(String(16), nullable=True, index=True)
+    refreshed_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+
+class DpdStreet(Base):
+    """Oglinda locală a nomenclatorului de străzi DPD (id-ul este streetId-ul DPD)."""
+    __tablename__ = 'dpd_streets'
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    site_id = Column(BigInteger, nullable=False)
+    type = Column(String(32), nullable=True)
+    name = Column(String(255), nullable=False)
+    name_norm = Column(String(255), nullable=False)  # address_service.street_core(name)
+    refreshed_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    __table_args__ = (Index('ix_dpd_streets_site_name', 'site_id', 'name_norm'),)
+
+
+class ArchivedFile(Base):
+    """Un PDF din awb_archive (printare, listă picking, etichetă din cache), cu dimensiune și hash."""
+    __tablename__ = 'archived_files'
+    id = Column(Integer, primary_key=True)
+    path = Column(String(512), unique=True, nullable=False)  # relativ la awb_archive/
+    kind = Column(String(32), nullable=False, index=True)  # print | picklist | label
+    archive_day = Column(Date, nullable=False, index=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False, index=True)
+    bundle_path = Column(String(512), nullable=True)  # setat după compactarea zilei în tar.zst
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+
+class DailyOrderStats(Base):
+    """
+    Rollup zilnic pentru dashboard: o linie per (zi, magazin, curier, status curier mapat).
+    Ziua este data locală (Europe/Bucharest) a comenzii; se recalculează doar zilele atinse
+    de sincronizări și de actualizările de tracking.
+    """
+    __tablename__ = 'daily_order_stats'
+    day = Column(Date, primary_key=True)
+    store_id = Column(Integer, ForeignKey('stores.id', ondelete='CASCADE'), primary_key=True)
+    courier = Column(String(64), primary_key=True)  # '' = fără curier
+    status = Column(String(32), primary_key=True)   # statusul mapat din orders_view; 'fara_status' dacă lipsește
+    orders_count = Column(Integer, nullable=False, server_default='0')
+    revenue_total = Column(Float, nullable=False, server_default='0')
+    cod_count = Column(Integer, nullable=False, server_default='0')
+    cod_total = Column(Float, nullable=False, server_default='0')
+    shipped_count = Column(Integer, nullable=False, server_default='0')  # comenzi cu AWB
+    delivery_seconds_total = Column(Float, nullable=False, server_default='0')
+    delivery_samples = Column(Integer, nullable=False, server_default='0')
+    refreshed_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (Index('ix_daily_order_stats_store_day', 'store_id', 'day'),)
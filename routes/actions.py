@@ -4,15 +4,13 @@ from __future__ import annotations
 import json
 from typing import Any, Dict, List, Optional
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from database import get_db
 import models
-from services.couriers.dpd import DPDCourier
+from services import awb_job_service, sku_catalog_service
 
 router = APIRouter(prefix="/actions", tags=["actions"])
 
@@ -50,24 +48,6 @@ def _as_bool(x: Any, default: bool = False) -> bool:
     return default
 
 
-def _order_query_with_items():
-    opts = []
-    if hasattr(models.Order, "items"):
-        opts.append(selectinload(getattr(models.Order, "items")))
-    if hasattr(models.Order, "line_items"):
-        opts.append(selectinload(getattr(models.Order, "line_items")))
-    return opts
-
-
-async def _load_order(db: AsyncSession, order_id: int) -> Any:
-    stmt = select(models.Order).options(*_order_query_with_items()).where(models.Order.id == order_id)
-    res = await db.execute(stmt)
-    order = res.scalar_one_or_none()
-    if not order:
-        raise HTTPException(status_code=404, detail=f"Comanda {order_id} nu a fost găsită.")
-    return order
-
-
 async def _load_profile(db: AsyncSession, profile_id: Optional[int]) -> Optional[Any]:
     if not profile_id:
         return None
@@ -204,69 +184,97 @@ async def create_awb_action(request: Request, payload: Dict[str, Any], db: Async
         raise HTTPException(status_code=400, detail="Lipsește `order_id` sau `order_ids`.")
 
     shipment_profile_id = _as_int(payload.get("shipment_profile_id"))
-    profile = await _load_profile(db, shipment_profile_id)
-    merged = _merge_from_profile(payload, profile)
-
-    courier_account_key: Optional[str] = (merged.get("courier_account_key") or "").strip() or None
-    if not courier_account_key:
-        raise HTTPException(status_code=400, detail="Selectează un cont de curier sau alege un profil care are cont configurat.")
-    if merged.get("service_id") in (None, 0):
-        raise HTTPException(status_code=400, detail="DPD: Service ID lipsește. Selectează un profil cu serviciu sau completează manual.")
-
-    async with httpx.AsyncClient(timeout=45.0, follow_redirects=False) as client:
-        dpd = DPDCourier(client)
-        created, errors = [], []
-
-        # Evităm problema INT vs VARCHAR folosind încărcarea fiecărui order_id individual
-        for oid in order_ids:
-            try:
-                oid_int = int(oid)
-                order = await _load_order(db, oid_int)
-                options = _options_from_payload(merged, order)
-
-                res = await dpd.create_awb(db=db, order=order, account_key=courier_account_key, options=options)
-
-                # --- normalizează AWB din răspunsul DPD ---
-                awb = None
-                if isinstance(res, dict):
-                    awb = res.get("id") or res.get("awb")
-                    if not awb:
-                        try:
-                            awb = (res.get("parcels") or [{}])[0].get("id")
-                        except Exception:
-                            awb = None
-
-                if not awb:
-                    raise HTTPException(status_code=400, detail=f"DPD: nu am primit AWB în răspuns: {res}")
-
-                # --- salvează în tabela Shipments (coloana este `awb`) ---
-                shipment = models.Shipment(
-                    order_id=oid_int,
-                    courier="DPD",
-                    account_key=courier_account_key,
-                    awb=str(awb),
-                    courier_specific_data=res,
+    explicit = bool(shipment_profile_id or (payload.get("courier_account_key") or "").strip())
+
+    # Opțiunile (inclusiv rambursul) se calculează aici, pe coloanele necesare, ca jobul să fie serializabil.
+    rows = (await db.execute(
+        select(models.Order.id, models.Order.financial_status, models.Order.total_price, models.Order.assigned_profile_id)
+        .where(models.Order.id.in_(order_ids))
+    )).all()
+
+    groups: Dict[Optional[int], List[Any]] = {}
+    if explicit:
+        profiles = {shipment_profile_id: await _load_profile(db, shipment_profile_id)}
+        groups[shipment_profile_id] = list(rows)
+    else:
+        # fără profil ales: fiecare comandă folosește profilul alocat automat la sincronizare
+        for row in rows:
+            groups.setdefault(row.assigned_profile_id, []).append(row)
+        profile_ids = [pid for pid in groups if pid]
+        profiles = {p.id: p for p in (await db.execute(
+            select(models.ShipmentProfile).where(models.ShipmentProfile.id.in_(profile_ids))
+        )).scalars().all()} if profile_ids else {}
+
+    found = {row.id for row in rows}
+    skipped: List[Dict[str, Any]] = [
+        {"order_id": oid, "error": f"Comanda {oid} nu a fost găsită."} for oid in order_ids if oid not in found
+    ]
+    options_by_account: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for profile_id, group in groups.items():
+        merged = _merge_from_profile(payload, profiles.get(profile_id))
+        courier_account_key: Optional[str] = (merged.get("courier_account_key") or "").strip() or None
+        error = None
+        if not courier_account_key:
+            error = "Selectează un cont de curier sau alege un profil care are cont configurat."
+        elif merged.get("service_id") in (None, 0):
+            error = "DPD: Service ID lipsește. Selectează un profil cu serviciu sau completează manual."
+        if error:
+            skipped.extend({"order_id": row.id, "error": error} for row in group)
+            continue
+        options_by_account.setdefault(courier_account_key, {}).update(
+            {row.id: _options_from_payload(merged, row) for row in group}
+        )
+
+    if not options_by_account:
+        raise HTTPException(status_code=400, detail=skipped[0]["error"] if skipped else "Nicio comandă de procesat.")
+
+    # greutatea și coletele estimate din catalogul SKU (o interogare agregată pentru tot lotul);
+    # doar estimările complete: un SKU lipsă din catalog ar intra cu 0 kg, deci comenzile cu
+    # SKU-uri necunoscute păstrează valorile din formular/profil
+    if _as_bool(payload.get("estimate_weight"), "total_weight" not in payload):
+        estimates = await sku_catalog_service.estimate_orders(
+            db, [oid for options_by_order in options_by_account.values() for oid in options_by_order]
+        )
+        for options_by_order in options_by_account.values():
+            for oid, opts in options_by_order.items():
+                estimate = estimates.get(oid)
+                if estimate is not None and estimate.complete:
+                    opts["total_weight"] = estimate.total_weight
+                    opts["parcels_count"] = estimate.parcels_count
+
+    # câte un job per cont de curier (limitele de concurență sunt per cont); loturile foarte mari
+    # se împart, ca fiecare job să încapă în timeout-ul lui din worker
+    jobs = []
+    idempotency_key = payload.get("idempotency_key") or request.headers.get("Idempotency-Key")
+    try:
+        for courier_account_key, options_by_order in options_by_account.items():
+            for chunk in awb_job_service.split_orders(list(options_by_order)):
+                job_id = await awb_job_service.enqueue_bulk_create(
+                    chunk, courier_account_key, {oid: options_by_order[oid] for oid in chunk},
+                    idempotency_key=idempotency_key,
                 )
-                db.add(shipment)
-
-                # marchează curierul pe comandă, dacă modelul permite
-                try:
-                    order.assigned_courier = "DPD"
-                except Exception:
-                    pass
-
-                created.append({"order_id": oid_int, "awb": str(awb)})
-            except HTTPException as he:
-                errors.append({"order_id": int(oid), "error": he.detail})
-            except Exception as ex:
-                errors.append({"order_id": int(oid), "error": f"O eroare neașteptată a apărut: {ex}"})
-
-        try:
-            await db.commit()
-        except Exception:
-            await db.rollback()
+                jobs.append({
+                    "job_id": job_id,
+                    "account_key": courier_account_key,
+                    "total": len(chunk),
+                    "status_url": request.url_for("get_create_awb_job", job_id=job_id).path,
+                })
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Coada de joburi nu este disponibilă: {e}")
+
+    return {
+        "success": True,
+        "job_id": jobs[0]["job_id"],
+        "status_url": jobs[0]["status_url"],
+        "total": sum(j["total"] for j in jobs),
+        "jobs": jobs,
+        "skipped": skipped,
+    }
 
-        if not created and errors:
-            raise HTTPException(status_code=400, detail=errors[0]["error"])
 
-        return {"success": True, "created": created, "errors": errors}
+@router.get("/create-awb/jobs/{job_id}", name="get_create_awb_job")
+async def get_create_awb_job(job_id: str):
+    state = await awb_job_service.get_job_state(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Jobul nu există sau a expirat.")
+    return state
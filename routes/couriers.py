@@ -10,7 +10,7 @@ import schemas
 import crud.couriers as crud
 from database import get_db
 from templating import templates
-from services.couriers.dpd import DPDCourier as DpdService
+from services import courier_catalog_service
 import settings
 
 from sqlalchemy import select, text
@@ -138,27 +138,12 @@ async def get_dpd_services_for_order(
     
     if not order or not account:
         raise HTTPException(status_code=404, detail="Comanda sau contul nu au fost găsite.")
-    if not account.credentials or not account.credentials.get("api"):
+    if not account.credentials:
         raise HTTPException(status_code=400, detail="Contul de curier nu are credențiale API configurate.")
 
-    try:
-        dpd_service = DpdService(account.credentials['api'])
-        # Aici ar trebui să ai o metodă care returnează serviciile. 
-        # Momentan, returnăm o listă demonstrativă.
-        # services = await dpd_service.get_destination_services(...)
-        
-        # --- Înlocuiește cu apelul real către API-ul DPD ---
-        # Listă demonstrativă
-        mock_services = [
-            {"id": 2505, "name": "DPD Standard"},
-            {"id": 2506, "name": "DPD Express"},
-            {"id": 2508, "name": "DPD Livrare Sambata"}
-        ]
-        return mock_services
-        # --------------------------------------------------
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Eroare la comunicarea cu API-ul DPD: {str(e)}")
+    # Doar din cache (memorie / tabela courier_catalog): niciun apel live DPD pe drumul formularului
+    services = await courier_catalog_service.get_destination_services(db, account, postcode=order.shipping_zip)
+    return [{"id": s["id"], "name": s["name"]} for s in services if s.get("id") is not None]
     
 @settings_router.get("/accounts/{account_id}/edit", name="edit_courier_account_page")
 async def get_edit_courier_account_page(
@@ -0,0 +1,31 @@
+# routes/dashboard.py
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from services import stats_service
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+MAX_RANGE_DAYS = 366
+
+
+@router.get("/stats", name="dashboard_stats")
+async def dashboard_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    store_id: Optional[int] = None,
+    courier: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Volume, ramburs, rate de livrare/refuz și timp mediu de livrare pe zile — doar din daily_order_stats."""
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="`date_from` trebuie să fie înainte de `date_to`.")
+    if (date_to - date_from).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalul maxim este de {MAX_RANGE_DAYS} zile.")
+    return await stats_service.dashboard(db, date_from, date_to, store_id=store_id, courier=courier)
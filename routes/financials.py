@@ -4,13 +4,14 @@ from __future__ import annotations
 from datetime import datetime, date, timezone
 from typing import List, Optional
 
-import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Form, UploadFile, File
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import JSONResponse
-from sqlalchemy import and_, desc, func, select, null
+from sqlalchemy import and_, bindparam, desc, func, select, null
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from services import cod_reconciliation_service, financials_service
+
 # ---------- models (compat) ----------
 try:
     from models import Order as O, Shipment as S, Store as TStore  # type: ignore
@@ -32,6 +33,9 @@ except Exception:
 templates = Jinja2Templates(directory="templates")
 router = APIRouter(prefix="/financials", tags=["Financials"])
 
+# inline (literal_execute): predicatul indexului parțial ix_orders_pending_payment
+PENDING_PAYMENT_STATUSES = ["pending", "payment pending", "cod_pending"]
+
 
 # =============================================================================
 # Helpers
@@ -48,15 +52,6 @@ def _parse_date(s: Optional[str]) -> Optional[date]:
     return None
 
 
-def _pick_attr(obj, *names, default=None):
-    for n in names:
-        if hasattr(obj, n):
-            v = getattr(obj, n)
-            if v is not None:
-                return v
-    return default
-
-
 async def _active_stores(db: AsyncSession) -> list[dict]:
     try:
         q = select(TStore.id, TStore.name).where(getattr(TStore, "is_active") == True)  # noqa: E712
@@ -154,7 +149,9 @@ async def _eligible_orders_base_query(
     if fulf_expr is not None:
         conds.append(func.upper(fulf_expr) == "FULFILLED")
     if fin_expr is not None:
-        conds.append(func.lower(fin_expr).in_(["pending", "payment pending", "cod_pending"]))
+        conds.append(func.lower(fin_expr).in_(
+            bindparam("pending_statuses", PENDING_PAYMENT_STATUSES, expanding=True, literal_execute=True)
+        ))
 
     if conds:
         q = q.where(and_(*conds))
@@ -293,67 +290,19 @@ async def mark_orders_as_paid(
     if not order_ids:
         raise HTTPException(422, "order_ids is required")
 
-    # ------------ ia store creds ------------
-    # domeniu + token (încearcă mai multe denumiri)
-    row = (await db.execute(select(TStore).where(TStore.id == store_id))).scalar_one_or_none()
-    if row is None:
-        raise HTTPException(404, "Store not found")
-
-    shop_domain = _pick_attr(row, "shop_domain", "shop", "domain", "url")
-    token = _pick_attr(row, "admin_api_token", "api_token", "shopify_token", "access_token", "token")
-    if not shop_domain or not token:
-        raise HTTPException(500, "Lipsesc datele Shopify pentru magazin.")
-
-    if shop_domain.startswith("https://"):
-        shop_domain = shop_domain.replace("https://", "")
-    graphql_url = f"https://{shop_domain}/admin/api/2025-07/graphql.json"
-
-    # ------------ ia remote id pentru fiecare order ------------
-    shopify_id_col = None
-    for cand in ("shopify_gid", "shopify_id", "remote_id", "platform_id"):
-        if hasattr(O, cand):
-            shopify_id_col = getattr(O, cand)
-            break
-
-    if shopify_id_col is None:
-        raise HTTPException(500, "Modelul Order nu are coloană cu ID-ul Shopify (shopify_gid/shopify_id/remote_id/platform_id).")
-
-    res = await db.execute(select(O.id, shopify_id_col).where(O.id.in_(order_ids)))
-    id_pairs = [(oid, val) for oid, val in res.fetchall() if val is not None]
-    if not id_pairs:
-        return {"updated": 0}
-
-    mutation = """
-    mutation orderMarkAsPaid($input: OrderMarkAsPaidInput!) {
-      orderMarkAsPaid(input: $input) {
-        order { id displayFinancialStatus }
-        userErrors { field message }
-      }
-    }
-    """
-
-    updated = 0
-    async with httpx.AsyncClient(timeout=20) as client:
-        headers = {"X-Shopify-Access-Token": token, "Content-Type": "application/json"}
-        for oid, remote in id_pairs:
-            gid = str(remote)
-            if gid.isdigit():  # transformă numeric în GID
-                gid = f"gid://shopify/Order/{gid}"
-            payload = {"query": mutation, "variables": {"input": {"id": gid}}}
-            r = await client.post(graphql_url, json=payload, headers=headers)
-            data = r.json()
-            errs = (data.get("data", {}) or {}).get("orderMarkAsPaid", {}).get("userErrors")
-            if r.status_code == 200 and not errs:
-                updated += 1
-            # dacă API nu a marcat, nu modificăm local
-
-    # update local DOAR pentru comenzile marcate cu succes
-    if updated:
-        fin_col = getattr(O, "financial_status", None) or getattr(O, "payment_status", None)
-        if fin_col is not None:
-            ok_ids = [oid for oid, _ in id_pairs][:updated]  # aproximare 1:1
-            stmt = O.__table__.update().where(O.id.in_(ok_ids)).values({fin_col.key: "paid"})
-            await db.execute(stmt)
-            await db.commit()
-
-    return {"updated": updated}
+    return await financials_service.mark_orders_paid(
+        db, [int(x) for x in order_ids], int(store_id) if store_id else None
+    )
+
+
+@router.post("/cod-import")
+async def import_cod_remittance(
+    db: AsyncSession = Depends(get_db),
+    file: UploadFile = File(...),
+    mark_paid: bool = Form(False),
+):
+    """Borderou ramburs DPD/Sameday (CSV/XLSX): potrivire pe AWB, diferențe de sumă, mark-as-paid opțional."""
+    try:
+        return await cod_reconciliation_service.reconcile(db, file.filename or "", file.file, mark_paid=mark_paid)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
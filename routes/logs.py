@@ -1,14 +1,16 @@
 # routes/logs.py
 import math
+from collections import defaultdict
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import APIRouter, Depends, Request, Query, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select, func
 import models
 from database import get_db
+from services import print_service, archive_service
 from dependencies import get_templates, get_pagination_numbers
 
 router = APIRouter(prefix='/logs', tags=['Logs'])
@@ -19,25 +21,42 @@ async def get_print_logs_page(
     templates: Jinja2Templates = Depends(get_templates), page: int = Query(1, ge=1)
 ):
     page_size = 25
-    logs_query = select(models.PrintLog).options(selectinload(models.PrintLog.entries)).order_by(models.PrintLog.created_at.desc())
-    total_logs_res = await db.execute(select(func.count()).select_from(models.PrintLog))
-    total_logs = total_logs_res.scalar_one() or 0
-    paginated_logs_res = await db.execute(logs_query.offset((page - 1) * page_size).limit(page_size))
-    paginated_logs = paginated_logs_res.scalars().all()
+    # Totalul vine din aceeași interogare (window function), nu dintr-un COUNT separat
+    logs_query = (
+        select(models.PrintLog, func.count().over().label('total_logs'))
+        .options(selectinload(models.PrintLog.entries))
+        .order_by(models.PrintLog.created_at.desc())
+        .offset((page - 1) * page_size).limit(page_size)
+    )
+    rows = (await db.execute(logs_query)).all()
+    paginated_logs = [row.PrintLog for row in rows]
+    if rows:
+        total_logs = rows[0].total_logs
+    else:
+        total_logs = (await db.execute(select(func.count()).select_from(models.PrintLog))).scalar_one() or 0
 
-    for log in paginated_logs:
-        awbs = [entry.awb for entry in log.entries]
-        if awbs:
-            summary_query = (
-                select(models.LineItem.sku, func.min(models.LineItem.title).label('title'), func.sum(models.LineItem.quantity).label('total_quantity'))
-                .join(models.Order).join(models.Shipment)
-                .where(models.Shipment.awb.in_(awbs)).group_by(models.LineItem.sku)
-                .order_by(func.sum(models.LineItem.quantity).desc())
+    # Sumarul de produse pentru toate logurile din pagină, într-o singură interogare grupată
+    summaries = defaultdict(list)
+    log_ids = [log.id for log in paginated_logs]
+    if log_ids:
+        summary_query = (
+            select(
+                models.PrintLogEntry.print_log_id,
+                models.LineItem.sku,
+                func.min(models.LineItem.title).label('title'),
+                func.sum(models.LineItem.quantity).label('total_quantity'),
             )
-            summary_res = await db.execute(summary_query)
-            log.summary_items = summary_res.all()
-        else:
-            log.summary_items = []
+            .join(models.Shipment, models.Shipment.awb == models.PrintLogEntry.awb)
+            .join(models.LineItem, models.LineItem.order_id == models.Shipment.order_id)
+            .where(models.PrintLogEntry.print_log_id.in_(log_ids))
+            .group_by(models.PrintLogEntry.print_log_id, models.LineItem.sku)
+            .order_by(models.PrintLogEntry.print_log_id, func.sum(models.LineItem.quantity).desc())
+        )
+        for row in (await db.execute(summary_query)).all():
+            summaries[row.print_log_id].append(row)
+
+    for log in paginated_logs:
+        log.summary_items = summaries.get(log.id, [])
 
     total_pages = (total_logs + page_size - 1) // page_size  # fix here
     pagination_numbers = get_pagination_numbers(page, total_pages)
@@ -49,3 +68,27 @@ async def get_print_logs_page(
         "total_pages": total_pages,
         "pagination_numbers": pagination_numbers,
     })
+
+
+@router.get("/print/{log_id}/pdf", name="download_printed_pdf")
+async def download_printed_pdf(log_id: int, db: AsyncSession = Depends(get_db)):
+    log = await db.get(models.PrintLog, log_id)
+    if not log or not log.pdf_path:
+        raise HTTPException(status_code=404, detail="Logul nu are un PDF asociat.")
+    path = Path(log.pdf_path)
+    content = await archive_service.read_archived_file(db, path)
+    if content is None:
+        raise HTTPException(status_code=404, detail="PDF-ul nu mai există în arhivă.")
+    return Response(content=content, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{path.name}"'})
+
+
+@router.get("/print/{log_id}/picklist", name="download_printed_picklist")
+async def download_printed_picklist(log_id: int, db: AsyncSession = Depends(get_db)):
+    log = await db.get(models.PrintLog, log_id)
+    if not log or not log.pdf_path:
+        raise HTTPException(status_code=404, detail="Logul nu are un PDF asociat.")
+    path = print_service.picklist_path(Path(log.pdf_path))
+    content = await archive_service.read_archived_file(db, path)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Lista de picking nu există în arhivă.")
+    return Response(content=content, media_type="application/pdf", headers={"Content-Disposition": f'attachment; filename="{path.name}"'})
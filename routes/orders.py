@@ -1,57 +1,35 @@
 # routes/orders.py
-from datetime import datetime, timezone
-from typing import List
-
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud.stores as store_crud
 from database import get_db
-from services import filter_service
-from dependencies import get_templates
+from services import export_service, filter_service
+from dependencies import get_templates, get_pagination_numbers
 from settings import settings
+from config_loader import config_loader
 import json
-import os
 import math
 from templating import templates
 import base64
 
 router = APIRouter()
 
-def _enhance_orders_for_view(orders: List):
-    """Adaugă câmpuri dinamice la obiectele Order pentru afișare."""
-    for order in orders:
-        latest_shipment = None
-        if getattr(order, "shipments", None):
-            sorted_shipments = sorted(
-                order.shipments,
-                key=lambda s: s.fulfillment_created_at or datetime.min.replace(tzinfo=timezone.utc)
-            )
-            latest_shipment = sorted_shipments[-1]
-        setattr(order, "latest_shipment", latest_shipment)
-        line_items = getattr(order, "line_items", []) or []
-        setattr(order, "line_items_str", ", ".join([f"{item.quantity}x {item.title}" for item in line_items]))
-        if latest_shipment and latest_shipment.last_status:
-            setattr(order, "mapped_courier_status", latest_shipment.last_status)
-        else:
-            setattr(order, "mapped_courier_status", "N/A")
-    return orders
-
 @router.get("/view", response_class=HTMLResponse, name="view_orders")
 async def view_orders_page(
     request: Request,
     db: AsyncSession = Depends(get_db),
-    page: int = 1,
-    per_page: int = 100,
+    page: str = "1",
+    per_page: int = filter_service.DEFAULT_PAGE_SIZE,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     filters: str = None
 ):
     query_params = request.query_params
 
-    orders, total_orders, filter_counts = await filter_service.get_filtered_orders(db, query_params)
+    orders, total_orders, filter_counts, page_info = await filter_service.get_filtered_orders(db, query_params)
     all_stores = await store_crud.get_stores(db)
     categories = await store_crud.get_all_store_categories(db)
 
@@ -76,25 +54,6 @@ async def view_orders_page(
             display_name = payload[0] if isinstance(payload, list) and payload else group_key
             courier_status_group_options.append((group_key, display_name))
 
-    orders = _enhance_orders_for_view(orders)
-           # === ÎNCEPUT MODIFICARE (înlocuiește complet codul anterior) ===
-    with open("config/courier_map.json", "r") as f:
-        courier_map = json.load(f)
-
-    courier_tracking_map = {}
-    for courier_name, courier_slug in courier_map.items():
-        # Extragem numele de bază al curierului (ex: 'dpd' din 'dpd-ro')
-        config_file_name = courier_slug.split('-')[0]
-        config_path = f"config/{config_file_name}.json"
-
-        # Verificăm dacă fișierul de configurare există
-        if os.path.exists(config_path):
-            with open(config_path, "r") as f:
-                courier_config = json.load(f)
-                tracking_url = courier_config.get("tracking_url")
-                if tracking_url:
-                    courier_tracking_map[courier_name] = tracking_url
-    # === SFÂRȘIT MODIFICARE ===
         # === ÎNCEPUT MODIFICARE (Adaugă acest bloc) ===
     decoded_filters = {}
     if filters:
@@ -106,7 +65,9 @@ async def view_orders_page(
             decoded_filters = {}
     # === SFÂRȘIT MODIFICARE ===
 
-    total_pages = math.ceil(total_orders / per_page)
+    page = page_info["page"]
+    per_page = page_info["per_page"]
+    total_pages = max(math.ceil(total_orders / per_page), 1)
 
 
 
@@ -114,6 +75,7 @@ async def view_orders_page(
         "request": request,
         "orders": orders,
         "total_orders": total_orders,
+        "total_is_exact": page_info["total_is_exact"],
         "all_stores": all_stores,
         "stores": all_stores,  # pentru dropdown-ul de filtrare
         "categories": categories,
@@ -124,10 +86,13 @@ async def view_orders_page(
         "address_status_options": address_status_options,
         "courier_status_group_options": courier_status_group_options,
         "filter_counts": filter_counts,
-        "courier_tracking_map": courier_tracking_map,
+        "courier_tracking_map": config_loader.courier_tracking_map(),
         "page": page,
         "per_page": per_page,
         "total_pages": total_pages,
+        "page_numbers": get_pagination_numbers(page, total_pages),
+        "next_cursor": page_info["next_cursor"],
+        "prev_cursor": page_info["prev_cursor"],
         "sort_by": sort_by,
         "sort_order": sort_order,
         "filters": decoded_filters,
@@ -135,3 +100,15 @@ async def view_orders_page(
 
     }
     return templates.TemplateResponse("index.html", context)
+
+
+@router.get("/view/export", name="export_orders")
+async def export_orders(request: Request, format: str = "csv"):
+    """Exportă toate comenzile care corespund filtrelor din /view (fără paginare), ca CSV sau XLSX."""
+    try:
+        body, media_type, filename = export_service.open_export(format, request.query_params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,4 +1,5 @@
 # routes/printing.py
+import asyncio
 import logging
 import math
 from pathlib import Path
@@ -6,25 +7,27 @@ from datetime import datetime, timezone
 from typing import List
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, update
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, FileResponse
 from fastapi.templating import Jinja2Templates
 from starlette.background import BackgroundTasks
 
 import models
 from database import get_db
-from services import print_service
+from services import print_service, label_service, picklist_service
 from routes.background import update_shopify_in_background  # <- use the routes version
 from dependencies import get_templates
 from settings import settings
 
+ARCHIVE_BASE_DIR = Path('awb_archive')
+
 router = APIRouter(tags=['Print View'])
 
 @router.get("/print-view", response_class=HTMLResponse, name="get_print_view_page")
 async def get_print_view_page(request: Request, db: AsyncSession = Depends(get_db), templates: Jinja2Templates = Depends(get_templates)):
-    latest_shipment_subq = (select(models.Shipment.order_id, func.max(models.Shipment.id).label("max_id")).group_by(models.Shipment.order_id).alias("latest_shipment_subq"))
-    supported_couriers_filter = or_(models.Shipment.courier.ilike('%dpd%'), models.Shipment.courier.ilike('%sameday%'))
+    latest_shipment_subq = print_service.latest_shipment_subquery()
+    supported_couriers_filter = print_service.supported_couriers_filter()
     unprinted_counts_query = (
         select(models.StoreCategory.id, func.count(models.Order.id.distinct()))
         .join(models.store_category_map).join(models.Store).join(models.Order)
@@ -60,5 +63,62 @@ async def process_and_print_selected_batches(request: Request, background_tasks:
     if not category:
         raise HTTPException(status_code=404, detail="Categoria nu a fost găsită.")
 
-    # TODO: implementarea selectării comenzilor din loturile cerute + generare PDF
-    return {"ok": True, "message": "Funcția de printare loturi urmează să fie implementată."}
+    batches = await print_service.get_category_batches(db, category_id)
+    selected = [batches[n - 1] for n in sorted(set(batch_nums_list)) if 1 <= n <= len(batches)]
+    if not selected:
+        raise HTTPException(status_code=404, detail="Loturile selectate nu mai există (au fost deja printate?).")
+
+    # Loturile pre-asamblate de worker se iau din cache; restul se construiesc acum. Fișierele din
+    # cache nu se mută în arhivă: worker-ul și alte printări le pot șterge oricând, deci le citim.
+    batch_contents = []
+    for shipments in selected:
+        content, failed = await print_service.load_batch_pdf(db, category_id, shipments, category.name)
+        if not content:
+            detail = ', '.join(list(failed)[:10]) or "lotul nu a putut fi asamblat"
+            raise HTTPException(status_code=502, detail=f"Etichete indisponibile: {detail}")
+        batch_contents.append(content)
+
+    now = datetime.now(timezone.utc)
+    day_dir = ARCHIVE_BASE_DIR / now.strftime('%Y-%m-%d')
+    day_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = day_dir / f"{category.id}_{now.strftime('%H%M%S')}_{'-'.join(str(n) for n in batch_nums_list)}.pdf"
+
+    printed = [s for shipments in selected for s in shipments]
+    archive_picklist = print_service.picklist_path(archive_path)
+
+    if len(batch_contents) == 1:
+        merged, picklist = batch_contents[0]
+    else:
+        pdf_map = {str(i): labels for i, (labels, _) in enumerate(batch_contents)}
+        merged = await asyncio.to_thread(label_service.merge_labels, pdf_map)
+        # o singură listă de picking pentru toate loturile selectate
+        picklist = await picklist_service.build_picklist_pdf(
+            db, [s.order_id for s in printed], picklist_service.picklist_title(category.name)
+        )
+    await asyncio.to_thread(archive_path.write_bytes, merged)
+    await asyncio.to_thread(archive_picklist.write_bytes, picklist)
+    for shipments in selected:
+        # după printare lotul nu mai corespunde listei de neprintate
+        batch_path = print_service.batch_pdf_path(category_id, shipments)
+        batch_path.unlink(missing_ok=True)
+        print_service.picklist_path(batch_path).unlink(missing_ok=True)
+
+    awbs = [s.awb for s in printed]
+    await db.execute(
+        update(models.Shipment)
+        .where(models.Shipment.awb.in_(awbs), models.Shipment.printed_at.is_(None))
+        .values(printed_at=now)
+    )
+    db.add(models.PrintLog(
+        created_at=now,
+        category_name=category.name,
+        category_id=category.id,
+        awb_count=len(printed),
+        user_ip=request.client.host if request.client else None,
+        pdf_path=str(archive_path),
+        entries=[models.PrintLogEntry(order_name=s.order.name, awb=s.awb) for s in printed],
+    ))
+    await db.commit()
+
+    logging.info("Print Hub: %s AWB-uri printate pentru categoria %s.", len(printed), category.name)
+    return FileResponse(archive_path, media_type="application/pdf", filename=archive_path.name)
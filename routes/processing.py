@@ -4,15 +4,15 @@ from fastapi import APIRouter, Depends, Request, HTTPException
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, desc
-from typing import List
+from sqlalchemy import select, desc, update
+from typing import List, Optional
 from pydantic import BaseModel
 
 from database import get_db
 import models
 import schemas
 from templating import templates
-from services.courier_service import get_courier_service_by_name
+from services import awb_service
 import crud.couriers as couriers_crud
 
 router = APIRouter(
@@ -60,56 +60,42 @@ class AwbCreationPayload(BaseModel):
     order_ids: List[int]
     courier_account_key: str
     options: schemas.AwbCreateOptions
+    idempotency_key: Optional[str] = None
 
 @router.post("/create-awbs", summary="Creează AWB-uri pentru una sau mai multe comenzi")
 async def create_awbs_endpoint(
     payload: AwbCreationPayload,
     db: AsyncSession = Depends(get_db)
 ):
-    success_count = 0
-    error_count = 0
-    errors = []
-
     courier_type = payload.courier_account_key.split('-')[0]
-
-    for order_id in payload.order_ids:
-        order_name_for_error = f"ID {order_id}"
-        try:
-            order = await db.get(models.Order, order_id, options=[selectinload(models.Order.line_items)])
-            if not order:
-                raise ValueError(f"Comanda cu ID {order_id} nu a fost găsită.")
-            
-            order_name_for_error = order.name
-
-            if order.processing_status == 'processed':
-                raise ValueError(f"Comanda {order.name} are deja un AWB generat.")
-
-            courier_service = get_courier_service_by_name(courier_type)
-            
-            awb_result = await courier_service.create_awb(
-                db=db,
-                order=order,
-                account_key=payload.courier_account_key,
-                options=payload.options
-            )
-
-            if awb_result and getattr(awb_result, 'success', False):
-                success_count += 1
-                order.processing_status = 'processed'
-                db.add(order)
-            else:
-                error_message = getattr(awb_result, 'error_message', 'Eroare necunoscută de la curier.')
-                raise ValueError(error_message)
-
-        except Exception as e:
-            error_count += 1
-            errors.append(f"Comanda {order_name_for_error}: {str(e)}")
-            
-    await db.commit()
+    options = payload.options.model_dump(exclude_none=True)
+
+    # Registrul awb_requests garantează un singur AWB per comandă și cont:
+    # o comandă care are deja AWB îl primește înapoi, fără un nou apel la curier.
+    try:
+        created, failed = await awb_service.create_awbs_bulk(
+            db,
+            payload.order_ids,
+            payload.courier_account_key,
+            options_for=lambda order: options,
+            courier=courier_type.upper(),
+            idempotency_key=payload.idempotency_key,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if created:
+        await db.execute(
+            update(models.Order)
+            .where(models.Order.id.in_([r["order_id"] for r in created]))
+            .values(processing_status='processed')
+        )
+        await db.commit()
 
     return {
         "message": "Procesare finalizată.",
-        "success_count": success_count,
-        "error_count": error_count,
-        "errors": errors
-    }
\ No newline at end of file
+        "success_count": len(created),
+        "error_count": len(failed),
+        "errors": [f"Comanda ID {r['order_id']}: {r['error']}" for r in failed],
+        "created": created,
+    }
@@ -10,6 +10,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 import models
+import schemas
+from services import courier_catalog_service, profile_rules_service
 
 # Core router for this module
 router = APIRouter(tags=["settings"])
@@ -39,6 +41,19 @@ async def _get_profile(db: AsyncSession, profile_id: int) -> models.ShipmentProf
     return prof
 
 
+async def _validate_service_id(db: AsyncSession, account_key: str, service_id: Optional[int]) -> None:
+    """Verifică serviciul implicit față de catalogul DPD din cache (fără apel live; sare peste dacă e gol)."""
+    if not service_id:
+        return
+    res = await db.execute(select(models.CourierAccount).where(models.CourierAccount.account_key == account_key))
+    account = res.scalar_one_or_none()
+    if not account or not (account.courier_type or "").lower().startswith("dpd"):
+        return
+    known = await courier_catalog_service.known_service_ids(db, account)
+    if known is not None and service_id not in known:
+        raise HTTPException(status_code=400, detail=f"Serviciul DPD {service_id} nu este disponibil pentru contul {account_key}.")
+
+
 # ---------- pages ----------
 
 @router.get("/settings/couriers", name="get_couriers_page")
@@ -82,6 +97,7 @@ async def create_shipment_profile(
     default_packing: Optional[str] = Form(None),   # <-- new
     db: AsyncSession = Depends(get_db),
 ):
+    await _validate_service_id(db, account_key.strip(), default_service_id)
     prof = models.ShipmentProfile(
         name=name.strip(),
         account_key=account_key.strip(),
@@ -116,6 +132,7 @@ async def update_shipment_profile(
     db: AsyncSession = Depends(get_db),
 ):
     prof = await _get_profile(db, profile_id)
+    await _validate_service_id(db, account_key.strip(), default_service_id)
     prof.name = name.strip()
     prof.account_key = account_key.strip()
     prof.default_parcels = default_parcels or 1
@@ -137,3 +154,56 @@ async def delete_shipment_profile(request: Request, profile_id: int, db: AsyncSe
     await db.delete(prof)
     await db.commit()
     return RedirectResponse(url=request.url_for("get_couriers_page") + "#profiles", status_code=303)
+
+
+# ---------- reguli de auto-alocare (API JSON) ----------
+
+@router.get("/api/shipment-profile-rules", response_model=List[schemas.ShipmentProfileRuleOut])
+async def list_profile_rules(db: AsyncSession = Depends(get_db)):
+    res = await db.execute(
+        select(models.ShipmentProfileRule).order_by(models.ShipmentProfileRule.priority, models.ShipmentProfileRule.id)
+    )
+    return list(res.scalars().all())
+
+
+@router.post("/api/shipment-profile-rules", response_model=schemas.ShipmentProfileRuleOut)
+async def create_profile_rule(payload: schemas.ShipmentProfileRuleIn, db: AsyncSession = Depends(get_db)):
+    await _get_profile(db, payload.profile_id)
+    rule = models.ShipmentProfileRule(**payload.model_dump())
+    db.add(rule)
+    await db.commit()
+    await db.refresh(rule)
+    profile_rules_service.invalidate()
+    return rule
+
+
+@router.put("/api/shipment-profile-rules/{rule_id}", response_model=schemas.ShipmentProfileRuleOut)
+async def update_profile_rule(rule_id: int, payload: schemas.ShipmentProfileRuleIn, db: AsyncSession = Depends(get_db)):
+    rule = await db.get(models.ShipmentProfileRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Regula nu există.")
+    await _get_profile(db, payload.profile_id)
+    for field, value in payload.model_dump().items():
+        setattr(rule, field, value)
+    await db.commit()
+    await db.refresh(rule)
+    profile_rules_service.invalidate()
+    return rule
+
+
+@router.delete("/api/shipment-profile-rules/{rule_id}")
+async def delete_profile_rule(rule_id: int, db: AsyncSession = Depends(get_db)):
+    rule = await db.get(models.ShipmentProfileRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Regula nu există.")
+    await db.delete(rule)
+    await db.commit()
+    profile_rules_service.invalidate()
+    return {"success": True}
+
+
+@router.post("/api/shipment-profile-rules/reassign")
+async def reassign_profiles(db: AsyncSession = Depends(get_db)):
+    """Reaplică regulile pe toate comenzile fără AWB (ex. după editarea regulilor)."""
+    evaluated = await profile_rules_service.reassign_open_orders(db)
+    return {"success": True, "evaluated": evaluated}
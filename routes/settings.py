@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Request, Form, HTTPException
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
@@ -9,6 +9,7 @@ from database import get_db
 from dependencies import get_templates
 from crud import stores as crud_stores
 from crud import couriers as crud_couriers
+from services import sku_catalog_service
 
 router = APIRouter(
     prefix="/settings",
@@ -117,4 +118,14 @@ async def create_courier_account(request: Request, db: AsyncSession = Depends(ge
 @router.post("/mappings", name="create_courier_mapping")
 async def create_courier_mapping(db: AsyncSession = Depends(get_db), shopify_name: str = Form(...), account_key: str = Form(...)):
     await crud_couriers.create_courier_mapping(db, shopify_name=shopify_name, account_key=account_key)
-    return RedirectResponse(url="/settings/couriers", status_code=303)
\ No newline at end of file
+    return RedirectResponse(url="/settings/couriers", status_code=303)
+
+
+# --- Catalog SKU (greutăți / dimensiuni) ---
+@router.post("/sku-catalog/import", name="import_sku_catalog")
+async def import_sku_catalog(db: AsyncSession = Depends(get_db), file: UploadFile = File(...)):
+    # coloane: sku, weight_kg, length_cm, width_cm, height_cm, units_per_parcel (aliasuri RO acceptate)
+    try:
+        return await sku_catalog_service.import_csv(db, file.file)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Fișier CSV invalid: {e}")
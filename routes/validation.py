@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Request, Query, HTTPException
 from fastapi.responses import HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, not_, desc, or_
+from sqlalchemy import bindparam, select, func, not_, desc, or_
 from sqlalchemy.orm import selectinload
 import math
 
@@ -16,6 +16,9 @@ router = APIRouter(
     tags=["Validation"]
 )
 
+# inline (literal_execute): predicatul indexului parțial ix_orders_awaiting_validation
+AWAITING_VALIDATION_STATUSES = ['pending', 'invalid', 'partial_match', 'failed']
+
 @router.get("/", response_class=HTMLResponse, name="get_validation_page")
 async def get_validation_page(
     request: Request,
@@ -23,7 +26,9 @@ async def get_validation_page(
     page: int = Query(1, ge=1),
     per_page: int = Query(100, ge=1, le=1000),
 ):
-    validation_condition = Order.address_status.in_(['pending', 'invalid', 'partial_match', 'failed'])
+    validation_condition = Order.address_status.in_(
+        bindparam('awaiting_statuses', AWAITING_VALIDATION_STATUSES, expanding=True, literal_execute=True)
+    )
 
     count_stmt = select(func.count(Order.id)).where(validation_condition)
     total_orders = (await db.execute(count_stmt)).scalar_one() or 0
@@ -103,4 +103,23 @@ class AwbCreateOptions(BaseModel):
 class AwbCreateParams(BaseModel):
     order_id: int
     courier_account_key: str
-    options: AwbCreateOptions
\ No newline at end of file
+    options: AwbCreateOptions
+
+# === REGULI DE AUTO-ALOCARE A PROFILULUI DE EXPEDIȚIE ===
+
+class ShipmentProfileRuleIn(BaseModel):
+    name: str
+    profile_id: int
+    priority: int = 100
+    is_active: bool = True
+    store_category_id: Optional[int] = None
+    payment_method: Optional[str] = None
+    sku_patterns: List[str] = []
+    sku_mode: Literal['any', 'only'] = 'any'
+    min_quantity: Optional[int] = None
+    max_quantity: Optional[int] = None
+
+class ShipmentProfileRuleOut(ShipmentProfileRuleIn):
+    id: int
+
+    model_config = ConfigDict(from_attributes=True)
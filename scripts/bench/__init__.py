@@ -0,0 +1,5 @@
+# scripts/bench
+#
+# Set de date sintetic (magazine, comenzi, produse, livrări, nomenclator de adrese) și scenarii
+# cronometrate peste funcțiile reale din services/, cu rezultate JSON comparabile între rulări.
+# Utilizare: vezi __main__.py (`python -m scripts.bench --help`).
@@ -0,0 +1,191 @@
+# scripts/bench/__main__.py
+#
+#   python -m scripts.bench generate --orders 200000
+#   python -m scripts.bench run --out bench-main.json
+#   python -m scripts.bench run --only orders_list,tracking --repeat 10 --out bench-branch.json
+#   python -m scripts.bench compare bench-main.json bench-branch.json --threshold 0.15
+#   python -m scripts.bench drop
+#
+# Baza de date este cea din DATABASE_URL (serviciile folosesc `database.engine`); totul se
+# petrece în schema --schema (implicit `bench`), tabelele aplicației nu sunt atinse.
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(ROOT))
+
+from sqlalchemy import text
+
+from database import engine
+from services import count_service, label_service
+
+from .dataset import DatasetConfig, drop_schema, generate, use_schema
+from .scenarios import GROUPS, RunConfig, measure
+
+TABLES = ("stores", "orders", "line_items", "shipments", "romania_addresses")
+
+
+def _git_revision() -> Any:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _redis_available() -> bool:
+    try:
+        await (await count_service._redis()).ping()
+        return True
+    except Exception:
+        # fără Redis count_service cade pe generația locală; nu mai reîncercăm conexiunea în timpul
+        # rulării, altfel pauzele de reconectare ar apărea în timpii scenariilor
+        count_service._redis_down_until = float("inf")
+        return False
+
+
+async def _metadata(schema: str) -> Dict[str, Any]:
+    async with engine.connect() as conn:
+        server_version = (await conn.execute(text("SHOW server_version"))).scalar_one()
+        rows = {t: (await conn.execute(text(f"SELECT count(*) FROM {t}"))).scalar_one() for t in TABLES}
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "postgres": server_version,
+        "schema": schema,
+        "rows": rows,
+        "redis": await _redis_available(),
+    }
+
+
+async def run(args) -> Dict[str, Any]:
+    config = RunConfig(
+        repeat=args.repeat, warmup=args.warmup, sync_orders=args.sync_orders, validate_days=args.validate_days,
+        tracking_days=args.tracking_days, courier_latency_ms=args.courier_latency_ms, labels=args.labels,
+        seed=args.seed,
+    )
+    groups: List[str] = args.only.split(",") if args.only else list(GROUPS)
+    unknown = [g for g in groups if g not in GROUPS]
+    if unknown:
+        raise SystemExit(f"Grupuri necunoscute: {', '.join(unknown)} (disponibile: {', '.join(GROUPS)})")
+
+    report: Dict[str, Any] = {"meta": await _metadata(args.schema), "config": vars(config), "scenarios": {}}
+    try:
+        for group in groups:
+            # grupurile rulează în ordine: fiecare își pregătește datele după ce precedentul a făcut teardown
+            for scenario in await GROUPS[group](config):
+                print(f"{scenario.name} ...", file=sys.stderr)
+                result = await measure(scenario, config.repeat, config.warmup)
+                report["scenarios"][scenario.name] = {"group": group, **result}
+                print(f"{scenario.name}: mediana {result['median_ms']} ms", file=sys.stderr)
+    finally:
+        label_service.shutdown_pdf_pool()
+    return report
+
+
+async def _disposing(coro):
+    try:
+        return await coro
+    finally:
+        await engine.dispose()
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Mediana fiecărui scenariu comun; regresie = mai lent cu peste `threshold` (fracție)."""
+    rows, regressions = {}, []
+    for name, result in new["scenarios"].items():
+        if name not in base["scenarios"]:
+            continue
+        before, after = base["scenarios"][name]["median_ms"], result["median_ms"]
+        change = (after - before) / before if before else 0.0
+        rows[name] = {"base_ms": before, "new_ms": after, "change": round(change, 4)}
+        if change > threshold:
+            regressions.append(name)
+    return {
+        "base": base["meta"].get("git_revision"),
+        "new": new["meta"].get("git_revision"),
+        "threshold": threshold,
+        "scenarios": rows,
+        "regressions": regressions,
+    }
+
+
+def _write(result: Dict[str, Any], out: Path = None) -> None:
+    output = json.dumps(result, indent=2, ensure_ascii=False, default=str)
+    if out:
+        out.write_text(output, encoding="utf-8")
+        print(f"Rezultate scrise în {out}")
+    else:
+        print(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench", description="Date sintetice și benchmark pe funcțiile reale din services/.")
+    parser.add_argument("--schema", default="bench", help="schema Postgres folosită, cu prefixul bench (implicit: bench)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="afișează și logurile serviciilor")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="(re)creează schema și generează setul de date")
+    gen.add_argument("--orders", type=int, default=100_000, help="10k - 1M comenzi")
+    gen.add_argument("--stores", type=int, default=5)
+    gen.add_argument("--days", type=int, default=180, help="intervalul de creare al comenzilor")
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--no-indexes", action="store_true", help="fără indecșii trigram / parțiali din migrări")
+    gen.add_argument("--out", type=Path)
+
+    bench = sub.add_parser("run", help="rulează scenariile și scrie rezultatele JSON")
+    bench.add_argument("--only", help=f"grupuri separate prin virgulă: {', '.join(GROUPS)}")
+    bench.add_argument("--repeat", type=int, default=5)
+    bench.add_argument("--warmup", type=int, default=1)
+    bench.add_argument("--sync-orders", type=int, default=1000, help="comenzi per rulare de sincronizare")
+    bench.add_argument("--validate-days", type=int, default=30)
+    bench.add_argument("--tracking-days", type=int, default=14)
+    bench.add_argument("--courier-latency-ms", type=float, default=0.0, help="latența simulată a API-ului de tracking")
+    bench.add_argument("--labels", type=int, default=200)
+    bench.add_argument("--seed", type=int, default=42)
+    bench.add_argument("--out", type=Path)
+
+    cmp_ = sub.add_parser("compare", help="compară două rapoarte JSON (ieșire 1 la regresii)")
+    cmp_.add_argument("base", type=Path)
+    cmp_.add_argument("new", type=Path)
+    cmp_.add_argument("--threshold", type=float, default=0.10)
+    cmp_.add_argument("--out", type=Path)
+
+    sub.add_parser("drop", help="șterge schema de benchmark")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s %(message)s")
+    if args.command == "compare":
+        result = compare(
+            json.loads(args.base.read_text(encoding="utf-8")), json.loads(args.new.read_text(encoding="utf-8")), args.threshold,
+        )
+        _write(result, args.out)
+        return 1 if result["regressions"] else 0
+
+    try:
+        use_schema(args.schema)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.command == "generate":
+        config = DatasetConfig(orders=args.orders, stores=args.stores, days=args.days, seed=args.seed)
+        _write(asyncio.run(_disposing(generate(args.schema, config, with_indexes=not args.no_indexes))), args.out)
+    elif args.command == "run":
+        _write(asyncio.run(_disposing(run(args))), args.out)
+    elif args.command == "drop":
+        asyncio.run(_disposing(drop_schema(args.schema)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,403 @@
+# scripts/bench/dataset.py
+#
+# Generatorul setului de date sintetic: magazine, comenzi, produse, livrări și nomenclatorul de
+# adrese, cu distribuții apropiate de producție (ramburs/card, statusuri de curier pe vârstă,
+# adrese cu greșelile obișnuite: fără număr, cod poștal greșit sau trunchiat, easybox, oraș greșit).
+# Totul se scrie într-o schemă separată (implicit `bench`), prin `database.engine`, astfel încât
+# serviciile reale rulează nemodificate peste ea. Generarea e deterministă pentru un `seed` dat.
+
+import importlib.util
+import itertools
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, text
+
+import models
+from database import engine
+from services.address_service import strip_diacritics
+from services.filter_service import ORDERS_VIEW_SQL
+from services.sync_service import _normalize_account_key, map_payment_method
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+MIGRATIONS = ROOT / "alembic" / "versions"
+INSERT_BATCH = 5000
+# schema se șterge cu DROP ... CASCADE pe baza din DATABASE_URL: doar scheme dedicate benchmark-ului
+SCHEMA_RE = re.compile(r"^bench[a-z0-9_]*$")
+
+# id-urile Shopify ale comenzilor generate încep cu 61..., cele ale scenariului de sincronizare cu 69...
+SHOPIFY_ID_BASE = 6_100_000_000_000
+SHOPIFY_FULFILLMENT_BASE = 5_100_000_000_000
+
+# (județ, localitate, sector, [(tip arteră, stradă, cod poștal)])
+LOCALITIES: List[Tuple[str, str, Optional[str], List[Tuple[str, str, str]]]] = [
+    ("București", "București", "1", [("Calea", "Victoriei", "010063"), ("Bulevardul", "Aviatorilor", "011853"), ("Strada", "Paris", "011815")]),
+    ("București", "București", "3", [("Bulevardul", "Unirii", "030833"), ("Strada", "Baba Novac", "031622")]),
+    ("București", "București", "6", [("Bulevardul", "Iuliu Maniu", "061083"), ("Strada", "Drumul Taberei", "061357")]),
+    ("Cluj", "Cluj-Napoca", None, [("Strada", "Memorandumului", "400114"), ("Calea", "Dorobanților", "400117"), ("Strada", "Observatorului", "400363")]),
+    ("Timiș", "Timișoara", None, [("Bulevardul", "Revoluției din 1989", "300034"), ("Strada", "Circumvalațiunii", "300013")]),
+    ("Iași", "Iași", None, [("Bulevardul", "Ștefan cel Mare și Sfânt", "700064"), ("Strada", "Păcurari", "700511")]),
+    ("Constanța", "Constanța", None, [("Bulevardul", "Tomis", "900178"), ("Bulevardul", "Mamaia", "900527")]),
+    ("Brașov", "Brașov", None, [("Strada", "Republicii", "500030"), ("Bulevardul", "15 Noiembrie", "500097")]),
+    ("Dolj", "Craiova", None, [("Calea", "București", "200352"), ("Strada", "1 Decembrie 1918", "200412")]),
+    ("Prahova", "Ploiești", None, [("Strada", "Gheorghe Doja", "100066"), ("Bulevardul", "Republicii", "100072")]),
+    ("Bihor", "Oradea", None, [("Strada", "Republicii", "410159"), ("Calea", "Aradului", "410223")]),
+    ("Sibiu", "Sibiu", None, [("Strada", "Nicolae Bălcescu", "550159"), ("Calea", "Dumbrăvii", "550324")]),
+    ("Argeș", "Pitești", None, [("Strada", "Victoriei", "110017"), ("Bulevardul", "Republicii", "110050")]),
+    ("Ilfov", "Voluntari", None, [("Strada", "Erou Iancu Nicolae", "077190"), ("Bulevardul", "Pipera", "077191")]),
+    ("Suceava", "Suceava", None, [("Strada", "Ștefan cel Mare", "720062")]),
+    ("Galați", "Galați", None, [("Strada", "Brăilei", "800025")]),
+]
+FILLER_STREETS = [
+    "Florilor", "Teilor", "Lalelelor", "Morii", "Gării", "Libertății", "Unirii", "Mihai Eminescu",
+    "Avram Iancu", "Independenței", "Trandafirilor", "Zorilor", "Crișan", "Horea", "Closca",
+    "Mărășești", "Plopilor", "Salcâmilor", "Viilor", "Fabricii", "Școlii", "Bisericii", "Câmpului",
+]
+
+FIRST_NAMES = [
+    "Andrei", "Alexandru", "Mihai", "Ion", "Gabriel", "Cristian", "Florin", "Bogdan", "Radu", "Vlad",
+    "Maria", "Elena", "Ioana", "Ana", "Andreea", "Cristina", "Alina", "Roxana", "Mihaela", "Gabriela",
+]
+LAST_NAMES = [
+    "Popescu", "Ionescu", "Popa", "Pop", "Constantin", "Stan", "Dumitru", "Stoica", "Gheorghe", "Rusu",
+    "Munteanu", "Matei", "Ciobanu", "Moldovan", "Lazăr", "Florea", "Marin", "Tudor", "Dobre", "Barbu",
+]
+STORE_NAMES = [
+    "Casa Verde", "Atelier Lemn", "Bijuterii Aurora", "Grădina Bunicii", "Sport Carpați", "Pet Corner",
+    "Ceai și Cafea", "Jucării Istețe", "Cosmetice Naturale", "Decor Acasă",
+]
+PRODUCT_NOUNS = [
+    "Lumânare parfumată", "Cană ceramică", "Set prosoape", "Husă pernă", "Tablou canvas", "Brățară argint",
+    "Rucsac drumeție", "Ceai verde", "Cafea boabe", "Jucărie din lemn", "Cremă de față", "Ghiveci",
+]
+PRODUCT_VARIANTS = ["Mic", "Mediu", "Mare", "Alb", "Negru", "Verde", "Set 2", "Set 3", "Premium", "Clasic"]
+
+# compania din trackingInfo (Shopify) -> pondere
+COURIERS = [("DPD Romania", 0.55), ("Sameday", 0.40), ("Econt", 0.05)]
+# statusurile brute primite de la curieri, pe etape
+IN_FLIGHT_STATUSES = ["AWB Generat", "Expediat", "In tranzit", "Out for delivery", "Ridicare din locker"]
+FINAL_OUTCOMES = [("Delivered", 0.86), ("Refuzat", 0.08), ("Returnat", 0.04), ("Anulat", 0.02)]
+# statusul adresei după validare, pentru comenzile istorice
+ADDRESS_STATUSES = [("valid", 0.78), ("nevalidat", 0.08), ("invalid", 0.06), ("partial_match", 0.05), ("pending", 0.02), ("failed", 0.01)]
+
+COD_GATEWAYS = ["Cash on Delivery"]
+CARD_GATEWAYS = ["netopia"]
+
+
+@dataclass
+class DatasetConfig:
+    orders: int = 100_000
+    stores: int = 5
+    days: int = 180
+    filler_streets_per_locality: int = 400
+    seed: int = 42
+
+
+def weighted_choice(rng: random.Random, choices: List[Tuple[Any, float]]) -> Any:
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def schema_identifier(schema: str) -> str:
+    """Numele schemei, validat (prefix `bench`, deci niciodată `public`) și citat pentru SQL."""
+    if not SCHEMA_RE.match(schema or ""):
+        raise ValueError(f"Schemă de benchmark invalidă: {schema!r} (numele trebuie să înceapă cu „bench”).")
+    return engine.dialect.identifier_preparer.quote_identifier(schema)
+
+
+def use_schema(schema: str) -> None:
+    """Toate conexiunile `database.engine` lucrează în schema de benchmark (extensiile rămân în public)."""
+    quoted = schema_identifier(schema)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _search_path(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"SET search_path TO {quoted}, public")
+        cursor.close()
+
+
+def _load_migration(filename_prefix: str):
+    """Indecșii vin direct din migrări, ca schema de benchmark să nu poată diverge de producție."""
+    path = next(MIGRATIONS.glob(f"{filename_prefix}_*.py"))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def migration_index_ddl() -> List[str]:
+    """DDL-ul indecșilor care nu sunt declarați în models.py (trigram, parțiali, keyset)."""
+    trigram = _load_migration("a4e81c6d2f37")
+    partial = _load_migration("c9e2b4f71a05")
+    keyset = _load_migration("d3a7f5e28c14")
+    ddl = [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (({expr}) gin_trgm_ops)"
+        for name, table, expr in trigram.TRIGRAM_INDEXES
+    ]
+    ddl.append("CREATE INDEX IF NOT EXISTS ix_orders_name ON orders (name)")
+    ddl.extend(partial.index_ddl(*index, concurrently=False) for index in partial.INDEXES)
+    ddl.extend(keyset.index_ddl(*index, concurrently=False) for index in keyset.INDEXES)
+    return ddl
+
+
+class Generator:
+    """Produce rândurile tabelelor; id-urile sunt alocate aici, ca legăturile să nu ceară RETURNING."""
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.products = [
+            (f"SKU-{i:05d}", f"{noun} {variant}")
+            for i, (noun, variant) in enumerate(itertools.product(PRODUCT_NOUNS, PRODUCT_VARIANTS))
+        ]
+
+    # --- nomenclator ---
+
+    def stores(self) -> List[Dict[str, Any]]:
+        rows = []
+        for i in range(1, self.config.stores + 1):
+            base = STORE_NAMES[(i - 1) % len(STORE_NAMES)]
+            name = base if i <= len(STORE_NAMES) else f"{base} {i}"
+            slug = strip_diacritics(name.lower()).replace(" ", "-")
+            rows.append({
+                "id": i, "name": name, "domain": f"{slug}-{i}.myshopify.com", "api_version": "2025-07",
+                "pii_source": "shopify", "is_active": True, "paper_size": "A4" if i % 2 else "A6",
+            })
+        return rows
+
+    def addresses(self) -> Iterator[Dict[str, Any]]:
+        for judet, localitate, sector, streets in LOCALITIES:
+            for tip, strada, zip_code in streets:
+                yield {"judet": judet, "localitate": localitate, "sector": sector,
+                       "tip_artera": tip, "nume_strada": strada, "cod_postal": zip_code}
+            prefix = streets[0][2][:3]
+            for _ in range(self.config.filler_streets_per_locality):
+                yield {
+                    "judet": judet, "localitate": localitate, "sector": sector,
+                    "tip_artera": self.rng.choice(["Strada", "Aleea", "Intrarea"]),
+                    "nume_strada": f"{self.rng.choice(FILLER_STREETS)} {self.rng.randint(1, 40)}",
+                    "cod_postal": f"{prefix}{self.rng.randint(0, 999):03d}",
+                }
+
+    # --- comenzi ---
+
+    def person(self) -> Tuple[str, str]:
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def phone(self) -> str:
+        digits = f"7{self.rng.randint(20, 99)}{self.rng.randint(0, 999999):06d}"
+        return self.rng.choice([f"0{digits}", f"+40{digits}", f"0{digits[:3]} {digits[3:6]} {digits[6:]}"])
+
+    def shipping_address(self) -> Dict[str, Any]:
+        """Adresă din nomenclator, cu defectele întâlnite în comenzile reale."""
+        rng = self.rng
+        judet, localitate, sector, streets = rng.choice(LOCALITIES)
+        tip, strada, zip_code = rng.choice(streets)
+        number = str(rng.randint(1, 180))
+        address1 = f"{rng.choice([tip, tip[:3] + '.', ''])} {strada} nr. {number}".strip()
+        address2 = rng.choice([None, None, f"Bl. {rng.choice('ABCDM')}{rng.randint(1, 30)}, Sc. {rng.randint(1, 4)}, Ap. {rng.randint(1, 80)}"])
+        if sector:
+            address2 = ", ".join(p for p in (address2, f"Sector {sector}") if p)
+        city = localitate
+        province = rng.choice([judet, strip_diacritics(judet), judet.upper()])
+
+        defect = rng.random()
+        if defect < 0.07:
+            address1 = f"{tip} {strada} {rng.choice(['fara numar', 'FN', 'f.n.'])}"
+        elif defect < 0.13:
+            zip_code = f"{rng.randint(100000, 999999)}"
+        elif defect < 0.17:
+            zip_code = zip_code.lstrip("0")  # coduri introduse ca număr în formular
+        elif defect < 0.22:
+            address1, address2 = f"Easybox {rng.choice(['Lidl', 'Kaufland', 'Profi', 'OMV'])} {strada}", None
+        elif defect < 0.26:
+            city = rng.choice(LOCALITIES)[1]
+        return {
+            "address1": address1, "address2": address2, "city": city,
+            "province": province, "zip": zip_code, "country": "Romania",
+        }
+
+    def line_items(self) -> List[Tuple[str, str, int]]:
+        count = weighted_choice(self.rng, [(1, 0.55), (2, 0.25), (3, 0.12), (4, 0.08)])
+        return [(*self.rng.choice(self.products), self.rng.choice([1, 1, 1, 2, 3])) for _ in range(count)]
+
+    def courier_status(self, shipped_at: datetime) -> Tuple[Optional[str], Optional[datetime]]:
+        age = self.now - shipped_at
+        if age < timedelta(days=1):
+            return self.rng.choice([None, "AWB Generat"]), None
+        if age < timedelta(days=5) and self.rng.random() < 0.7:
+            status = self.rng.choice(IN_FLIGHT_STATUSES)
+            return status, shipped_at + timedelta(hours=self.rng.randint(2, 60))
+        return weighted_choice(self.rng, FINAL_OUTCOMES), shipped_at + timedelta(hours=self.rng.randint(20, 120))
+
+    def orders(self) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """(comandă, produse, livrări) pentru fiecare comandă, în ordinea id-urilor."""
+        rng, span = self.rng, self.config.days * 86400
+        line_item_id = shipment_id = 0
+        for order_id in range(1, self.config.orders + 1):
+            # mai multe comenzi recente decât vechi (creștere), fără goluri
+            created_at = self.now - timedelta(seconds=int(span * rng.random() ** 1.3))
+            is_cod = rng.random() < 0.62
+            financial_status = (
+                weighted_choice(rng, [("PENDING", 0.9), ("PAID", 0.08), ("VOIDED", 0.02)]) if is_cod
+                else weighted_choice(rng, [("PAID", 0.93), ("REFUNDED", 0.05), ("PARTIALLY_REFUNDED", 0.02)])
+            )
+            gateways = COD_GATEWAYS if is_cod else CARD_GATEWAYS
+            first, last = self.person()
+            address = self.shipping_address()
+            items = self.line_items()
+            total = sum(qty * rng.choice([29.9, 49.9, 79.0, 119.0, 189.9]) for _, _, qty in items) + 19.99
+
+            shipments = []
+            age = self.now - created_at
+            if age > timedelta(hours=6) and rng.random() < 0.9:
+                for attempt in range(2 if rng.random() < 0.03 else 1):
+                    shipment_id += 1
+                    company = weighted_choice(rng, COURIERS)
+                    shipped_at = created_at + timedelta(hours=rng.randint(2, 30) + attempt * 48)
+                    if shipped_at > self.now:
+                        shipped_at = self.now
+                    last_status, last_status_at = self.courier_status(shipped_at)
+                    printed = shipped_at < self.now - timedelta(days=2) or rng.random() < 0.4
+                    shipments.append({
+                        "id": shipment_id, "order_id": order_id,
+                        "shopify_fulfillment_id": str(SHOPIFY_FULFILLMENT_BASE + shipment_id),
+                        "fulfillment_created_at": shipped_at,
+                        "awb": f"{'1' if company.startswith('DPD') else '4EMG'}{rng.randint(10**9, 10**10 - 1)}",
+                        "courier": company, "account_key": _normalize_account_key(company),
+                        "paper_size": "A6", "printed_at": shipped_at + timedelta(minutes=30) if printed else None,
+                        "last_status": last_status, "last_status_at": last_status_at,
+                    })
+
+            latest_status = (shipments[-1]["last_status"] or "") if shipments else ""
+            order = {
+                "id": order_id,
+                "store_id": 1 + int(rng.random() ** 1.6 * self.config.stores),  # un magazin dominant
+                "shopify_order_id": str(SHOPIFY_ID_BASE + order_id),
+                "name": f"#{1000 + order_id}",
+                "customer": f"{first} {last}",
+                "created_at": created_at,
+                "financial_status": financial_status,
+                "total_price": round(total, 2),
+                "payment_gateway_names": ", ".join(gateways),
+                "mapped_payment": map_payment_method(gateways, financial_status),
+                "tags": rng.choice(["", "", "", "vip", "retur", "hold"]),
+                "note": rng.choice([None, None, None, "Vă rog sunați înainte de livrare", "Livrare după ora 17"]),
+                "sync_status": "synced",
+                "last_sync_at": self.now,
+                "shopify_status": "fulfilled" if shipments else "unfulfilled",
+                "fulfilled_at": shipments[0]["fulfillment_created_at"] if shipments else None,
+                "shipping_name": f"{first} {last}",
+                "shipping_address1": address["address1"],
+                "shipping_address2": address["address2"],
+                "shipping_phone": self.phone(),
+                "shipping_city": address["city"],
+                "shipping_zip": address["zip"],
+                "shipping_province": address["province"],
+                "shipping_country": address["country"],
+                "address_status": weighted_choice(rng, ADDRESS_STATUSES),
+                "processing_status": "Procesată" if shipments else "Neprocesată",
+                "assigned_courier": shipments[-1]["courier"] if shipments else None,
+                "is_on_hold_shopify": False,
+                "derived_status": (
+                    "✅ Livrată" if latest_status == "Delivered"
+                    else "❌ Refuzată" if latest_status in ("Refuzat", "Returnat")
+                    else "🚚 În curs de livrare" if shipments else "📦 Neprocesată"
+                ),
+            }
+            lines = []
+            for sku, title, quantity in items:
+                line_item_id += 1
+                lines.append({"id": line_item_id, "order_id": order_id, "sku": sku, "title": title, "quantity": quantity})
+            yield order, lines, shipments
+
+
+async def _insert(conn, table, rows: List[Dict[str, Any]]) -> None:
+    for i in range(0, len(rows), INSERT_BATCH):
+        await conn.execute(table.insert(), rows[i:i + INSERT_BATCH])
+
+
+async def create_schema(schema: str, with_indexes: bool = True) -> None:
+    quoted = schema_identifier(schema)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {quoted} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {quoted}"))
+        # orders_view e declarat ca Table în filter_service, dar în baza de date este o vizualizare
+        tables = [t for t in models.Base.metadata.sorted_tables if t.name != "orders_view"]
+        await conn.run_sync(models.Base.metadata.create_all, tables=tables)
+        await conn.execute(text(ORDERS_VIEW_SQL))
+        if with_indexes:
+            for ddl in migration_index_ddl():
+                await conn.execute(text(ddl))
+
+
+async def drop_schema(schema: str) -> None:
+    quoted = schema_identifier(schema)
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {quoted} CASCADE"))
+
+
+async def generate(schema: str, config: DatasetConfig, with_indexes: bool = True) -> Dict[str, Any]:
+    """(Re)creează schema și o populează; întoarce numărul de rânduri pe tabele și durata."""
+    started = time.perf_counter()
+    await create_schema(schema, with_indexes)
+    gen = Generator(config)
+    counts = {"stores": 0, "romania_addresses": 0, "orders": 0, "line_items": 0, "shipments": 0}
+
+    async with engine.begin() as conn:
+        stores = gen.stores()
+        await _insert(conn, models.Store.__table__, stores)
+        counts["stores"] = len(stores)
+
+        addresses = list(gen.addresses())
+        await _insert(conn, models.RomaniaAddress.__table__, addresses)
+        counts["romania_addresses"] = len(addresses)
+
+        orders, lines, shipments = [], [], []
+
+        async def flush():
+            # ordinea contează pentru cheile străine
+            await _insert(conn, models.Order.__table__, orders)
+            await _insert(conn, models.LineItem.__table__, lines)
+            await _insert(conn, models.Shipment.__table__, shipments)
+            counts["orders"] += len(orders)
+            counts["line_items"] += len(lines)
+            counts["shipments"] += len(shipments)
+            orders.clear()
+            lines.clear()
+            shipments.clear()
+
+        for order, order_lines, order_shipments in gen.orders():
+            orders.append(order)
+            lines.extend(order_lines)
+            shipments.extend(order_shipments)
+            if len(orders) >= INSERT_BATCH:
+                await flush()
+                if counts["orders"] % 50_000 == 0:
+                    print(f"Generate {counts['orders']} / {config.orders} comenzi...", file=sys.stderr)
+        await flush()
+
+        # id-urile au fost alocate explicit: aducem secvențele după ele
+        for table in ("stores", "romania_addresses", "orders", "line_items", "shipments"):
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            ))
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+
+    return {
+        "schema": schema,
+        "seed": config.seed,
+        "days": config.days,
+        "indexes_from_migrations": with_indexes,
+        "rows": counts,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
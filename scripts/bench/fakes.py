@@ -0,0 +1,158 @@
+# scripts/bench/fakes.py
+#
+# Dublurile pentru serviciile externe: comenzi în forma răspunsului GraphQL Shopify, un curier
+# care răspunde la tracking fără rețea și etichete PDF sintetice. Codul aplicației rulează
+# nemodificat; doar punctele de intrare către exterior sunt înlocuite pe durata scenariului.
+
+import asyncio
+import io
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject
+
+from services import courier_service
+from services.couriers.base import BaseCourier, TrackingResponse
+from services.label_layout import MM
+
+from .dataset import COD_GATEWAYS, CARD_GATEWAYS, COURIERS, Generator, weighted_choice
+
+SYNC_SHOPIFY_ID_BASE = 6_900_000_000_000
+SYNC_FULFILLMENT_BASE = 5_900_000_000_000
+TRACKING_PROGRESSION = ["AWB Generat", "Expediat", "In tranzit", "Out for delivery", "Delivered"]
+
+
+class FakeShopify:
+    """Pagini de comenzi ca în `shopify_service` (noduri GraphQL), gata pentru `_process_and_insert_orders_in_batches`."""
+
+    def __init__(self, generator: Generator):
+        self.gen = generator
+
+    def order_node(self, index: int) -> Dict[str, Any]:
+        gen, rng = self.gen, self.gen.rng
+        created_at = gen.now - timedelta(minutes=rng.randint(5, 3 * 24 * 60))
+        is_cod = rng.random() < 0.62
+        first, last = gen.person()
+        address = gen.shipping_address()
+        fulfillments = []
+        if rng.random() < 0.6:
+            company = weighted_choice(rng, COURIERS)
+            fulfillments.append({
+                "id": f"gid://shopify/Fulfillment/{SYNC_FULFILLMENT_BASE + index}",
+                "createdAt": (created_at + timedelta(hours=2)).isoformat().replace("+00:00", "Z"),
+                "trackingInfo": [{"number": f"BENCH{SYNC_FULFILLMENT_BASE + index}", "company": company}],
+            })
+        return {
+            "id": f"gid://shopify/Order/{SYNC_SHOPIFY_ID_BASE + index}",
+            "name": f"#S{100000 + index}",
+            "createdAt": created_at.isoformat().replace("+00:00", "Z"),
+            "displayFinancialStatus": "PENDING" if is_cod else "PAID",
+            "totalPriceSet": {"shopMoney": {"amount": f"{rng.uniform(40, 600):.2f}", "currencyCode": "RON"}},
+            "paymentGatewayNames": COD_GATEWAYS if is_cod else CARD_GATEWAYS,
+            "tags": rng.choice([[], [], ["vip"], ["hold"]]),
+            "note": rng.choice([None, "Livrare după ora 17"]),
+            "displayFulfillmentStatus": "FULFILLED" if fulfillments else "UNFULFILLED",
+            "customer": {"firstName": first, "lastName": last},
+            "shippingAddress": {
+                "firstName": first, "lastName": last, "address1": address["address1"],
+                "address2": address["address2"], "phone": gen.phone(), "city": address["city"],
+                "zip": address["zip"], "province": address["province"], "country": address["country"],
+            },
+            "fulfillments": fulfillments,
+        }
+
+    def orders(self, count: int) -> List[Dict[str, Any]]:
+        return [self.order_node(i) for i in range(count)]
+
+
+class FakeCourier(BaseCourier):
+    """
+    Tracking determinist: fiecare AWB avansează pe `TRACKING_PROGRESSION` în funcție de hash-ul lui
+    și de runda curentă, deci aproximativ `change_ratio` din AWB-uri primesc un status nou pe rundă.
+    `latency_ms` simulează timpul de răspuns al API-ului curierului.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, change_ratio: float = 0.35):
+        super().__init__(client=None)
+        self.latency = latency_ms / 1000
+        self.change_ratio = change_ratio
+        self.round = 0
+        self.calls = 0
+
+    async def create_awb(self, *args, **kwargs) -> Dict[str, Any]:
+        raise NotImplementedError("FakeCourier nu creează AWB-uri")
+
+    async def get_label(self, awb: str, creds: dict, paper_size: str) -> bytes:
+        return synthetic_label(awb)
+
+    async def track_awb(self, db, awb: str, account_key: Optional[str]) -> TrackingResponse:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        bucket = zlib.crc32(f"{awb}:{self.round}".encode()) % 1000
+        step = zlib.crc32(awb.encode()) % (len(TRACKING_PROGRESSION) - 1)
+        if bucket < self.change_ratio * 1000:
+            step += 1
+        status = TRACKING_PROGRESSION[step]
+        return TrackingResponse(status, datetime.now(timezone.utc), {"awb": awb, "status": status})
+
+
+@contextmanager
+def fake_couriers(courier: FakeCourier) -> Iterator[FakeCourier]:
+    """
+    Toți curierii din `courier_service` devin `courier`, iar pauza de 0.3s dintre AWB-uri
+    (protecția de rate limit pentru API-urile reale) este eliminată pe durata blocului.
+    """
+    original_factory, original_asyncio = courier_service.get_courier_service, courier_service.asyncio
+
+    async def _no_pause(delay, result=None):
+        return result
+
+    courier_service.get_courier_service = lambda name: courier
+    courier_service.asyncio = SimpleNamespace(sleep=_no_pause)
+    try:
+        yield courier
+    finally:
+        courier_service.get_courier_service = original_factory
+        courier_service.asyncio = original_asyncio
+
+
+def synthetic_label(awb: str, landscape: bool = False) -> bytes:
+    """
+    Etichetă vectorială de 100x150 mm (sau 150x100) cu un „cod de bare” din dreptunghiuri,
+    suficient de apropiată de etichetele reale ca transformările pypdf să aibă ce procesa.
+    """
+    width, height = (150 * MM, 100 * MM) if landscape else (100 * MM, 150 * MM)
+    writer = PdfWriter()
+    page = writer.add_blank_page(width=width, height=height)
+    bars = []
+    x = 10.0
+    for i, byte in enumerate(awb.encode() * 4):
+        bar = 1 + byte % 3
+        if i % 2 == 0:
+            bars.append(f"{x:.1f} {height * 0.55:.1f} {bar} {height * 0.25:.1f} re f")
+        x += bar + 1
+        if x > width - 10:
+            break
+    frames = [
+        f"2 w 8 8 {width - 16:.1f} {height - 16:.1f} re S",
+        f"8 {height * 0.45:.1f} m {width - 8:.1f} {height * 0.45:.1f} l S",
+    ]
+    content = DecodedStreamObject()
+    content.set_data(" ".join(["q 0 g 0 G", *frames, *bars, "Q"]).encode())
+    page.replace_contents(content)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def synthetic_labels(count: int) -> Dict[str, bytes]:
+    """AWB -> PDF; ~40% peisaj, ca etichetele Sameday care trebuie rotite la normalizare."""
+    return {
+        f"BENCH{i:010d}": synthetic_label(f"BENCH{i:010d}", landscape=i % 5 < 2)
+        for i in range(count)
+    }
@@ -0,0 +1,292 @@
+# scripts/bench/scenarios.py
+#
+# Scenariile cronometrate. Fiecare scenariu apelează funcția reală din services/ pe o sesiune
+# nouă; `reset` (necronometrat) readuce datele în starea de dinainte, ca rulările repetate
+# să măsoare aceeași muncă (ex. aceleași comenzi nevalidate, aceleași AWB-uri deschise), iar
+# `teardown` lasă schema cum a fost generată, ca două rulări `run` să fie comparabile.
+
+import asyncio
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, func, null, select, update
+from starlette.datastructures import QueryParams
+
+import models
+from database import AsyncSessionLocal
+from services import count_service, label_layout, label_service
+from services.address_service import validate_unvalidated_orders
+from services.courier_service import FINAL_STATUSES, track_and_update_shipments
+from services.filter_service import (
+    DEFAULT_PAGE_SIZE, SORT_KEYS, build_filtered_query, decode_cursor, encode_cursor, get_filtered_orders, page_ids_query,
+    sort_ordering,
+)
+from services.sync_service import _process_and_insert_orders_in_batches
+
+from .dataset import DatasetConfig, Generator
+from .fakes import FakeCourier, FakeShopify, fake_couriers, synthetic_labels
+
+
+@dataclass
+class RunConfig:
+    repeat: int = 5
+    warmup: int = 1
+    sync_orders: int = 1000
+    validate_days: int = 30
+    tracking_days: int = 14
+    courier_latency_ms: float = 0.0
+    labels: int = 200
+    seed: int = 42
+
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable[[], Awaitable[Dict[str, Any]]]
+    reset: Optional[Callable[[], Awaitable[None]]] = None
+    teardown: Optional[Callable[[], Awaitable[None]]] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+async def measure(scenario: Scenario, repeat: int, warmup: int) -> Dict[str, Any]:
+    """Rulările de încălzire nu intră în statistici; `info` vine din ultima rulare."""
+    timings: List[float] = []
+    info: Dict[str, Any] = {}
+    for i in range(warmup + repeat):
+        if scenario.reset:
+            await scenario.reset()
+        started = time.perf_counter()
+        info = await scenario.run()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            timings.append(elapsed_ms)
+    if scenario.teardown:
+        await scenario.teardown()
+    return {
+        "params": scenario.params,
+        "runs": len(timings),
+        "min_ms": round(min(timings), 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "stdev_ms": round(statistics.stdev(timings), 2) if len(timings) > 1 else 0.0,
+        "info": info,
+    }
+
+
+# --- lista de comenzi ---
+
+def _list_scenario(name: str, query: str, cold: bool = True) -> Scenario:
+    async def run():
+        async with AsyncSessionLocal() as db:
+            orders, total, _, page_info = await get_filtered_orders(db, QueryParams(query))
+        return {"rows": len(orders), "total": total, "total_is_exact": page_info["total_is_exact"]}
+
+    # „rece”: totalurile și fațetele memorate sunt invalidate, se măsoară costul din Postgres
+    return Scenario(name, run, reset=count_service.invalidate if cold else None, params={"query": query, "cold_cache": cold})
+
+
+def _plan_summary(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Din EXPLAIN (FORMAT JSON): nodurile (tip + index) și rândurile aruncate de filtre."""
+    nodes, removed, stack = [], 0, [plan["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(" ".join(filter(None, [node["Node Type"], node.get("Index Name")])))
+        removed += node.get("Rows Removed by Filter", 0)
+        stack.extend(node.get("Plans", []))
+    return {
+        "nodes": nodes,
+        "rows_removed_by_filter": removed,
+        "shared_hit_blocks": plan["Plan"].get("Shared Hit Blocks"),
+        "execution_ms": plan.get("Execution Time"),
+    }
+
+
+def _explain_scenario(name: str, sort_by: str, cursor: str) -> Scenario:
+    """
+    EXPLAIN ANALYZE pe interogarea de id-uri a paginii (`page_ids_query`), ca o pagină keyset
+    adâncă să arate dacă indexul e folosit ca limită de interval sau parcurs de la început.
+    """
+    async def run():
+        async with AsyncSessionLocal() as db:
+            query, _, _ = await build_filtered_query(db, QueryParams(""))
+            stmt = page_ids_query(query, sort_by, DEFAULT_PAGE_SIZE, decode_cursor(cursor, sort_by))
+            sql = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+            conn = await db.connection()
+            plan = (await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}")).scalar_one()
+        return _plan_summary((json.loads(plan) if isinstance(plan, str) else plan)[0])
+
+    return Scenario(name, run, params={"sort_by": sort_by})
+
+
+async def _deep_cursor(db, sort_by: str = "created_at_desc", fraction: float = 0.9) -> Optional[str]:
+    """Cursor spre pagina aflată la `fraction` din listă (poziția se află o dată, cu OFFSET)."""
+    column, descending = SORT_KEYS[sort_by]
+    offset = int((await db.scalar(select(func.count()).select_from(models.Order))) * fraction)
+    row = (await db.execute(
+        select(column, models.Order.id).order_by(*sort_ordering(column, descending)).offset(offset).limit(1)
+    )).first()
+    return encode_cursor(sort_by, row[0], row[1], offset // DEFAULT_PAGE_SIZE + 2) if row else None
+
+
+async def orders_list(config: RunConfig) -> List[Scenario]:
+    async with AsyncSessionLocal() as db:
+        sample_awb = await db.scalar(select(models.Shipment.awb).where(models.Shipment.awb.isnot(None)).limit(1))
+        _, _, _, page_info = await get_filtered_orders(db, QueryParams(""))
+        deep_cursor = await _deep_cursor(db)
+    scenarios = [
+        _list_scenario("orders_list_first_page", ""),
+        _list_scenario("orders_list_first_page_cached", "", cold=False),
+        _list_scenario("orders_list_offset_page_200", "page=200"),
+        _list_scenario("orders_list_last_page", "page=last"),
+        _list_scenario("orders_list_filtered", "stores=1&financial_status=PENDING&courier_status_group=in_transit"),
+        _list_scenario("orders_list_unprinted", "printed_status=neprintat&address_status=valid"),
+        _list_scenario("orders_list_search_name", "order_q=popescu"),
+        _list_scenario("orders_list_search_phone", "order_q=0744"),
+        _list_scenario("orders_list_search_order_no", "order_q=%231500"),
+    ]
+    if sample_awb:
+        scenarios.append(_list_scenario("orders_list_search_awb", f"order_q={sample_awb}"))
+    if page_info.get("next_cursor"):
+        scenarios.append(_list_scenario("orders_list_keyset_next_page", f"cursor={page_info['next_cursor']}"))
+    if deep_cursor:
+        scenarios.append(_list_scenario("orders_list_keyset_deep_page", f"cursor={deep_cursor}"))
+        scenarios.append(_explain_scenario("orders_list_keyset_deep_page_explain", "created_at_desc", deep_cursor))
+    return scenarios
+
+
+# --- validarea adreselor ---
+
+async def validation(config: RunConfig) -> List[Scenario]:
+    since = datetime.now(timezone.utc) - timedelta(days=config.validate_days)
+    async with AsyncSessionLocal() as db:
+        order_ids = (await db.execute(
+            select(models.Order.id).where(models.Order.address_status == "nevalidat", models.Order.created_at >= since)
+        )).scalars().all()
+
+    async def reset():
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.Order).where(models.Order.id.in_(order_ids))
+                .values(address_status="nevalidat", address_score=None, address_validation_errors=null())
+            )
+            await db.commit()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            await validate_unvalidated_orders(db, days=config.validate_days)
+            statuses = dict((await db.execute(
+                select(models.Order.address_status, func.count())
+                .where(models.Order.id.in_(order_ids)).group_by(models.Order.address_status)
+            )).all())
+        return {"orders": len(order_ids), "statuses": statuses}
+
+    return [Scenario("validate_unvalidated_orders", run, reset, reset, params={"days": config.validate_days})]
+
+
+# --- sincronizarea Shopify ---
+
+async def shopify_sync(config: RunConfig) -> List[Scenario]:
+    payloads = FakeShopify(Generator(DatasetConfig(seed=config.seed + 1))).orders(config.sync_orders)
+    async with AsyncSessionLocal() as db:
+        store_id = await db.scalar(select(func.min(models.Store.id)))
+    synced_ids = select(models.Order.id).where(models.Order.shopify_order_id.like("69%")).scalar_subquery()
+
+    async def delete_synced():
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(models.Shipment).where(models.Shipment.order_id.in_(synced_ids)))
+            await db.execute(delete(models.Order).where(models.Order.shopify_order_id.like("69%")))
+            await db.commit()
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            total = await _process_and_insert_orders_in_batches(db, payloads, store_id, "shopify")
+        return {"orders": total}
+
+    params = {"orders": len(payloads), "pii_source": "shopify"}
+    # prima variantă inserează (comenzile se șterg înainte), a doua actualizează aceleași comenzi
+    return [
+        Scenario("shopify_sync_insert", run, delete_synced, params=params),
+        Scenario("shopify_sync_upsert_existing", run, teardown=delete_synced, params=params),
+    ]
+
+
+# --- tracking curieri ---
+
+async def tracking(config: RunConfig) -> List[Scenario]:
+    courier = FakeCourier(latency_ms=config.courier_latency_ms)
+    since = datetime.now(timezone.utc) - timedelta(days=config.tracking_days)
+    S = models.Shipment
+    async with AsyncSessionLocal() as db:
+        snapshot = [dict(r._mapping) for r in (await db.execute(
+            select(S.id, S.last_status, S.last_status_at).where(
+                S.fulfillment_created_at >= since,
+                S.awb.isnot(None),
+                S.last_status.is_(None) | ~func.lower(S.last_status).in_(
+                    bindparam("final_statuses", FINAL_STATUSES, expanding=True, literal_execute=True)
+                ),
+            )
+        )).all()]
+
+    async def reset():
+        courier.round += 1
+        if not snapshot:
+            return
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(S), snapshot)  # UPDATE pe cheia primară, executemany
+            await db.commit()
+
+    async def run():
+        calls = courier.calls
+        with fake_couriers(courier):
+            async with AsyncSessionLocal() as db:
+                await track_and_update_shipments(db, days_ago=config.tracking_days)
+        return {"open_shipments": len(snapshot), "courier_calls": courier.calls - calls}
+
+    params = {"days_ago": config.tracking_days, "courier_latency_ms": config.courier_latency_ms}
+    return [Scenario("track_and_update_shipments", run, reset, reset, params=params)]
+
+
+# --- etichete ---
+
+async def labels(config: RunConfig) -> List[Scenario]:
+    pdf_map = await asyncio.to_thread(synthetic_labels, config.labels)
+    normalized = [await asyncio.to_thread(label_layout.normalize_to_a6, pdf) for pdf in pdf_map.values()]
+    params = {"labels": len(pdf_map)}
+
+    async def merge():
+        merged = await asyncio.to_thread(label_service.merge_labels, pdf_map)
+        return {"bytes": len(merged)}
+
+    async def normalize():
+        # ca `label_service.normalize_labels`, fără cache-ul de pe disc
+        results = await asyncio.gather(*(
+            label_service.run_in_pdf_pool(label_layout.normalize_to_a6, pdf) for pdf in pdf_map.values()
+        ))
+        return {"bytes": sum(len(r) for r in results)}
+
+    def compose(paper_size: str):
+        async def run():
+            pdf = await label_service.run_in_pdf_pool(label_layout.compose_print_pdf, normalized, paper_size)
+            return {"bytes": len(pdf)}
+        return run
+
+    return [
+        Scenario("labels_merge", merge, params=params),
+        Scenario("labels_normalize_pool", normalize, params=params),
+        Scenario("labels_compose_a4", compose("A4"), params=params),
+        Scenario("labels_compose_a6", compose("A6"), params=params),
+    ]
+
+
+GROUPS: Dict[str, Callable[[RunConfig], Awaitable[List[Scenario]]]] = {
+    "orders_list": orders_list,
+    "validation": validation,
+    "sync": shopify_sync,
+    "tracking": tracking,
+    "labels": labels,
+}
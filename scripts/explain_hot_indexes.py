@@ -0,0 +1,219 @@
+# /scripts/explain_hot_indexes.py
+#
+# Măsoară efectul indecșilor din migrarea c9e2b4f71a05 (add_hot_path_partial_indexes):
+# generează un set de date sintetic într-o schemă separată (`bench_explain`), rulează
+# EXPLAIN (ANALYZE, BUFFERS) pe interogările fierbinți fără indecși, creează indecșii,
+# rulează din nou și scrie rezultatele ca JSON.
+#
+#   python scripts/explain_hot_indexes.py --orders 200000 --out explain_hot_indexes.json
+#
+# Schema se șterge la final (--keep o păstrează). Tabelele aplicației nu sunt atinse.
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Adaugă directorul rădăcină în path pentru a putea importa modulele
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+
+from sqlalchemy import bindparam, desc, event, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import models
+from settings import settings
+from services.courier_service import FINAL_STATUSES
+from routes.validation import AWAITING_VALIDATION_STATUSES
+from routes.financials import PENDING_PAYMENT_STATUSES
+
+SCHEMA = "bench_explain"
+MIGRATION = ROOT / "alembic" / "versions" / "c9e2b4f71a05_add_hot_path_partial_indexes.py"
+
+
+def _load_migration():
+    """Indecșii (și DDL-ul) vin direct din migrare, ca benchmark-ul să nu poată diverge de ea."""
+    spec = importlib.util.spec_from_file_location("hot_path_indexes", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _inline(name: str, values: List[str]):
+    return bindparam(name, values, expanding=True, literal_execute=True)
+
+
+def hot_queries() -> Dict[str, Any]:
+    """Aceleași predicate ca în aplicație (constantele sunt importate din module)."""
+    O, S = models.Order, models.Shipment
+    latest = (
+        select(S.order_id, func.max(S.id).label("max_id"))
+        .group_by(S.order_id)
+        .subquery("latest_shipment_subq")
+    )
+    latest_id = select(S.id).where(S.order_id == O.id).order_by(S.id.desc()).limit(1).correlate(O).scalar_subquery()
+    return {
+        # services/courier_service.track_and_update_shipments
+        "open_shipments_tracking": select(S.id, S.awb, S.courier, S.account_key, S.last_status).where(
+            S.fulfillment_created_at >= func.now() - text("interval '14 days'"),
+            S.awb.isnot(None),
+            S.last_status.is_(None) | ~func.lower(S.last_status).in_(_inline("final_statuses", FINAL_STATUSES)),
+        ),
+        # Print Hub: expedierile neprintate (ultima expediere a comenzii)
+        "print_hub_unprinted": select(S.order_id, func.count())
+        .join(latest, S.id == latest.c.max_id)
+        .where(S.printed_at.is_(None), S.awb.isnot(None))
+        .group_by(S.order_id),
+        # routes/validation.get_validation_page (prima pagină)
+        "validation_page": select(O.id, O.name, O.address_status)
+        .where(O.address_status.in_(_inline("awaiting_statuses", AWAITING_VALIDATION_STATUSES)))
+        .order_by(desc(O.created_at))
+        .limit(100),
+        "validation_count": select(func.count(O.id)).where(
+            O.address_status.in_(_inline("awaiting_statuses", AWAITING_VALIDATION_STATUSES))
+        ),
+        # routes/financials: comenzi cu plata în așteptare + ultima expediere
+        "financials_pending_cod": select(O.id, O.name, O.total_price, S.courier, S.last_status)
+        .join(S, S.id == latest_id, isouter=True)
+        .where(func.lower(O.financial_status).in_(_inline("pending_statuses", PENDING_PAYMENT_STATUSES)))
+        .order_by(desc(O.created_at), desc(O.id)),
+    }
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+SEED_SQL = [
+    """
+    INSERT INTO stores (id, name, domain, api_version, pii_source, is_active, paper_size)
+    SELECT s, 'Magazin ' || s, 'magazin-' || s || '.myshopify.com', '2025-07', 'shopify', true, 'A6'
+    FROM generate_series(1, 5) AS s
+    """,
+    """
+    INSERT INTO orders (id, store_id, shopify_order_id, name, customer, created_at, financial_status,
+                        total_price, mapped_payment, address_status, processing_status, is_on_hold_shopify)
+    SELECT i, 1 + i % 5, i::text, '#' || (1000 + i), 'Client ' || i,
+           now() - random() * interval '180 days',
+           CASE WHEN r < 0.60 THEN 'PAID' WHEN r < 0.90 THEN 'PENDING' WHEN r < 0.95 THEN 'REFUNDED' ELSE 'VOIDED' END,
+           round((50 + random() * 450)::numeric, 2),
+           CASE WHEN r < 0.60 THEN 'Card' ELSE 'Ramburs' END,
+           CASE WHEN a < 0.80 THEN 'valid' WHEN a < 0.88 THEN 'nevalidat' WHEN a < 0.93 THEN 'invalid'
+                WHEN a < 0.97 THEN 'partial_match' WHEN a < 0.99 THEN 'pending' ELSE 'failed' END,
+           'pending_validation', false
+    FROM (SELECT i, random() AS r, random() AS a FROM generate_series(1, :orders) AS i) AS g
+    """,
+    """
+    INSERT INTO shipments (order_id, awb, courier, account_key, fulfillment_created_at, printed_at, last_status, last_status_at)
+    SELECT o.id, 'AWB' || lpad(o.id::text, 10, '0'),
+           CASE WHEN o.id % 3 = 0 THEN 'Sameday' ELSE 'DPD Romania' END,
+           CASE WHEN o.id % 3 = 0 THEN 'sameday' ELSE 'dpdromania' END,
+           o.created_at + interval '1 day',
+           CASE WHEN o.created_at > now() - interval '3 days' AND random() < 0.8 THEN NULL
+                ELSE o.created_at + interval '1 day' END,
+           CASE WHEN o.created_at > now() - interval '14 days'
+                THEN (ARRAY[NULL, 'In transit', 'Out for delivery', 'Delivered'])[1 + floor(random() * 4)::int]
+                ELSE (ARRAY['Delivered', 'Delivered', 'Delivered', 'Refused'])[1 + floor(random() * 4)::int] END,
+           o.created_at + interval '3 days'
+    FROM orders o
+    WHERE random() < 0.85
+    """,
+]
+
+
+async def _explain(conn, sql: str, repeat: int) -> Dict[str, Any]:
+    best = None
+    for _ in range(repeat):
+        plan = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))).scalar_one()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        if best is None or plan["Execution Time"] < best["Execution Time"]:
+            best = plan
+
+    nodes, indexes = [], []
+
+    def walk(node):
+        nodes.append(node["Node Type"])
+        if node.get("Index Name"):
+            indexes.append(node["Index Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(best["Plan"])
+    root = best["Plan"]
+    return {
+        "execution_ms": round(best["Execution Time"], 3),
+        "planning_ms": round(best["Planning Time"], 3),
+        "shared_hit_blocks": root.get("Shared Hit Blocks"),
+        "shared_read_blocks": root.get("Shared Read Blocks"),
+        "nodes": nodes,
+        "indexes": sorted(set(indexes)),
+    }
+
+
+async def main(args) -> Dict[str, Any]:
+    migration = _load_migration()
+    engine = create_async_engine(args.database_url)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _search_path(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        cursor.close()
+
+    queries = {name: _sql(stmt) for name, stmt in hot_queries().items()}
+    report: Dict[str, Any] = {"orders": args.orders, "repeat": args.repeat, "queries": {}}
+    try:
+        async with engine.begin() as conn:
+            print(f"Se generează {args.orders} comenzi în schema {SCHEMA}...")
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.execute(text(f"SET search_path TO {SCHEMA}"))
+            await conn.run_sync(models.Base.metadata.create_all)
+            for sql in SEED_SQL:
+                await conn.execute(text(sql), {"orders": args.orders})
+            report["shipments"] = (await conn.execute(text("SELECT count(*) FROM shipments"))).scalar_one()
+
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("ANALYZE"))
+            for name, sql in queries.items():
+                print(f"Fără indecși: {name}")
+                report["queries"][name] = {"before": await _explain(conn, sql, args.repeat)}
+
+            for index in migration.INDEXES:
+                await conn.execute(text(migration.index_ddl(*index, concurrently=False)))
+            await conn.execute(text("ANALYZE"))
+            for name, sql in queries.items():
+                print(f"Cu indecși: {name}")
+                entry = report["queries"][name]
+                entry["after"] = await _explain(conn, sql, args.repeat)
+                after_ms = entry["after"]["execution_ms"]
+                entry["speedup"] = round(entry["before"]["execution_ms"] / after_ms, 2) if after_ms else None
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE înainte/după indecșii parțiali pe date sintetice.")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="rulări per interogare; se păstrează cea mai rapidă")
+    parser.add_argument("--out", type=Path, help="fișierul JSON (implicit: stdout)")
+    parser.add_argument("--keep", action="store_true", help=f"nu șterge schema {SCHEMA} la final")
+    args = parser.parse_args()
+
+    result = asyncio.run(main(args))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        args.out.write_text(output, encoding="utf-8")
+        print(f"Rezultate scrise în {args.out}")
+    else:
+        print(output)
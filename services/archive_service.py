@@ -0,0 +1,315 @@
+# services/archive_service.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tarfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from settings import settings
+
+try:
+    import zstandard
+except ImportError:  # fără zstandard, zilele vechi se compactează ca .tar.gz
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BASE_DIR = Path("awb_archive")
+BUNDLES_DIR = ARCHIVE_BASE_DIR / "bundles"
+LABELS_DIR = ARCHIVE_BASE_DIR / "labels"
+DAY_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+BUNDLE_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})\.tar\.(zst|gz)$")
+
+
+# ================== Helpers (sincron, rulează în thread) ==================
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _kind_for(rel_path: str) -> str:
+    if rel_path.startswith("labels/"):
+        return "label"
+    if rel_path.endswith(".picklist.pdf"):
+        return "picklist"
+    return "print"
+
+
+def _scan_unindexed(known_paths: set) -> List[Tuple[str, Path]]:
+    """Fișierele PDF din zilele de arhivă și din cache-ul de etichete care nu sunt încă în DB."""
+    found = []
+    if not ARCHIVE_BASE_DIR.is_dir():
+        return found
+    dirs = [d for d in ARCHIVE_BASE_DIR.iterdir() if d.is_dir() and DAY_DIR_RE.match(d.name)]
+    if LABELS_DIR.is_dir():
+        dirs.append(LABELS_DIR)
+    for folder in dirs:
+        for path in folder.glob("*.pdf"):
+            rel = path.relative_to(ARCHIVE_BASE_DIR).as_posix()
+            if rel not in known_paths:
+                found.append((rel, path))
+    return found
+
+
+def _dedupe_with_hardlink(path: Path, original: Path) -> bool:
+    """Înlocuiește `path` cu un hardlink către `original` (același conținut, un singur set de blocuri pe disc)."""
+    try:
+        if path.stat().st_ino == original.stat().st_ino:
+            return False
+        tmp = path.with_suffix(".dedup")
+        os.link(original, tmp)
+        os.replace(tmp, path)
+        return True
+    except OSError as e:
+        logger.warning("Deduplicare eșuată pentru %s: %s", path, e)
+        return False
+
+
+def _bundle_path(day: date) -> Path:
+    ext = "zst" if zstandard else "gz"
+    return BUNDLES_DIR / f"{day.isoformat()}.tar.{ext}"
+
+
+def _write_bundle(day_dir: Path, bundle: Path) -> None:
+    """Scrie toate fișierele unei zile într-un tar comprimat. Fără hardlink-uri în tar, ca citirea în flux să fie simplă."""
+    bundle.parent.mkdir(parents=True, exist_ok=True)
+    tmp = bundle.with_name(bundle.name + ".tmp")
+
+    def _add_files(tar: tarfile.TarFile):
+        for path in sorted(day_dir.iterdir()):
+            if not path.is_file():
+                continue
+            st = path.stat()
+            info = tarfile.TarInfo(name=f"{day_dir.name}/{path.name}")
+            info.size = st.st_size
+            info.mtime = int(st.st_mtime)
+            with open(path, "rb") as fh:
+                tar.addfile(info, fh)
+
+    if bundle.name.endswith(".zst"):
+        cctx = zstandard.ZstdCompressor(level=10)
+        with open(tmp, "wb") as fh:
+            with cctx.stream_writer(fh, closefd=False) as zw:
+                with tarfile.open(fileobj=zw, mode="w|") as tar:
+                    _add_files(tar)
+    else:
+        with tarfile.open(tmp, "w:gz") as tar:
+            _add_files(tar)
+    os.replace(tmp, bundle)
+
+
+def _read_from_bundle(bundle: Path, member: str) -> Optional[bytes]:
+    if bundle.name.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Pachetul 'zstandard' lipsește; nu pot citi arhiva .tar.zst.")
+        dctx = zstandard.ZstdDecompressor()
+        with open(bundle, "rb") as fh, dctx.stream_reader(fh) as zr:
+            with tarfile.open(fileobj=zr, mode="r|") as tar:
+                for info in tar:
+                    if info.name == member and info.isfile():
+                        return tar.extractfile(info).read()
+        return None
+    with tarfile.open(bundle, "r:gz") as tar:
+        try:
+            return tar.extractfile(member).read()
+        except KeyError:
+            return None
+
+
+def _archive_days() -> Dict[date, List[Path]]:
+    """Zilele din arhivă -> căile fizice (directorul zilei și/sau bundle-ul compactat)."""
+    days: Dict[date, List[Path]] = {}
+    if ARCHIVE_BASE_DIR.is_dir():
+        for d in ARCHIVE_BASE_DIR.iterdir():
+            if d.is_dir() and DAY_DIR_RE.match(d.name):
+                days.setdefault(date.fromisoformat(d.name), []).append(d)
+    if BUNDLES_DIR.is_dir():
+        for b in BUNDLES_DIR.iterdir():
+            m = BUNDLE_RE.match(b.name)
+            if m:
+                days.setdefault(date.fromisoformat(m.group(1)), []).append(b)
+    return days
+
+
+def _disk_usage(root: Path) -> int:
+    """Spațiul ocupat sub `root`, numărând o singură dată fișierele legate prin hardlink."""
+    total, seen = 0, set()
+    if not root.is_dir():
+        return 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                st = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+def _remove_path(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+# ================== API public ==================
+
+async def index_archive(db: AsyncSession) -> Dict[str, int]:
+    """
+    Înregistrează în DB fișierele noi din arhivă (dimensiune + sha256) și deduplică
+    pe hash: un fișier identic cu unul existent devine hardlink către acesta.
+    """
+    known_rows = (await db.execute(
+        select(models.ArchivedFile.path, models.ArchivedFile.sha256, models.ArchivedFile.bundle_path)
+    )).all()
+    known_paths = {r.path for r in known_rows}
+    loose_by_hash = {r.sha256: r.path for r in known_rows if r.bundle_path is None}
+
+    new_files = await asyncio.to_thread(_scan_unindexed, known_paths)
+    stats = {"indexed": 0, "deduplicated": 0}
+    for rel, path in new_files:
+        try:
+            sha = await asyncio.to_thread(_sha256_file, path)
+            st = path.stat()
+        except OSError:
+            continue  # fișierul a dispărut între timp (ex. lot mutat la printare)
+
+        original_rel = loose_by_hash.get(sha)
+        if original_rel and (ARCHIVE_BASE_DIR / original_rel).is_file():
+            if await asyncio.to_thread(_dedupe_with_hardlink, path, ARCHIVE_BASE_DIR / original_rel):
+                stats["deduplicated"] += 1
+        else:
+            loose_by_hash[sha] = rel
+
+        day_part = rel.split("/", 1)[0]
+        archive_day = (
+            date.fromisoformat(day_part) if DAY_DIR_RE.match(day_part)
+            else datetime.fromtimestamp(st.st_mtime, tz=timezone.utc).date()
+        )
+        db.add(models.ArchivedFile(
+            path=rel, kind=_kind_for(rel), archive_day=archive_day,
+            size_bytes=st.st_size, sha256=sha,
+        ))
+        stats["indexed"] += 1
+
+    await db.commit()
+    return stats
+
+
+async def compact_old_days(db: AsyncSession, older_than_days: int) -> int:
+    """Comprimă fiecare zi mai veche de `older_than_days` într-un bundle tar.zst și șterge directorul zilei."""
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=older_than_days)
+    compacted = 0
+    for day, paths in sorted((await asyncio.to_thread(_archive_days)).items()):
+        day_dirs = [p for p in paths if p.is_dir()]
+        if day >= cutoff or not day_dirs:
+            continue
+        bundle = _bundle_path(day)
+        if bundle.exists():
+            # zi deja compactată, dar au mai apărut fișiere: le lăsăm nearhivate, ca să nu rescriem bundle-ul
+            logger.warning("Ziua %s are deja bundle; directorul rămâne necompactat.", day)
+            continue
+        await asyncio.to_thread(_write_bundle, day_dirs[0], bundle)
+        await db.execute(
+            update(models.ArchivedFile)
+            .where(models.ArchivedFile.path.like(f"{day.isoformat()}/%"))
+            .values(bundle_path=bundle.relative_to(ARCHIVE_BASE_DIR).as_posix())
+        )
+        await db.commit()
+        await asyncio.to_thread(shutil.rmtree, day_dirs[0], True)
+        compacted += 1
+    return compacted
+
+
+async def _drop_day(db: AsyncSession, day: date, paths: List[Path]) -> None:
+    for p in paths:
+        await asyncio.to_thread(_remove_path, p)
+    await db.execute(delete(models.ArchivedFile).where(
+        models.ArchivedFile.archive_day == day, models.ArchivedFile.kind != "label"
+    ))
+
+
+async def enforce_retention(db: AsyncSession, retention_days: int, max_total_mb: int) -> Dict[str, int]:
+    """
+    Șterge zilele (directoare sau bundle-uri) și etichetele din cache mai vechi de
+    `retention_days`, apoi, dacă arhiva depășește `max_total_mb`, cele mai vechi zile
+    până sub limită. Ziua curentă nu se șterge niciodată.
+    """
+    today = datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=retention_days)
+    stats = {"days_removed": 0, "labels_removed": 0}
+
+    days = await asyncio.to_thread(_archive_days)
+    for day in sorted(days):
+        if day < cutoff:
+            await _drop_day(db, day, days.pop(day))
+            stats["days_removed"] += 1
+
+    old_labels = (await db.execute(
+        select(models.ArchivedFile.path)
+        .where(models.ArchivedFile.kind == "label", models.ArchivedFile.archive_day < cutoff)
+    )).scalars().all()
+    for rel in old_labels:
+        (ARCHIVE_BASE_DIR / rel).unlink(missing_ok=True)
+    if old_labels:
+        await db.execute(delete(models.ArchivedFile).where(models.ArchivedFile.path.in_(old_labels)))
+        stats["labels_removed"] += len(old_labels)
+    await db.commit()
+
+    max_bytes = max_total_mb * 1024 * 1024
+    usage = await asyncio.to_thread(_disk_usage, ARCHIVE_BASE_DIR)
+    for day in sorted(d for d in days if d < today):
+        if usage <= max_bytes:
+            break
+        await _drop_day(db, day, days[day])
+        await db.commit()
+        stats["days_removed"] += 1
+        usage = await asyncio.to_thread(_disk_usage, ARCHIVE_BASE_DIR)
+
+    if usage > max_bytes:
+        logger.warning("Arhiva AWB depășește încă limita (%s MB > %s MB).", usage // (1024 * 1024), max_total_mb)
+    stats["usage_mb"] = usage // (1024 * 1024)
+    return stats
+
+
+async def run_archive_lifecycle(db: AsyncSession) -> Dict[str, int]:
+    """Indexare -> compactare -> retenție (zile + limită de spațiu)."""
+    stats = await index_archive(db)
+    stats["days_compacted"] = await compact_old_days(db, settings.archive_compact_after_days)
+    stats.update(await enforce_retention(db, settings.archive_retention_days, settings.archive_max_total_mb))
+    logger.info("Ciclul de arhivă AWB finalizat: %s", stats)
+    return stats
+
+
+async def read_archived_file(db: AsyncSession, path: Path) -> Optional[bytes]:
+    """Citește un PDF arhivat, fie direct de pe disc, fie din bundle-ul zilei dacă a fost compactat."""
+    if path.is_file():
+        return await asyncio.to_thread(path.read_bytes)
+    try:
+        rel = path.relative_to(ARCHIVE_BASE_DIR).as_posix()
+    except ValueError:
+        return None
+    bundle_rel = (await db.execute(
+        select(models.ArchivedFile.bundle_path).where(models.ArchivedFile.path == rel)
+    )).scalar_one_or_none()
+    if not bundle_rel or not (ARCHIVE_BASE_DIR / bundle_rel).is_file():
+        return None
+    return await asyncio.to_thread(_read_from_bundle, ARCHIVE_BASE_DIR / bundle_rel, rel)
@@ -0,0 +1,202 @@
+# services/awb_job_service.py
+#
+# Crearea AWB în masă ca job ARQ: ruta doar pune jobul în coadă, worker-ul creează AWB-urile
+# și publică progresul pe un canal Redis, iar procesul web îl retransmite prin WebSocket.
+# Starea fiecărui job (contori + rezultate per comandă) stă în Redis, cu TTL.
+
+import asyncio
+import json
+import logging
+import math
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from arq import create_pool
+from arq.connections import ArqRedis, RedisSettings
+from arq.jobs import Job, JobStatus
+
+from database import AsyncSessionLocal
+from settings import settings
+from services import awb_service
+from websocket_manager import manager
+
+logger = logging.getLogger(__name__)
+
+AWB_PROGRESS_CHANNEL = "awb:progress"
+# durata estimată per comandă (creare AWB la curier + persistare), pentru timeout-ul jobului
+AWB_SECONDS_PER_ORDER = 15
+
+_pool: Optional[ArqRedis] = None
+
+
+def redis_settings() -> RedisSettings:
+    return RedisSettings.from_dsn(settings.redis_url)
+
+
+async def get_redis_pool() -> ArqRedis:
+    """Pool-ul ARQ al procesului web, creat la prima utilizare."""
+    global _pool
+    if _pool is None:
+        _pool = await create_pool(redis_settings())
+    return _pool
+
+
+async def close_redis_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
+
+def job_timeout_seconds() -> int:
+    """
+    Timeout-ul ARQ pentru `create_awbs_task`, dimensionat pentru cel mai mare lot (`awb_job_max_orders`).
+    Implicitul ARQ (300s) ar anula jobul între crearea AWB-ului la curier și salvarea lui.
+    """
+    waves = math.ceil(max(1, settings.awb_job_max_orders) / max(1, settings.awb_create_concurrency))
+    return max(300, waves * AWB_SECONDS_PER_ORDER)
+
+
+def split_orders(order_ids: List[int]) -> List[List[int]]:
+    """Împarte comenzile în loturi de cel mult `awb_job_max_orders`, câte un job per lot."""
+    size = max(1, settings.awb_job_max_orders)
+    return [order_ids[i:i + size] for i in range(0, len(order_ids), size)]
+
+
+def _state_key(job_id: str) -> str:
+    return f"awb_job:{job_id}"
+
+
+def _results_key(job_id: str) -> str:
+    return f"awb_job:{job_id}:results"
+
+
+def _ttl_seconds() -> int:
+    return max(1, settings.awb_job_ttl_hours) * 3600
+
+
+async def enqueue_bulk_create(
+    order_ids: List[int],
+    account_key: str,
+    options_by_order: Dict[int, Dict[str, Any]],
+    idempotency_key: Optional[str] = None,
+) -> str:
+    """Înregistrează starea inițială a jobului și îl pune în coada ARQ. Returnează job_id."""
+    redis = await get_redis_pool()
+    job_id = uuid.uuid4().hex
+    state_key = _state_key(job_id)
+    await redis.hset(state_key, mapping={
+        "status": "queued",
+        "account_key": account_key,
+        "total": len(order_ids),
+        "done": 0,
+        "created": 0,
+        "failed": 0,
+        "queued_at": datetime.now(timezone.utc).isoformat(),
+    })
+    await redis.expire(state_key, _ttl_seconds())
+    await redis.enqueue_job(
+        "create_awbs_task", order_ids, account_key, options_by_order, idempotency_key, _job_id=job_id,
+    )
+    return job_id
+
+
+async def _publish(redis: ArqRedis, message: Dict[str, Any]) -> None:
+    await redis.publish(AWB_PROGRESS_CHANNEL, json.dumps(message, default=str))
+
+
+async def run_bulk_create_job(
+    redis: ArqRedis,
+    job_id: str,
+    order_ids: List[int],
+    account_key: str,
+    options_by_order: Dict[int, Dict[str, Any]],
+    idempotency_key: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Corpul jobului (rulează în worker): creează AWB-urile și raportează progresul per comandă."""
+    state_key, results_key = _state_key(job_id), _results_key(job_id)
+    total = len(order_ids)
+    await redis.hset(state_key, mapping={"status": "running", "started_at": datetime.now(timezone.utc).isoformat()})
+    await _publish(redis, {"type": "awb_job_start", "job_id": job_id, "total": total,
+                           "message": f"Creare AWB: 0/{total}"})
+
+    async def _on_result(result: Dict[str, Any]) -> None:
+        await redis.rpush(results_key, json.dumps(result, default=str))
+        await redis.expire(results_key, _ttl_seconds())
+        done = await redis.hincrby(state_key, "done", 1)
+        await redis.hincrby(state_key, "failed" if "error" in result else "created", 1)
+        await _publish(redis, {"type": "awb_job_progress", "job_id": job_id, "done": done, "total": total,
+                               "result": result, "message": f"Creare AWB: {done}/{total}"})
+
+    try:
+        async with AsyncSessionLocal() as db:
+            created, errors = await awb_service.create_awbs_bulk(
+                db,
+                order_ids,
+                account_key,
+                options_for=lambda order: options_by_order.get(order.id) or {},
+                idempotency_key=idempotency_key,
+                on_result=_on_result,
+            )
+    except Exception as e:
+        logger.error("Jobul de creare AWB %s a eșuat: %s", job_id, e)
+        await redis.hset(state_key, mapping={"status": "failed", "error": str(e)})
+        await _publish(redis, {"type": "awb_job_error", "job_id": job_id, "message": f"Creare AWB eșuată: {e}"})
+        raise
+
+    await redis.hset(state_key, mapping={"status": "finished", "finished_at": datetime.now(timezone.utc).isoformat()})
+    await _publish(redis, {"type": "awb_job_end", "job_id": job_id, "created": len(created), "failed": len(errors),
+                           "message": f"Creare AWB finalizată: {len(created)} reușite, {len(errors)} erori."})
+    return {"created": created, "errors": errors}
+
+
+async def get_job_state(job_id: str) -> Optional[Dict[str, Any]]:
+    """Starea și rezultatele (până acum) ale unui job; None dacă jobul nu există sau a expirat."""
+    redis = await get_redis_pool()
+    state = await redis.hgetall(_state_key(job_id))
+    if not state:
+        return None
+    state = {(k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+             for k, v in state.items()}
+    for field in ("total", "done", "created", "failed"):
+        state[field] = int(state.get(field) or 0)
+
+    results = [json.loads(raw) for raw in await redis.lrange(_results_key(job_id), 0, -1)]
+    state["job_id"] = job_id
+    state["created_awbs"] = [r for r in results if "error" not in r]
+    state["errors"] = [r for r in results if "error" in r]
+
+    if state["status"] in ("queued", "running"):
+        # un job pierdut de worker (ex. restart) nu trebuie să rămână „în curs” la nesfârșit
+        arq_status = await Job(job_id, redis).status()
+        if arq_status == JobStatus.not_found:
+            state["status"] = "lost"
+    return state
+
+
+async def relay_progress_to_websockets() -> None:
+    """
+    Rulează în procesul web: retransmite mesajele de progres publicate de worker
+    către clienții WebSocket. Se reconectează singur dacă Redis cade.
+    """
+    while True:
+        try:
+            redis = await get_redis_pool()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(AWB_PROGRESS_CHANNEL)
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        await manager.broadcast(json.loads(message["data"]))
+                    except ValueError:
+                        continue
+            finally:
+                await pubsub.aclose()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Relay progres AWB întrerupt (%s); reîncerc în 5 secunde.", e)
+            await asyncio.sleep(5)
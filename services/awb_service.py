@@ -0,0 +1,251 @@
+# services/awb_service.py
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+import models
+from database import AsyncSessionLocal
+from settings import settings
+from services.couriers import get_courier_service
+from services import shopify_fulfillment_service
+
+logger = logging.getLogger(__name__)
+
+# Un semafor per cont de curier, partajat de toate cererile din proces:
+# două creări în masă simultane pe același cont nu dublează concurența spre DPD.
+_account_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _account_semaphore(account_key: str) -> asyncio.Semaphore:
+    sem = _account_semaphores.get(account_key)
+    if sem is None:
+        sem = _account_semaphores[account_key] = asyncio.Semaphore(max(1, settings.awb_create_concurrency))
+    return sem
+
+
+def extract_awb(res: Any) -> Optional[str]:
+    """Normalizează AWB-ul din răspunsul curierului (awb / id / parcels[0].id)."""
+    if not isinstance(res, dict):
+        return None
+    awb = res.get("awb") or res.get("id")
+    if not awb:
+        try:
+            awb = (res.get("parcels") or [{}])[0].get("id")
+        except Exception:
+            awb = None
+    return str(awb) if awb else None
+
+
+async def _prefetch_orders(db: AsyncSession, order_ids: List[int]) -> Dict[int, models.Order]:
+    """Toate comenzile + produsele lor într-o singură rundă de interogări."""
+    stmt = (
+        select(models.Order)
+        .options(selectinload(models.Order.line_items))
+        .where(models.Order.id.in_(order_ids))
+    )
+    return {o.id: o for o in (await db.execute(stmt)).scalars().all()}
+
+
+def normalize_idempotency_key(key: Any) -> str:
+    """Cheia de idempotență trimisă de client; lipsa ei ('') înseamnă un singur AWB per comandă și cont."""
+    return str(key or "").strip()[:64]
+
+
+async def _existing_shipments(db: AsyncSession, order_ids: List[int], account_key: str) -> Dict[int, models.Shipment]:
+    """AWB-uri deja create pe același cont (inclusiv cele de dinaintea registrului awb_requests)."""
+    if not order_ids:
+        return {}
+    stmt = (
+        select(models.Shipment)
+        .where(
+            models.Shipment.order_id.in_(order_ids),
+            models.Shipment.account_key == account_key,
+            models.Shipment.awb.isnot(None),
+        )
+        .order_by(models.Shipment.id)
+    )
+    return {s.order_id: s for s in (await db.execute(stmt)).scalars().all()}
+
+
+async def _claim_requests(order_ids: List[int], account_key: str, idem_key: str) -> Dict[int, int]:
+    """
+    Rezervă atomic (INSERT ... ON CONFLICT) câte o cerere `in_flight` per comandă.
+    O cerere existentă se preia doar dacă a eșuat sau a rămas blocată în `in_flight`
+    peste `awb_request_stale_minutes`. Returnează {order_id: awb_request_id} pentru cele rezervate.
+    """
+    if not order_ids:
+        return {}
+    req = models.AwbRequest.__table__
+    stale_before = func.now() - timedelta(minutes=settings.awb_request_stale_minutes)
+    stmt = pg_insert(req).values([
+        {"order_id": oid, "account_key": account_key, "idempotency_key": idem_key, "status": "in_flight"}
+        for oid in order_ids
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_awb_requests_order_account_key",
+        set_={"status": "in_flight", "error": None, "attempts": req.c.attempts + 1, "updated_at": func.now()},
+        where=(req.c.status == "failed") | ((req.c.status == "in_flight") & (req.c.updated_at < stale_before)),
+    ).returning(req.c.order_id, req.c.id)
+
+    # tranzacție proprie, comisă înainte de orice apel la curier: un dublu-click concurent vede rezervarea
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(stmt)).all()
+        await session.commit()
+    return {order_id: request_id for order_id, request_id in rows}
+
+
+async def _load_requests(db: AsyncSession, order_ids: List[int], account_key: str, idem_key: str) -> Dict[int, models.AwbRequest]:
+    if not order_ids:
+        return {}
+    stmt = select(models.AwbRequest).where(
+        models.AwbRequest.order_id.in_(order_ids),
+        models.AwbRequest.account_key == account_key,
+        models.AwbRequest.idempotency_key == idem_key,
+    )
+    return {r.order_id: r for r in (await db.execute(stmt)).scalars().all()}
+
+
+async def _persist_shipment(
+    request_id: int, order_id: int, account_key: str, courier: str, awb: str, res: Dict[str, Any]
+) -> None:
+    """
+    Salvează imediat AWB-ul creat și închide cererea din registru, în aceeași tranzacție
+    proprie: un crash mai târziu în lot nu pierde AWB-urile deja plătite la curier.
+    """
+    async with AsyncSessionLocal() as session:
+        shipment = models.Shipment(
+            order_id=order_id,
+            courier=courier,
+            account_key=account_key,
+            awb=awb,
+            courier_specific_data=res,
+        )
+        session.add(shipment)
+        await session.flush()
+        await session.execute(
+            update(models.Order).where(models.Order.id == order_id).values(assigned_courier=courier)
+        )
+        await session.execute(
+            update(models.AwbRequest)
+            .where(models.AwbRequest.id == request_id)
+            .values(status="succeeded", awb=awb, shipment_id=shipment.id, error=None)
+        )
+        # notificarea Shopify pleacă din outbox, în aceeași tranzacție cu AWB-ul
+        await shopify_fulfillment_service.enqueue_shipments(session, [shipment.id])
+        await session.commit()
+
+
+async def _close_requests(outcomes: List[Dict[str, Any]]) -> None:
+    """Marchează cererile nereușite (sau cu AWB creat dar nesalvat) într-un singur UPDATE executemany."""
+    if not outcomes:
+        return
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(models.AwbRequest), outcomes)
+            await session.commit()
+    except Exception as ex:
+        # rămân `in_flight` și devin reîncercabile după `awb_request_stale_minutes`
+        logger.error("Nu am putut actualiza registrul awb_requests: %s", ex)
+
+
+async def create_awbs_bulk(
+    db: AsyncSession,
+    order_ids: List[int],
+    account_key: str,
+    options_for: Callable[[models.Order], Dict[str, Any]],
+    courier: str = "DPD",
+    idempotency_key: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Creează AWB-uri pentru mai multe comenzi, concurent (limitat per cont de curier),
+    cu clientul HTTP partajat al curierilor. Fiecare AWB reușit se salvează imediat.
+
+    Idempotent prin registrul `awb_requests`: pentru aceeași (comandă, cont, cheie)
+    se face cel mult un apel reușit la curier; reîncercările și dublu-click-urile
+    primesc AWB-ul existent (`replayed: True`), iar o cerere încă în lucru este raportată ca eroare.
+    `on_result`, dacă e dat, este apelat cu rezultatul fiecărei comenzi imediat ce se termină.
+    Returnează (created, errors), în ordinea comenzilor primite.
+    """
+    courier_service = get_courier_service(courier)
+    if not courier_service or not hasattr(courier_service, "create_awb_for_account"):
+        raise ValueError(f"Crearea AWB în masă nu este disponibilă pentru '{courier}'.")
+
+    idem_key = normalize_idempotency_key(idempotency_key)
+    order_ids = list(dict.fromkeys(order_ids))  # un ID trimis de două ori nu trebuie să creeze două AWB-uri
+    account = (await db.execute(
+        select(models.CourierAccount).where(models.CourierAccount.account_key == account_key)
+    )).scalar_one_or_none()
+    orders = await _prefetch_orders(db, order_ids)
+
+    # Fără cheie explicită, un AWB deja existent pe cont (chiar și de dinaintea registrului) încheie cererea.
+    existing = await _existing_shipments(db, list(orders), account_key) if not idem_key else {}
+    claimed = await _claim_requests([oid for oid in orders if oid not in existing], account_key, idem_key)
+    ledger = await _load_requests(db, [oid for oid in orders if oid not in existing and oid not in claimed], account_key, idem_key)
+
+    semaphore = _account_semaphore(account_key)
+    outcomes: List[Dict[str, Any]] = []
+
+    async def _create_one(oid: int) -> Dict[str, Any]:
+        order = orders.get(oid)
+        if not order:
+            return {"order_id": oid, "error": f"Comanda {oid} nu a fost găsită."}
+        if oid in existing:
+            return {"order_id": oid, "awb": existing[oid].awb, "replayed": True}
+        request_id = claimed.get(oid)
+        if request_id is None:
+            prev = ledger.get(oid)
+            if prev is not None and prev.status == "succeeded" and prev.awb:
+                return {"order_id": oid, "awb": prev.awb, "replayed": True}
+            return {"order_id": oid, "error": f"Comanda {order.name}: crearea AWB este deja în curs; reîncearcă în câteva momente."}
+
+        try:
+            async with semaphore:
+                res = await courier_service.create_awb_for_account(order, account, options=options_for(order))
+        except Exception as ex:
+            outcomes.append({"id": request_id, "status": "failed", "error": str(ex)})
+            return {"order_id": oid, "error": str(ex)}
+
+        awb = extract_awb(res)
+        if not awb:
+            error = f"{courier}: nu am primit AWB în răspuns: {res}"
+            outcomes.append({"id": request_id, "status": "failed", "error": error})
+            return {"order_id": oid, "error": error}
+        try:
+            await _persist_shipment(request_id, oid, account_key, courier, awb, res)
+        except Exception as ex:
+            # AWB-ul există la curier, dar nu s-a putut salva: îl raportăm explicit, ca să nu se piardă,
+            # și îl păstrăm în registru ca reușit, ca o reîncercare să nu plătească încă un AWB
+            logger.error("AWB %s creat pentru comanda %s dar nesalvat în DB: %s", awb, oid, ex)
+            error = f"AWB {awb} creat, dar nesalvat local: {ex}"
+            outcomes.append({"id": request_id, "status": "succeeded", "awb": awb, "error": error})
+            return {"order_id": oid, "awb": awb, "error": error}
+        return {"order_id": oid, "awb": awb}
+
+    async def _report(oid: int) -> Dict[str, Any]:
+        result = await _create_one(oid)
+        if on_result is not None:
+            try:
+                await on_result(result)
+            except Exception as ex:
+                logger.warning("Raportarea progresului pentru comanda %s a eșuat: %s", oid, ex)
+        return result
+
+    results = await asyncio.gather(*(_report(oid) for oid in order_ids))
+    await _close_requests(outcomes)
+
+    created = [r for r in results if "error" not in r]
+    errors = [r for r in results if "error" in r]
+    replayed = sum(1 for r in created if r.get("replayed"))
+    logger.info(
+        "Creare AWB în masă (%s): %s reușite (%s existente), %s erori.",
+        account_key, len(created), replayed, len(errors),
+    )
+    return created, errors
@@ -0,0 +1,197 @@
+# services/cod_reconciliation_service.py
+#
+# Reconcilierea rambursurilor: importă borderoul de plată ramburs al curierului (DPD / Sameday,
+# CSV sau XLSX), potrivește AWB -> Shipment -> Order printr-un index în memorie construit dintr-o
+# singură interogare, semnalează diferențele de sumă și marchează ca plătite comenzile potrivite.
+
+import asyncio
+import csv
+import io
+import logging
+import re
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services import financials_service
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER_SCAN_ROWS = 15
+REPORT_LIMIT = 500
+
+# aliasuri de antet întâlnite în exporturile DPD / Sameday (comparate după normalizare)
+_AWB_HEADERS = {"awb", "nrawb", "numarawb", "awbnumber", "shipment", "shipmentid", "nrexpediere", "numarexpediere", "parcelid"}
+_AMOUNT_HEADERS = {"ramburs", "sumaramburs", "valoareramburs", "cod", "codamount", "rambursincasat", "sumaincasata", "amount", "suma"}
+
+_PAID = {"paid", "partially_refunded", "refunded"}
+
+
+def _norm_header(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(value or "").lower().replace("ă", "a").replace("ș", "s").replace("ş", "s"))
+
+
+def normalize_awb(value: Any) -> str:
+    """AWB-urile din Excel vin uneori ca float (`1234.0`) sau cu apostrof / spații."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    awb = re.sub(r"\s+", "", str(value or "")).lstrip("'")
+    return awb[:-2] if awb.endswith(".0") and awb[:-2].isdigit() else awb
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    s = re.sub(r"[^\d,.\-]", "", str(value))
+    if "," in s and "." in s:
+        # separatorul zecimal este ultimul apărut
+        s = s.replace(".", "").replace(",", ".") if s.rfind(",") > s.rfind(".") else s.replace(",", "")
+    else:
+        s = s.replace(",", ".")
+    try:
+        return float(s)
+    except ValueError:
+        return None
+
+
+def _iter_csv(stream: IO[bytes]) -> Iterator[List[Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace", newline="")
+    sample = text.read(8192)
+    text.seek(0)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        # rânduri de titlu deasupra antetului încurcă sniffer-ul; alegem separatorul cel mai frecvent
+        delimiter = max(";,\t", key=sample.count)
+    yield from csv.reader(text, delimiter=delimiter)
+
+
+def _iter_xlsx(stream: IO[bytes]) -> Iterator[List[Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("Importul XLSX necesită pachetul openpyxl.") from e
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+def iter_remittance(filename: str, stream: IO[bytes]) -> Iterator[Tuple[int, str, Optional[float]]]:
+    """Citește fișierul rând cu rând și produce (nr. rând, AWB, sumă ramburs)."""
+    rows = _iter_xlsx(stream) if (filename or "").lower().endswith((".xlsx", ".xlsm")) else _iter_csv(stream)
+
+    awb_col = amount_col = None
+    for line_no, row in enumerate(rows, start=1):
+        if awb_col is None:
+            headers = [_norm_header(c) for c in row]
+            awb_col = next((i for i, h in enumerate(headers) if h in _AWB_HEADERS), None)
+            if awb_col is not None:
+                amount_col = next((i for i, h in enumerate(headers) if h in _AMOUNT_HEADERS), None)
+                if amount_col is None:
+                    raise ValueError("Nu am găsit coloana cu suma rambursului în antet.")
+            elif line_no >= HEADER_SCAN_ROWS:
+                raise ValueError("Nu am găsit coloana AWB în primele rânduri ale fișierului.")
+            continue
+        if len(row) <= max(awb_col, amount_col):
+            continue
+        awb = normalize_awb(row[awb_col])
+        if awb:
+            yield line_no, awb, parse_amount(row[amount_col])
+    if awb_col is None:
+        # fișier gol sau cu mai puțin de HEADER_SCAN_ROWS rânduri, fără antet recunoscut
+        raise ValueError("Nu am găsit coloana AWB în primele rânduri ale fișierului.")
+
+
+def _sum_by_awb(filename: str, stream: IO[bytes]) -> Tuple[Dict[str, float], int, int]:
+    """Sumele borderoului adunate pe AWB, plus numărul de rânduri citite și cu sumă invalidă."""
+    amounts_by_awb: Dict[str, float] = {}
+    rows_read = invalid_amount = 0
+    for line_no, awb, amount in iter_remittance(filename, stream):
+        rows_read += 1
+        if amount is None:
+            invalid_amount += 1
+            continue
+        amounts_by_awb[awb] = amounts_by_awb.get(awb, 0.0) + amount
+    return amounts_by_awb, rows_read, invalid_amount
+
+
+async def _awb_index(db: AsyncSession, awbs: List[str]) -> Dict[str, Tuple[int, str, Optional[float], str]]:
+    """{awb: (order_id, order_name, total_price, financial_status)} dintr-o singură interogare."""
+    if not awbs:
+        return {}
+    rows = await db.execute(
+        select(
+            models.Shipment.awb, models.Order.id, models.Order.name,
+            models.Order.total_price, models.Order.financial_status,
+        )
+        .join(models.Order, models.Order.id == models.Shipment.order_id)
+        # un singur parametru array, nu zeci de mii de parametri într-un IN (...)
+        .where(models.Shipment.awb == any_(bindparam("awbs", awbs, type_=ARRAY(String))))
+    )
+    return {awb: (oid, name, total, (fin or "")) for awb, oid, name, total, fin in rows}
+
+
+async def reconcile(db: AsyncSession, filename: str, stream: IO[bytes], mark_paid: bool = False) -> Dict[str, Any]:
+    """
+    Potrivește borderoul cu comenzile. Sumele aceluiași AWB (mai multe colete) și ale AWB-urilor
+    aceleiași comenzi se adună, apoi se compară cu totalul comenzii.
+    Cu `mark_paid`, comenzile potrivite și încă neplătite sunt marcate ca plătite în lot.
+    """
+    # parsarea (openpyxl / csv) este CPU și I/O sincron: rulează în afara event loop-ului
+    amounts_by_awb, rows_read, invalid_amount = await asyncio.to_thread(_sum_by_awb, filename, stream)
+
+    index = await _awb_index(db, list(amounts_by_awb))
+
+    unknown = [awb for awb in amounts_by_awb if awb not in index]
+    per_order: Dict[int, Dict[str, Any]] = {}
+    for awb, amount in amounts_by_awb.items():
+        hit = index.get(awb)
+        if hit is None:
+            continue
+        oid, name, total, fin = hit
+        entry = per_order.setdefault(oid, {
+            "order_id": oid, "name": name, "expected": total, "financial_status": fin, "received": 0.0, "awbs": [],
+        })
+        entry["received"] += amount
+        entry["awbs"].append(awb)
+
+    matched, mismatched, already_paid = [], [], []
+    for entry in per_order.values():
+        entry["received"] = round(entry["received"], 2)
+        if entry["financial_status"].lower() in _PAID:
+            already_paid.append(entry)
+        elif entry["expected"] is None or abs(entry["received"] - entry["expected"]) > settings.cod_amount_tolerance:
+            mismatched.append(entry)
+        else:
+            matched.append(entry)
+
+    result: Dict[str, Any] = {
+        "rows": rows_read,
+        "awbs": len(amounts_by_awb),
+        "invalid_amount_rows": invalid_amount,
+        "matched": len(matched),
+        "mismatched": mismatched[:REPORT_LIMIT],
+        "mismatched_count": len(mismatched),
+        "unknown_awbs": unknown[:REPORT_LIMIT],
+        "unknown_count": len(unknown),
+        "already_paid": len(already_paid),
+        "total_received": round(sum(amounts_by_awb.values()), 2),
+        "marked": None,
+    }
+    if mark_paid and matched:
+        result["marked"] = await financials_service.mark_orders_paid(db, [e["order_id"] for e in matched])
+
+    logger.info(
+        "Reconciliere ramburs %s: %s AWB, %s potrivite, %s diferențe, %s necunoscute.",
+        filename, len(amounts_by_awb), len(matched), len(mismatched), len(unknown),
+    )
+    return result
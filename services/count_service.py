@@ -0,0 +1,153 @@
+# services/count_service.py
+#
+# Strategia de numărare pentru totalul din lista de comenzi:
+#   - fără filtre: estimarea din pg_class.reltuples (instantanee, actualizată de ANALYZE);
+#   - cu filtre: count plafonat (LIMIT cap + 1); sub plafon e exact și se memorează;
+#     peste plafon afișăm „cap+” și calculăm exactul în fundal;
+#   - totalurile exacte (și agregatele de tip fațete) se țin în Redis per semnătură de filtre,
+#     cu TTL scurt, sub o „generație” pe care sincronizările o incrementează (invalidare fără SCAN/DEL).
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "order_count:generation"
+REDIS_RETRY_AFTER_SECONDS = 60
+
+_local_generation = 0  # folosit când Redis nu e disponibil
+_pending: Set[str] = set()
+_tasks: Set["asyncio.Task[None]"] = set()
+_redis_down_until = 0.0
+
+
+@dataclass(frozen=True)
+class OrderCount:
+    value: int
+    exact: bool
+
+
+def filter_signature(filters: Dict[str, Any]) -> str:
+    raw = json.dumps(filters, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+async def _redis():
+    """Pool-ul Redis comun; după o eroare de conexiune nu mai încercăm un minut (pagina nu așteaptă)."""
+    global _redis_down_until
+    if time.monotonic() < _redis_down_until:
+        raise ConnectionError("Redis indisponibil")
+    from services.awb_job_service import get_redis_pool
+    try:
+        return await get_redis_pool()
+    except Exception:
+        _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER_SECONDS
+        raise
+
+
+async def _generation() -> str:
+    try:
+        gen = await (await _redis()).get(GENERATION_KEY)
+        return (gen.decode() if isinstance(gen, bytes) else str(gen)) if gen is not None else "0"
+    except Exception:
+        return f"local{_local_generation}"
+
+
+async def invalidate() -> None:
+    """Apelat după scrieri de sincronizare: toate totalurile memorate devin invalide."""
+    global _local_generation
+    _local_generation += 1
+    try:
+        await (await _redis()).incr(GENERATION_KEY)
+    except Exception as e:
+        logger.debug("Nu am putut invalida totalurile în Redis: %s", e)
+
+
+async def _cache_get(key: str) -> Optional[int]:
+    try:
+        value = await (await _redis()).get(key)
+        return int(value) if value is not None else None
+    except Exception:
+        return None
+
+
+async def _cache_set(key: str, value: int) -> None:
+    try:
+        await (await _redis()).set(key, value, ex=max(1, settings.order_count_cache_ttl_seconds))
+    except Exception:
+        pass
+
+
+async def _estimate_table_rows(db: AsyncSession) -> Optional[int]:
+    estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'orders'::regclass"))
+    # -1 = tabela nu a fost încă analizată
+    return int(estimate) if estimate is not None and estimate >= 0 else None
+
+
+async def _exact_in_background(key: str, id_query) -> None:
+    if key in _pending:
+        return
+    _pending.add(key)
+    try:
+        async with AsyncSessionLocal() as session:
+            value = await session.scalar(select(func.count()).select_from(id_query.subquery()))
+        await _cache_set(key, int(value or 0))
+    except Exception as e:
+        logger.warning("Numărarea exactă în fundal a eșuat: %s", e)
+    finally:
+        _pending.discard(key)
+
+
+async def count_orders(db: AsyncSession, id_query, filters: Dict[str, Any]) -> OrderCount:
+    """
+    `id_query` = interogarea filtrată care selectează doar Order.id, fără ORDER BY.
+    `filters` = filtrele active (semnătura de cache); gol = lista completă.
+    """
+    if not filters:
+        estimate = await _estimate_table_rows(db)
+        if estimate is not None:
+            return OrderCount(estimate, exact=False)
+
+    key = f"order_count:{await _generation()}:{filter_signature(filters)}"
+    cached = await _cache_get(key)
+    if cached is not None:
+        return OrderCount(cached, exact=True)
+
+    cap = max(1, settings.order_count_cap)
+    capped = int(await db.scalar(select(func.count()).select_from(id_query.limit(cap + 1).subquery())) or 0)
+    if capped <= cap:
+        await _cache_set(key, capped)
+        return OrderCount(capped, exact=True)
+
+    task = asyncio.create_task(_exact_in_background(key, id_query))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return OrderCount(cap, exact=False)
+
+
+async def cached_aggregate(kind: str, filters: Dict[str, Any], compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Agregat serializabil JSON (ex. numărătorile fațetelor), memorat per semnătură de filtre."""
+    key = f"order_agg:{kind}:{await _generation()}:{filter_signature(filters)}"
+    try:
+        cached = await (await _redis()).get(key)
+        if cached is not None:
+            return json.loads(cached)
+    except Exception:
+        pass
+    value = await compute()
+    try:
+        await (await _redis()).set(key, json.dumps(value), ex=max(1, settings.order_count_cache_ttl_seconds))
+    except Exception:
+        pass
+    return value
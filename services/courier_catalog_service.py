@@ -0,0 +1,272 @@
+# services/courier_catalog_service.py
+#
+# Cache pentru nomenclatoarele DPD (servicii, servicii disponibile per destinație); localitățile
+# și străzile vin din oglinda locală a nomenclatorului (dpd_nomenclature_service).
+# Trei niveluri: memorie (per proces) -> tabela courier_catalog (cu expires_at) -> API DPD.
+# Formularele de AWB și validarea profilelor citesc doar din cache: o intrare expirată se
+# servește în continuare și se reîmprospătează în fundal; worker-ul o ține caldă periodic.
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from settings import settings
+from services.couriers import get_http_client
+from services.couriers.dpd import DPD_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+ROMANIA_COUNTRY_ID = 642
+REFRESH_CONCURRENCY = 4
+
+CatalogKey = Tuple[str, str, str]  # (account_key, kind, lookup_key)
+
+_memory: Dict[CatalogKey, Tuple[datetime, Any]] = {}
+_refreshing: Set[CatalogKey] = set()
+_background: Set[asyncio.Task] = set()
+
+
+# --- Acces API DPD (asincron, clientul HTTP partajat al curierilor) ---
+
+def dpd_api_credentials(credentials: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Acceptă ambele forme de credențiale din DB: plate sau sub cheia 'api'."""
+    creds = credentials or {}
+    api = creds.get("api") if isinstance(creds.get("api"), dict) and creds.get("api") else creds
+    return {
+        "userName": api.get("username") or api.get("userName"),
+        "password": api.get("password"),
+        "client_id": api.get("client_id") or api.get("clientId") or api.get("dpd_client_id"),
+    }
+
+
+async def _dpd_post(path: str, creds: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+    payload = {"userName": creds["userName"], "password": creds["password"], "language": "RO", **body}
+    resp = await get_http_client().post(f"{DPD_BASE_URL}{path}", json=payload, headers={"Accept": "application/json"}, timeout=30.0)
+    if resp.status_code >= 400:
+        raise RuntimeError(f"DPD {path}: HTTP {resp.status_code}: {resp.text[:200]}")
+    data = resp.json() if resp.content else {}
+    if isinstance(data, dict) and data.get("error"):
+        raise RuntimeError(f"DPD {path}: {(data['error'] or {}).get('message') or data['error']}")
+    return data if isinstance(data, dict) else {}
+
+
+def _slim_service(s: Dict[str, Any]) -> Dict[str, Any]:
+    svc = s.get("service") if isinstance(s.get("service"), dict) else s
+    return {
+        "id": svc.get("id") or s.get("serviceId"),
+        "name": svc.get("name") or svc.get("nameEn") or "",
+        "cargo_type": svc.get("cargoType"),
+        "require_parcel_weight": svc.get("requireParcelWeight"),
+        "require_parcel_size": svc.get("requireParcelSize"),
+    }
+
+
+async def fetch_services(creds: Dict[str, Any]) -> List[Dict[str, Any]]:
+    data = await _dpd_post("/services", creds, {})
+    return [_slim_service(s) for s in (data.get("services") or []) if isinstance(s, dict)]
+
+
+async def fetch_destination_services(
+    creds: Dict[str, Any], postcode: Optional[str] = None, site_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    location: Dict[str, Any] = {"countryId": ROMANIA_COUNTRY_ID}
+    if site_id:
+        location["siteId"] = site_id
+    if postcode:
+        location["postCode"] = postcode
+    body: Dict[str, Any] = {"recipient": {"privatePerson": True, "addressLocation": location}}
+    if creds.get("client_id"):
+        body["sender"] = {"clientId": int(creds["client_id"])}
+    data = await _dpd_post("/services/destination", creds, body)
+    return [_slim_service(s) for s in (data.get("services") or []) if isinstance(s, dict)]
+
+
+# --- Cache în memorie + tabelă ---
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _ttl() -> timedelta:
+    return timedelta(hours=max(1, settings.courier_catalog_ttl_hours))
+
+
+async def _load_entry(db: AsyncSession, key: CatalogKey) -> Optional[Tuple[datetime, Any]]:
+    entry = _memory.get(key)
+    if entry is not None and entry[0] > _now():
+        return entry
+    # expirată în memorie: poate worker-ul (alt proces) a reîmprospătat-o deja în tabelă
+    account_key, kind, lookup_key = key
+    row = (await db.execute(
+        select(models.CourierCatalogEntry.expires_at, models.CourierCatalogEntry.payload).where(
+            models.CourierCatalogEntry.account_key == account_key,
+            models.CourierCatalogEntry.kind == kind,
+            models.CourierCatalogEntry.lookup_key == lookup_key,
+        )
+    )).first()
+    if row is None:
+        return entry
+    _memory[key] = (row.expires_at, row.payload)
+    return _memory[key]
+
+
+async def store_entry(key: CatalogKey, payload: Any) -> None:
+    account_key, kind, lookup_key = key
+    expires_at = _now() + _ttl()
+    stmt = pg_insert(models.CourierCatalogEntry).values(
+        account_key=account_key, kind=kind, lookup_key=lookup_key, payload=payload, expires_at=expires_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_courier_catalog_entry",
+        set_={"payload": stmt.excluded.payload, "expires_at": stmt.excluded.expires_at, "fetched_at": _now()},
+    )
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+    _memory[key] = (expires_at, payload)
+
+
+async def _refresh(key: CatalogKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    payload = await fetch()
+    await store_entry(key, payload)
+    return payload
+
+
+def _schedule_refresh(key: CatalogKey, fetch: Callable[[], Awaitable[Any]]) -> None:
+    """Reîmprospătare în fundal, cel mult una în zbor per intrare."""
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+
+    async def _run():
+        try:
+            await _refresh(key, fetch)
+        except Exception as e:
+            logger.warning("Catalog curier %s: reîmprospătarea a eșuat: %s", key, e)
+        finally:
+            _refreshing.discard(key)
+
+    task = asyncio.create_task(_run())
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _cached(
+    db: AsyncSession, key: CatalogKey, fetch: Callable[[], Awaitable[Any]], blocking: bool = False
+) -> Optional[Any]:
+    """
+    Intrare proaspătă -> o returnează; expirată -> o returnează și o reîmprospătează în fundal;
+    lipsă -> o aduce live doar dacă `blocking`, altfel programează aducerea și returnează None.
+    """
+    entry = await _load_entry(db, key)
+    if entry is not None:
+        expires_at, payload = entry
+        if expires_at <= _now():
+            _schedule_refresh(key, fetch)
+        return payload
+    if blocking:
+        return await _refresh(key, fetch)
+    _schedule_refresh(key, fetch)
+    return None
+
+
+# --- API public ---
+
+async def get_services(db: AsyncSession, account: models.CourierAccount, blocking: bool = False) -> List[Dict[str, Any]]:
+    creds = dpd_api_credentials(account.credentials)
+    key = (account.account_key, "services", "")
+    return await _cached(db, key, lambda: fetch_services(creds), blocking=blocking) or []
+
+
+async def get_destination_services(
+    db: AsyncSession,
+    account: models.CourierAccount,
+    postcode: Optional[str] = None,
+    site_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Serviciile disponibile spre destinație; până se populează cache-ul, lista generală a contului."""
+    postcode = (postcode or "").strip() or None
+    if postcode or site_id:
+        creds = dpd_api_credentials(account.credentials)
+        lookup = f"site:{site_id}" if site_id else f"pc:{postcode}"
+        key = (account.account_key, "destination", lookup)
+        services = await _cached(db, key, lambda: fetch_destination_services(creds, postcode=postcode, site_id=site_id))
+        if services:
+            return services
+    return await get_services(db, account)
+
+
+async def known_service_ids(db: AsyncSession, account: models.CourierAccount) -> Optional[Set[int]]:
+    """ID-urile de servicii din cache (fără apel live); None dacă încă nu avem catalogul contului."""
+    services = await get_services(db, account)
+    if not services:
+        return None
+    return {int(s["id"]) for s in services if s.get("id") is not None}
+
+
+async def refresh_catalog(db: AsyncSession, expiring_limit: int = 500) -> Dict[str, int]:
+    """
+    Task periodic (worker): reîmprospătează lista de servicii a fiecărui cont DPD activ și
+    intrările care expiră în următoarea oră, concurent, cu limită de cereri simultane.
+    """
+    accounts = (await db.execute(
+        select(models.CourierAccount).where(
+            models.CourierAccount.is_active.is_(True),
+            models.CourierAccount.courier_type.ilike("dpd%"),
+        )
+    )).scalars().all()
+    creds_by_account = {a.account_key: dpd_api_credentials(a.credentials) for a in accounts}
+
+    expiring = (await db.execute(
+        select(models.CourierCatalogEntry.account_key, models.CourierCatalogEntry.kind, models.CourierCatalogEntry.lookup_key)
+        .where(
+            models.CourierCatalogEntry.expires_at < _now() + timedelta(hours=1),
+            models.CourierCatalogEntry.kind == "destination",
+            models.CourierCatalogEntry.account_key.in_(list(creds_by_account)),
+        )
+        .order_by(models.CourierCatalogEntry.expires_at)
+        .limit(expiring_limit)
+    )).all()
+
+    jobs: List[Tuple[CatalogKey, Callable[[], Awaitable[Any]]]] = []
+    for account_key, creds in creds_by_account.items():
+        if creds["userName"] and creds["password"]:
+            jobs.append(((account_key, "services", ""), lambda c=creds: fetch_services(c)))
+    for account_key, kind, lookup_key in expiring:
+        creds = creds_by_account[account_key]
+        fetch = _fetcher_for(creds, kind, lookup_key)
+        if fetch is not None:
+            jobs.append(((account_key, kind, lookup_key), fetch))
+
+    semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+    async def _one(key: CatalogKey, fetch: Callable[[], Awaitable[Any]]) -> bool:
+        async with semaphore:
+            try:
+                await _refresh(key, fetch)
+                return True
+            except Exception as e:
+                logger.warning("Catalog curier %s: %s", key, e)
+                return False
+
+    results = await asyncio.gather(*(_one(k, f) for k, f in jobs))
+    stats = {"refreshed": sum(results), "failed": len(results) - sum(results)}
+    logger.info("Catalog curier reîmprospătat: %s", stats)
+    return stats
+
+
+def _fetcher_for(creds: Dict[str, Any], kind: str, lookup_key: str) -> Optional[Callable[[], Awaitable[Any]]]:
+    """Reconstruiește apelul live dintr-o cheie salvată (pentru reîmprospătarea periodică)."""
+    if kind == "destination":
+        if lookup_key.startswith("site:"):
+            return lambda: fetch_destination_services(creds, site_id=int(lookup_key[5:]))
+        if lookup_key.startswith("pc:"):
+            return lambda: fetch_destination_services(creds, postcode=lookup_key[3:])
+    return None
@@ -3,16 +3,21 @@
 import asyncio
 import logging
 from collections import defaultdict
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import datetime, timedelta, timezone
 
 import models
+from services import stats_service
 from services.couriers import get_courier_service
 
 logger = logging.getLogger(__name__)
 
+# Trimise inline (literal_execute), nu ca parametri: predicatul trebuie să fie identic cu cel
+# al indexului parțial ix_shipments_open_tracking ca planner-ul să-l poată folosi.
+FINAL_STATUSES = ['delivered', 'refused', 'returned', 'canceled', 'livrat', 'refuzat', 'returnat', 'anulat', 'unknown', 'not found', 'error', 'tracking-error']
+
 def get_courier_service_by_name(courier_name: str):
     service = get_courier_service(courier_name)
     if not service:
@@ -21,13 +26,14 @@ def get_courier_service_by_name(courier_name: str):
 
 async def track_and_update_shipments(db: AsyncSession, full_sync: bool = False, days_ago: int = 14):
     logger.info("--- COURIER SYNC A PORNIT ---")
-    final_statuses = ['delivered', 'refused', 'returned', 'canceled', 'livrat', 'refuzat', 'returnat', 'anulat', 'unknown', 'not found', 'error', 'tracking-error']
     since_date = datetime.now(timezone.utc) - timedelta(days=days_ago)
 
     stmt = select(models.Shipment).where(
         models.Shipment.fulfillment_created_at >= since_date,
         models.Shipment.awb.isnot(None),
-        models.Shipment.last_status.is_(None) | ~func.lower(models.Shipment.last_status).in_(final_statuses)
+        models.Shipment.last_status.is_(None) | ~func.lower(models.Shipment.last_status).in_(
+            bindparam('final_statuses', FINAL_STATUSES, expanding=True, literal_execute=True)
+        )
     )
     
     result = await db.execute(stmt)
@@ -45,6 +51,7 @@ async def track_and_update_shipments(db: AsyncSession, full_sync: bool = False,
             grouped_shipments[(s.courier, s.account_key)].append(s)
 
     updated_count = 0
+    updated_order_ids = set()
     
     for (courier_name, account_key), shipments_group in grouped_shipments.items():
         try:
@@ -62,6 +69,7 @@ async def track_and_update_shipments(db: AsyncSession, full_sync: bool = False,
                     logger.info(f"Status nou pentru AWB {shipment.awb} ({courier_name}): '{shipment.last_status}' -> '{response.status}'")
                     shipment.last_status = response.status
                     shipment.last_status_at = response.date
+                    updated_order_ids.add(shipment.order_id)
                     updated_count += 1
                 await asyncio.sleep(0.3) 
 
@@ -71,6 +79,12 @@ async def track_and_update_shipments(db: AsyncSession, full_sync: bool = False,
     if updated_count > 0:
         logger.info(f"COURIER SYNC: Se salvează {updated_count} statusuri noi în baza de date...")
         await db.commit()
+        try:
+            # doar zilele comenzilor cu status nou
+            await stats_service.refresh_for_orders(db, list(updated_order_ids))
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"COURIER SYNC: actualizarea daily_order_stats a eșuat: {e}", exc_info=True)
     else:
         logger.info("COURIER SYNC: Nu a fost găsit niciun status nou de actualizat.")
 
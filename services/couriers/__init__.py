@@ -12,6 +12,10 @@ _courier_instances = {
     "sameday": SamedayCourier(_http_client),
 }
 
+def get_http_client() -> httpx.AsyncClient:
+    """Clientul HTTP comun al curierilor (pool de conexiuni partajat, închis la shutdown)."""
+    return _http_client
+
 def get_courier_service(courier_key: str) -> Optional[BaseCourier]:
     if not courier_key:
         return None
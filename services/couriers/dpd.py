@@ -347,9 +347,19 @@ class DPDCourier(BaseCourier):
         *,
         options: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
+        acct = await self._get_account(db, account_key)
+        return await self.create_awb_for_account(order, acct, options=options)
+
+    async def create_awb_for_account(
+        self,
+        order: models.Order,
+        acct: Optional[models.CourierAccount],
+        *,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Ca `create_awb`, dar cu contul deja încărcat (folosit la crearea în masă, fără interogări per comandă)."""
         opts = options or {}
 
-        acct = await self._get_account(db, account_key)
         if not acct or not getattr(acct, "credentials", None):
             raise RuntimeError("DPD: contul de curier lipsește sau nu are credențiale.")
 
@@ -475,6 +485,25 @@ class DPDCourier(BaseCourier):
 
         desc, qty = _build_content_line(order)
 
+        # siteId/streetId rezolvate local din nomenclatorul DPD; ce nu se potrivește sigur rămâne pe denumiri
+        street_name, street_no = _split_street_and_no(ship_addr1) if ship_addr1 else (None, None)
+        site_id = street_id = None
+        if ship_country == "RO":
+            from services.dpd_nomenclature_service import resolve_address
+            site_id, street_id = await resolve_address(
+                ship_zip, ship_city, street_name, _safe_str(getattr(order, "shipping_province", None)),
+            )
+        recipient_address = {
+            "countryId": 642 if ship_country == "RO" else None,
+            "siteId": site_id,
+            "siteName": None if site_id else ((ship_city or "").upper() or None),
+            "postCode": ship_zip or None,
+            "streetId": street_id,
+            "streetType": None if street_id else "str.",
+            "streetName": None if street_id else ((street_name or "").upper() or None),
+            "streetNo": street_no,
+        }
+
         content_block = {
             "parcelsCount": count_int,
             "totalWeight": round(total_w, 3),
@@ -497,14 +526,7 @@ class DPDCourier(BaseCourier):
                 "privatePerson": bool(private_person),
                 "email": ship_email or None,
                 "phone1": {"number": ship_phone} if ship_phone else None,
-                "address": _drop_nones({
-                    "countryId": 642 if ship_country == "RO" else None,
-                    "siteName": (ship_city or "").upper() or None,
-                    "postCode": ship_zip or None,
-                    "streetType": "str.",
-                    "streetName": (_split_street_and_no(ship_addr1)[0] or "").upper() if ship_addr1 else None,
-                    "streetNo": _split_street_and_no(ship_addr1)[1] if ship_addr1 else None,
-                })
+                "address": _drop_nones(recipient_address)
             },
             "content": content_block,
             "parcels": [{"sequence": i + 1, "weight": round(per_parcel_w, 3)} for i in range(count_int)],
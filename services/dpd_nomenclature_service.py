@@ -0,0 +1,238 @@
+# services/dpd_nomenclature_service.py
+#
+# Oglinda locală a nomenclatorului DPD (localități + străzi), descărcată în bloc (CSV) și
+# reîmprospătată periodic de worker. La crearea AWB rezolvăm local siteId/streetId din
+# cod poștal + denumiri normalizate (address_service), în loc să lăsăm DPD să ghicească.
+
+import asyncio
+import csv
+import io
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from services.address_service import norm_text, same_locality, same_street, street_core
+
+logger = logging.getLogger(__name__)
+
+ROMANIA_COUNTRY_ID = 642
+# asyncpg acceptă cel mult 32767 parametri per instrucțiune: lotul se calculează din numărul de coloane
+PG_MAX_BIND_PARAMS = 32767
+DOWNLOAD_TIMEOUT_SECONDS = 300.0
+# două descărcări (localități + străzi) plus upsert-ul: jobul ARQ are nevoie de mai mult decât implicitul de 300s
+REFRESH_JOB_TIMEOUT_SECONDS = 1800
+INDEX_MAX_AGE_SECONDS = 3600
+STREET_CACHE_SITES = 500
+
+
+# --- Descărcare și import ---
+
+async def _download_csv(creds: Dict[str, Any], kind: str) -> List[Dict[str, str]]:
+    """Descarcă nomenclatorul complet (`site` sau `street`) pentru România, ca listă de rânduri CSV."""
+    from services.couriers import get_http_client
+    from services.couriers.dpd import DPD_BASE_URL
+
+    resp = await get_http_client().post(
+        f"{DPD_BASE_URL}/location/{kind}/csv/{ROMANIA_COUNTRY_ID}",
+        json={"userName": creds["userName"], "password": creds["password"], "language": "RO"},
+        timeout=DOWNLOAD_TIMEOUT_SECONDS,
+    )
+    if resp.status_code >= 400:
+        raise RuntimeError(f"DPD nomenclator {kind}: HTTP {resp.status_code}: {resp.text[:200]}")
+    reader = csv.DictReader(io.StringIO(resp.content.decode("utf-8-sig")))
+    return [{(k or "").strip().lower(): (v or "").strip() for k, v in row.items()} for row in reader]
+
+
+def _site_row(row: Dict[str, str], now: datetime) -> Optional[Dict[str, Any]]:
+    if not row.get("id", "").isdigit() or not row.get("name"):
+        return None
+    return {
+        "id": int(row["id"]),
+        "type": row.get("type") or None,
+        "name": row["name"][:255],
+        "name_norm": norm_text(row["name"])[:255],
+        "municipality": row.get("municipality") or None,
+        "region": row.get("region") or None,
+        "region_norm": norm_text(row.get("region")) or None,
+        "post_code": re.sub(r"\D", "", row.get("postcode") or "") or None,
+        "refreshed_at": now,
+    }
+
+
+def _street_row(row: Dict[str, str], now: datetime) -> Optional[Dict[str, Any]]:
+    if not row.get("id", "").isdigit() or not row.get("siteid", "").isdigit() or not row.get("name"):
+        return None
+    return {
+        "id": int(row["id"]),
+        "site_id": int(row["siteid"]),
+        "type": row.get("type") or None,
+        "name": row["name"][:255],
+        "name_norm": street_core(row["name"])[:255],
+        "refreshed_at": now,
+    }
+
+
+async def _upsert(session: AsyncSession, model, rows: List[Dict[str, Any]]) -> None:
+    columns = [c for c in rows[0] if c != "id"]
+    chunk = max(1, PG_MAX_BIND_PARAMS // len(rows[0]))
+    for i in range(0, len(rows), chunk):
+        stmt = pg_insert(model).values(rows[i:i + chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"], set_={c: getattr(stmt.excluded, c) for c in columns},
+        )
+        await session.execute(stmt)
+
+
+async def refresh_nomenclature(db: AsyncSession) -> Dict[str, int]:
+    """
+    Descarcă localitățile și străzile DPD cu primul cont DPD activ, le upsert-ează în bloc
+    și șterge ce nu mai apare în nomenclator. Apelat periodic din worker.
+    """
+    from services.courier_catalog_service import dpd_api_credentials
+
+    accounts = (await db.execute(
+        select(models.CourierAccount).where(
+            models.CourierAccount.is_active.is_(True),
+            models.CourierAccount.courier_type.ilike("dpd%"),
+        ).order_by(models.CourierAccount.id)
+    )).scalars().all()
+    creds = next(
+        (c for c in (dpd_api_credentials(a.credentials) for a in accounts) if c["userName"] and c["password"]),
+        None,
+    )
+    if creds is None:
+        raise RuntimeError("Niciun cont DPD activ cu credențiale pentru descărcarea nomenclatorului.")
+
+    now = datetime.now(timezone.utc)
+    site_rows = [r for r in (_site_row(row, now) for row in await _download_csv(creds, "site")) if r]
+    street_rows = [r for r in (_street_row(row, now) for row in await _download_csv(creds, "street")) if r]
+    if not site_rows:
+        raise RuntimeError("Nomenclatorul de localități DPD a venit gol; păstrez datele existente.")
+
+    async with AsyncSessionLocal() as session:
+        await _upsert(session, models.DpdSite, site_rows)
+        if street_rows:
+            await _upsert(session, models.DpdStreet, street_rows)
+            await session.execute(delete(models.DpdStreet).where(models.DpdStreet.refreshed_at < now))
+        await session.execute(delete(models.DpdSite).where(models.DpdSite.refreshed_at < now))
+        await session.commit()
+
+    invalidate_index()
+    stats = {"sites": len(site_rows), "streets": len(street_rows)}
+    logger.info("Nomenclator DPD reîmprospătat: %s", stats)
+    return stats
+
+
+# --- Index în memorie ---
+
+class _SiteIndex:
+    def __init__(self, sites: List[Tuple[int, str, Optional[str], Optional[str]]]):
+        self.loaded_at = time.monotonic()
+        self.by_postcode: Dict[str, List[Tuple[int, str, Optional[str]]]] = {}
+        self.by_name: Dict[str, List[Tuple[int, str, Optional[str]]]] = {}
+        for site_id, name_norm, region_norm, post_code in sites:
+            entry = (site_id, name_norm, region_norm)
+            if post_code:
+                self.by_postcode.setdefault(post_code, []).append(entry)
+            self.by_name.setdefault(name_norm, []).append(entry)
+
+
+_index: Optional[_SiteIndex] = None
+_index_lock = asyncio.Lock()
+_streets_by_site: "OrderedDict[int, Dict[str, List[int]]]" = OrderedDict()
+
+
+def invalidate_index() -> None:
+    global _index
+    _index = None
+    _streets_by_site.clear()
+
+
+async def _get_index() -> _SiteIndex:
+    global _index
+    if _index is not None and time.monotonic() - _index.loaded_at < INDEX_MAX_AGE_SECONDS:
+        return _index
+    async with _index_lock:
+        if _index is None or time.monotonic() - _index.loaded_at >= INDEX_MAX_AGE_SECONDS:
+            async with AsyncSessionLocal() as session:
+                rows = (await session.execute(
+                    select(models.DpdSite.id, models.DpdSite.name_norm, models.DpdSite.region_norm, models.DpdSite.post_code)
+                )).all()
+            _index = _SiteIndex([tuple(r) for r in rows])
+            _streets_by_site.clear()
+    return _index
+
+
+async def _site_streets(site_id: int) -> Dict[str, List[int]]:
+    streets = _streets_by_site.get(site_id)
+    if streets is not None:
+        _streets_by_site.move_to_end(site_id)
+        return streets
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            select(models.DpdStreet.id, models.DpdStreet.name_norm).where(models.DpdStreet.site_id == site_id)
+        )).all()
+    streets = {}
+    for street_id, name_norm in rows:
+        streets.setdefault(name_norm, []).append(street_id)
+    _streets_by_site[site_id] = streets
+    if len(_streets_by_site) > STREET_CACHE_SITES:
+        _streets_by_site.popitem(last=False)
+    return streets
+
+
+def _pick_site(index: _SiteIndex, postcode: Optional[str], city: Optional[str], province: Optional[str]) -> Optional[int]:
+    city_n, province_n = norm_text(city), norm_text(province)
+    pc = re.sub(r"\D", "", postcode or "")
+
+    candidates = index.by_postcode.get(pc, []) if pc else []
+    if len(candidates) == 1 and (not city_n or same_locality(candidates[0][1], city_n)):
+        return candidates[0][0]
+    if candidates and city_n:
+        exact = [c for c in candidates if c[1] == city_n]
+        close = exact or [c for c in candidates if same_locality(c[1], city_n)]
+        if len(close) == 1:
+            return close[0][0]
+
+    # fără cod poștal utilizabil: localitate după nume, dezambiguizată prin județ
+    by_name = index.by_name.get(city_n, []) if city_n else []
+    if len(by_name) > 1 and province_n:
+        by_name = [c for c in by_name if c[2] and same_locality(c[2], province_n)]
+    if len(by_name) == 1:
+        return by_name[0][0]
+    return None
+
+
+async def resolve_address(
+    postcode: Optional[str], city: Optional[str], street: Optional[str], province: Optional[str] = None,
+) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Returnează (siteId, streetId) DPD pentru o adresă; None acolo unde potrivirea nu e sigură
+    (atunci apelantul trimite în continuare denumirile, ca înainte).
+    """
+    try:
+        index = await _get_index()
+    except Exception as e:
+        logger.warning("Nomenclator DPD indisponibil: %s", e)
+        return None, None
+
+    site_id = _pick_site(index, postcode, city, province)
+    if site_id is None or not street:
+        return site_id, None
+
+    streets = await _site_streets(site_id)
+    core = street_core(street)
+    ids = streets.get(core) if core else None
+    if not ids and core:
+        fuzzy = [sid for name, sids in streets.items() if same_street(name, core) for sid in sids]
+        ids = fuzzy if len(fuzzy) == 1 else None
+    return site_id, (ids[0] if ids and len(ids) == 1 else None)
@@ -0,0 +1,190 @@
+# services/export_service.py
+#
+# Exportul listei de comenzi filtrate (aceiași parametri ca /view) ca CSV sau XLSX.
+# Interogarea rulează pe un cursor server-side (`stream_results` + `yield_per`), iar rândurile
+# se scriu pe măsură ce sosesc: memoria nu depinde de numărul de comenzi exportate.
+
+import asyncio
+import csv
+import io
+import logging
+import re
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, true
+
+import models
+from database import AsyncSessionLocal
+from services import filter_service
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_ROWS = 1000
+XLSX_READ_CHUNK_BYTES = 256 * 1024
+LOCAL_TZ = ZoneInfo("Europe/Bucharest")
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# o celulă text care începe cu aceste caractere e interpretată ca formulă de Excel / LibreOffice
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+# telefoane (+40 744 123 456, +40(744)...) și numere: nu pot apela funcții, rămân nemodificate
+PLAIN_NUMBER_RE = re.compile(r"^(\+[\d\s().]+|-?\d+(?:[.,]\d+)?)$")
+
+HEADERS = [
+    "Comandă", "Magazin", "Data", "Client", "Telefon", "Adresă", "Oraș", "Județ", "Cod poștal",
+    "Total", "Plată", "Status plată", "Status Shopify", "Status", "Status adresă",
+    "Curier", "AWB", "Status curier", "Printat la", "Produse",
+]
+
+
+def _export_query(filtered):
+    Order = models.Order
+    latest = filter_service.latest_shipment_lateral()
+    summary = filter_service.line_items_summary_lateral()
+    return (
+        select(
+            Order.name, models.Store.name, Order.created_at, Order.shipping_name, Order.shipping_phone,
+            Order.shipping_address1, Order.shipping_address2, Order.shipping_city, Order.shipping_province,
+            Order.shipping_zip, Order.total_price, Order.mapped_payment, Order.financial_status,
+            Order.shopify_status, Order.derived_status, Order.address_status,
+            latest.c.courier, latest.c.awb, latest.c.last_status, latest.c.printed_at,
+            summary.c.line_items_str,
+        )
+        .join(filtered, filtered.c.id == Order.id)
+        .outerjoin(models.Store, models.Store.id == Order.store_id)
+        .outerjoin(latest, true())
+        .outerjoin(summary, true())
+    )
+
+
+def _local(value: Any) -> Any:
+    # Excel nu acceptă datetime cu fus orar; exportăm ora locală, fără tzinfo
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(LOCAL_TZ)
+        return value.replace(tzinfo=None, microsecond=0)
+    return value
+
+
+def _values(row: Any) -> List[Any]:
+    (name, store, created_at, shipping_name, phone, address1, address2, city, province, zip_code,
+     total, payment, financial, shopify_status, derived, address_status,
+     courier, awb, courier_status, printed_at, products) = row
+    address = ", ".join(part for part in (address1, address2) if part)
+    return [
+        name, store, _local(created_at), shipping_name, phone, address, city, province, zip_code,
+        total, payment, financial, shopify_status, derived, address_status,
+        courier, awb, courier_status, _local(printed_at), products,
+    ]
+
+
+async def _iter_rows(query_params: Any) -> AsyncIterator[List[Any]]:
+    """Loturi de rânduri (liste de valori) citite pe un cursor server-side."""
+    async with AsyncSessionLocal() as session:
+        filtered, _, _ = await filter_service.build_filtered_query(session, query_params)
+        sort_column, descending = filter_service.SORT_KEYS[filter_service.resolve_sort(query_params)]
+        stmt = (
+            _export_query(filtered.subquery('filtered'))
+            .order_by(*filter_service.sort_ordering(sort_column, descending))
+            .execution_options(stream_results=True, yield_per=EXPORT_CHUNK_ROWS)
+        )
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield [_values(row) for row in partition]
+
+
+def _neutralize_formula(value: Any) -> Any:
+    """Textul venit de la clienți (nume, adresă, notă, produse) nu trebuie să devină formulă în CSV."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not PLAIN_NUMBER_RE.match(value):
+        return "'" + value
+    return value
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    return value.strftime("%Y-%m-%d %H:%M") if isinstance(value, datetime) else _neutralize_formula(value)
+
+
+async def _iter_csv(query_params: Any) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+    # BOM: Excel deschide corect diacriticele
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    exported = 0
+    async for rows in _iter_rows(query_params):
+        buffer.seek(0)
+        buffer.truncate()
+        for values in rows:
+            writer.writerow([_csv_cell(v) for v in values])
+        exported += len(rows)
+        yield buffer.getvalue().encode("utf-8")
+    logger.info("Export CSV: %s comenzi.", exported)
+
+
+def _append_xlsx_rows(ws: Any, rows: List[List[Any]], illegal_re: Any, cell_cls: Any) -> None:
+    # caracterele de control (ex. \x0b lipit într-o adresă) fac openpyxl să ridice IllegalCharacterError
+    # după ce răspunsul a început deja, deci le eliminăm înainte
+    for values in rows:
+        ws.append([_xlsx_cell(ws, v, illegal_re, cell_cls) for v in values])
+
+
+def _xlsx_cell(ws: Any, value: Any, illegal_re: Any, cell_cls: Any) -> Any:
+    """
+    openpyxl tratează ca formulă doar textul care începe cu „=”; acele celule se scriu explicit
+    ca text (fără apostrof), restul (ex. telefoanele +40...) rămân valori obișnuite.
+    """
+    if not isinstance(value, str):
+        return value
+    value = illegal_re.sub("", value)
+    if not value.startswith("="):
+        return value
+    cell = cell_cls(ws, value=value)
+    cell.data_type = "s"
+    return cell
+
+
+async def _iter_xlsx(query_params: Any, workbook_cls: Any, illegal_re: Any, cell_cls: Any) -> AsyncIterator[bytes]:
+    # write_only: rândurile merg direct într-un fișier temporar, nu se țin în memorie
+    wb = workbook_cls(write_only=True)
+    ws = wb.create_sheet("Comenzi")
+    ws.append(HEADERS)
+    exported = 0
+    async for rows in _iter_rows(query_params):
+        # serializarea e CPU-bound: lotul se scrie într-un thread, nu pe event loop
+        await asyncio.to_thread(_append_xlsx_rows, ws, rows, illegal_re, cell_cls)
+        exported += len(rows)
+
+    with tempfile.TemporaryFile() as tmp:
+        await asyncio.to_thread(wb.save, tmp)
+        tmp.seek(0)
+        while chunk := await asyncio.to_thread(tmp.read, XLSX_READ_CHUNK_BYTES):
+            yield chunk
+    logger.info("Export XLSX: %s comenzi.", exported)
+
+
+def open_export(fmt: str, query_params: Any) -> Tuple[AsyncIterator[bytes], str, str]:
+    """
+    Validează formatul înainte de a începe răspunsul și întoarce (generator de bytes, media type,
+    nume fișier). Ridică ValueError pentru format necunoscut sau openpyxl lipsă.
+    """
+    fmt = (fmt or "csv").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Format de export necunoscut: {fmt}")
+    filename = f"comenzi-{datetime.now(LOCAL_TZ):%Y%m%d-%H%M}.{fmt}"
+    if fmt == "xlsx":
+        try:
+            from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        except ImportError as e:
+            raise ValueError("Exportul XLSX necesită pachetul openpyxl.") from e
+        return _iter_xlsx(query_params, Workbook, ILLEGAL_CHARACTERS_RE, WriteOnlyCell), FORMATS[fmt], filename
+    return _iter_csv(query_params), FORMATS[fmt], filename
@@ -1,14 +1,20 @@
 # services/filter_service.py
 
+import base64
+import json
 import logging
-from typing import Dict, Any, Tuple, List
-from sqlalchemy import select, func, or_, and_, text, Table, Column, Integer, String
-from sqlalchemy.orm import joinedload, selectinload
+import math
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple, List
+from sqlalchemy import select, func, or_, and_, case, text, true, literal, literal_column, tuple_, union_all, Table, Column, Integer, String
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # Importăm modelele și motorul bazei de date
 import models
 from database import engine
+from services import count_service, search_service
 
 orders_view = Table(
     'orders_view',
@@ -18,102 +24,456 @@ orders_view = Table(
     extend_existing=True  # Previne erorile la reîncărcarea serverului (hot-reload)
 )
 
+# creată / actualizată la pornirea aplicației (main.on_startup) și de scripts/bench
+ORDERS_VIEW_SQL = """
+CREATE OR REPLACE VIEW orders_view AS
+WITH latest_shipment AS (
+  SELECT s.order_id, s.last_status, s.last_status_at, s.id,
+         ROW_NUMBER() OVER (PARTITION BY s.order_id ORDER BY s.last_status_at NULLS LAST, s.id DESC) AS rn
+  FROM shipments s
+)
+SELECT
+  o.id,
+  CASE
+    WHEN ls.last_status ILIKE 'delivered%%' OR ls.last_status ILIKE '%%livrat%%' THEN 'delivered'
+    WHEN ls.last_status ILIKE '%%refus%%' OR ls.last_status ILIKE '%%return%%' THEN 'refused'
+    WHEN ls.last_status ILIKE '%%cancel%%' OR ls.last_status ILIKE '%%anulat%%' THEN 'canceled'
+    WHEN ls.last_status ILIKE '%%locker%%' OR ls.last_status ILIKE '%%parcelshop%%' OR ls.last_status ILIKE '%%pick-up%%' THEN 'pickup_office'
+    WHEN ls.last_status ILIKE '%%in curs%%' OR ls.last_status ILIKE '%%tranzit%%' OR ls.last_status ILIKE 'out for delivery%%' OR ls.last_status ILIKE 'in transit%%' THEN 'in_transit'
+    WHEN ls.last_status ILIKE '%%expediat%%' OR ls.last_status ILIKE '%%warehouse%%' OR ls.last_status ILIKE '%%pick-up%%' THEN 'shipped'
+    WHEN ls.last_status ILIKE '%%proces%%' OR ls.last_status ILIKE '%%registered%%' OR ls.last_status ILIKE '%%awb%%' THEN 'processed'
+    ELSE NULL
+  END AS mapped_courier_status
+FROM orders o
+LEFT JOIN latest_shipment ls ON ls.order_id = o.id AND ls.rn = 1;
+"""
+
+# fațetele panoului de filtre: parametru din URL -> coloana după care se grupează
+_shipment_stats = (
+    select(
+        models.Shipment.order_id,
+        func.bool_or(models.Shipment.printed_at.isnot(None)).label('any_printed'),
+    )
+    .group_by(models.Shipment.order_id)
+    .subquery('shipment_stats')
+)
+
+FACET_COLUMNS = {
+    'store': models.Order.store_id,
+    'courier': models.Order.assigned_courier,
+    'derived_status': models.Order.derived_status,
+    'courier_status_group': orders_view.c.mapped_courier_status,
+    'address_status': models.Order.address_status,
+    'financial_status': models.Order.financial_status,
+    'fulfillment_status': models.Order.shopify_status,
+    # literal_column (nu parametri): expresia trebuie să fie identică în SELECT și GROUPING SETS
+    'printed_status': case(
+        (_shipment_stats.c.order_id.is_(None), literal_column("'fara_awb'")),
+        (_shipment_stats.c.any_printed, literal_column("'printed'")),
+        else_=literal_column("'neprintat'"),
+    ),
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+LAST_PAGE = "last"
+
+# sort_by -> (coloana de sortare, descrescător?); cheia de paginare este (coloană, id)
+SORT_KEYS = {
+    'created_at_desc': (models.Order.created_at, True),
+    'created_at_asc': (models.Order.created_at, False),
+    'order_name_desc': (models.Order.name, True),
+    'order_name_asc': (models.Order.name, False),
+}
+
+
+FILTER_KEYS = (
+    'order_q', 'category', 'courier', 'derived_status', 'courier_status_group',
+    'address_status', 'financial_status', 'fulfillment_status', 'printed_status',
+)
+
+
+def active_filters(query_params: Any) -> Dict[str, Any]:
+    """Filtrele efectiv aplicate (fără paginare/sortare) — semnătura pentru totaluri și fațete."""
+    active: Dict[str, Any] = {}
+    for key in FILTER_KEYS:
+        value = (query_params.get(key) or '').strip()
+        if value and value != 'all':
+            active[key] = value.lower() if key == 'order_q' else value
+    stores = [s for s in query_params.getlist('stores') if s]
+    if stores and 'all' not in stores:
+        active['stores'] = sorted(stores)
+    return active
+
 
-async def get_filtered_orders(db: AsyncSession, query_params: Any) -> Tuple[List[models.Order], int, Dict[str, Any]]:
+def _printed_predicate(printed_status: str):
+    has_printed = models.Order.shipments.any(models.Shipment.printed_at.isnot(None))
+    if printed_status == 'printed':
+        return has_printed
+    if printed_status == 'neprintat':
+        return and_(models.Order.shipments.any(), ~has_printed)
+    if printed_status == 'fara_awb':
+        return ~models.Order.shipments.any()
+    if printed_status == 'not_printed':
+        return or_(
+            ~models.Order.shipments.any(),
+            models.Order.shipments.any(models.Shipment.printed_at.is_(None))
+        )
+    return None
+
+
+async def _build_predicates(db: AsyncSession, query_params: Any) -> Tuple[List[Any], Dict[str, Any]]:
     """
-    Preia comenzile filtrate, implementând toate filtrele din UI și îmbogățind
-    rezultatele cu statusul mapat din orders_view.
+    Predicatele filtrelor din UI: (comune, {fațetă: predicat}). Separarea permite
+    numărarea fiecărei fațete cu toate filtrele active, mai puțin filtrul ei propriu.
     """
+    common: List[Any] = []
+    facets: Dict[str, Any] = {}
 
+    if (search := await search_service.search_predicate(db, query_params.get('order_q', ''))) is not None:
+        common.append(search)
 
-    query = select(
-        models.Order,
-        orders_view.c.mapped_courier_status
-    ).options(
-        joinedload(models.Order.store),
-        selectinload(models.Order.line_items),
-        joinedload(models.Order.shipments)
-    ).outerjoin(orders_view, models.Order.id == orders_view.c.id)
-
-    filters = []
-
-    if query_search := query_params.get('order_q', '').strip():
-        search_term = f"%{query_search.lower()}%"
-        filters.append(or_(
-            func.lower(models.Order.name).like(search_term),
-            func.lower(models.Order.customer).like(search_term),
-            func.lower(models.Order.shipping_phone).like(search_term),
-            models.Order.shipments.any(func.lower(models.Shipment.awb).like(search_term))
-        ))
-        
     if (selected_stores := query_params.getlist("stores")) and "all" not in selected_stores:
-        filters.append(models.Order.store_id.in_([int(s) for s in selected_stores]))
+        facets['store'] = models.Order.store_id.in_([int(s) for s in selected_stores])
 
     if (category_id := query_params.get('category')) and category_id != 'all':
-        query = query.join(models.Order.store).join(models.Store.categories)
-        filters.append(models.StoreCategory.id == int(category_id))
+        # subinterogare în loc de JOIN: o comandă nu se dublează dacă magazinul are mai multe categorii
+        facets['category'] = models.Order.store_id.in_(
+            select(models.store_category_map.c.store_id).where(models.store_category_map.c.category_id == int(category_id))
+        )
+
+    for facet, column in FACET_COLUMNS.items():
+        if facet in ('store', 'printed_status'):
+            continue
+        if (value := query_params.get(facet)) and value != 'all':
+            facets[facet] = column == value
+
+    if (printed_status := query_params.get('printed_status')) and printed_status != 'all':
+        if (predicate := _printed_predicate(printed_status)) is not None:
+            facets['printed_status'] = predicate
 
-    if (courier := query_params.get('courier')) and courier != 'all':
-        filters.append(models.Order.assigned_courier == courier)
+    return common, facets
 
-    if (derived_status := query_params.get('derived_status')) and derived_status != 'all':
-        filters.append(models.Order.derived_status == derived_status)
 
-    if (courier_status_group := query_params.get('courier_status_group')) and courier_status_group != 'all':
-        filters.append(orders_view.c.mapped_courier_status == courier_status_group)
+async def _facet_counts(db: AsyncSession, common: List[Any], facet_predicates: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """
+    Numărătorile tuturor fațetelor într-o singură trecere: GROUPING SETS pe coloanele fațetelor,
+    iar pentru fiecare fațetă un count(*) FILTER cu toate filtrele active mai puțin al ei.
+    Categoriile (m:n cu magazinele) se derivă din numărătoarea pe magazin.
+    """
+    def except_(*names):
+        rest = [p for f, p in facet_predicates.items() if f not in names]
+        return and_(*rest) if rest else true()
 
-    if (address_status := query_params.get('address_status')) and address_status != 'all':
-        filters.append(models.Order.address_status == address_status)
-        
-    if (financial_status := query_params.get('financial_status')) and financial_status != 'all':
-        filters.append(models.Order.financial_status == financial_status)
+    dims = list(FACET_COLUMNS.items())
+    stmt = (
+        select(
+            func.grouping(*[col for _, col in dims]).label('g'),
+            *[col.label(f'd_{facet}') for facet, col in dims],
+            *[func.count().filter(except_(facet)).label(f'c_{facet}') for facet, _ in dims],
+            func.count().filter(except_('category')).label('c_category'),
+        )
+        .select_from(
+            models.Order.__table__
+            .outerjoin(orders_view, models.Order.id == orders_view.c.id)
+            .outerjoin(_shipment_stats, _shipment_stats.c.order_id == models.Order.id)
+        )
+        .group_by(func.grouping_sets(*[tuple_(col) for _, col in dims], tuple_()))
+    )
+    if common:
+        stmt = stmt.where(and_(*common))
+    rows = (await db.execute(stmt)).mappings().all()
 
-    if (fulfillment_status := query_params.get('fulfillment_status')) and fulfillment_status != 'all':
-        filters.append(models.Order.shopify_status == fulfillment_status)
+    n = len(dims)
+    all_bits = (1 << n) - 1
+    set_of = {all_bits & ~(1 << (n - 1 - i)): facet for i, (facet, _) in enumerate(dims)}
+    counts: Dict[str, Dict[str, int]] = {facet: {} for facet, _ in dims}
+    counts['category'] = {}
+    store_counts_for_category: Dict[int, int] = {}
+    for row in rows:
+        if row['g'] == all_bits:
+            for facet, _ in dims:
+                counts[facet]['all'] = row[f'c_{facet}']
+            counts['category']['all'] = row['c_category']
+            continue
+        facet = set_of.get(row['g'])
+        value = row[f'd_{facet}'] if facet else None
+        if value is None:
+            continue
+        if row[f'c_{facet}']:
+            counts[facet][str(value)] = row[f'c_{facet}']
+        if facet == 'store' and row['c_category']:
+            store_counts_for_category[value] = row['c_category']
+
+    if store_counts_for_category:
+        for category_id, store_id in (await db.execute(
+            select(models.store_category_map.c.category_id, models.store_category_map.c.store_id)
+        )).all():
+            if store_id in store_counts_for_category:
+                key = str(category_id)
+                counts['category'][key] = counts['category'].get(key, 0) + store_counts_for_category[store_id]
+    return counts
+
+
+# --- Cursoare opace (keyset) ---
+
+def encode_cursor(sort_by: str, value: Any, order_id: int, page: int, direction: str = "next") -> str:
+    """Cursor opac pentru URL: poziția (valoare de sortare, id) + numărul paginii afișate."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort_by, "v": value, "i": order_id, "p": page, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort_by: str) -> Optional[Dict[str, Any]]:
+    """None dacă lipsește, e invalid sau a fost creat pentru altă sortare (atunci cădem pe `page`)."""
+    if not cursor:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if data.get("s") != sort_by or not isinstance(data.get("i"), int):
+            return None
+        if sort_by.startswith("created_at") and data.get("v") is not None:
+            data["v"] = datetime.fromisoformat(data["v"])
+        return data
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _after(column, descending: bool, value: Any, order_id: int) -> List[Any]:
+    """
+    Condițiile „după poziția (value, order_id)” în ordinea (column, id) cu NULL-urile la final,
+    câte una per segment (valori / NULL-uri). Un OR între segmente nu poate fi limită de
+    interval în btree, așa că fiecare condiție rămâne o căutare simplă în indecșii compuși
+    ix_orders_created_at_id / ix_orders_name_id (migrarea d3a7f5e28c14), iar segmentele se
+    unesc cu UNION ALL în `get_filtered_orders`.
+    """
+    if value is None:
+        # suntem deja în segmentul final cu NULL-uri
+        id_cond = models.Order.id < order_id if descending else models.Order.id > order_id
+        return [and_(column.is_(None), id_cond)]
+    position = tuple_(literal(value, column.type), literal(order_id))
+    row_cond = (
+        tuple_(column, models.Order.id) < position if descending
+        else tuple_(column, models.Order.id) > position
+    )
+    return [row_cond, column.is_(None)]
+
+
+def _before(column, descending: bool, value: Any, order_id: int) -> List[Any]:
+    """Inversul lui `_after`: segmentele care preced poziția (value, order_id)."""
+    if value is None:
+        id_cond = models.Order.id > order_id if descending else models.Order.id < order_id
+        return [and_(column.is_(None), id_cond), column.is_not(None)]
+    position = tuple_(literal(value, column.type), literal(order_id))
+    return [
+        tuple_(column, models.Order.id) > position if descending
+        else tuple_(column, models.Order.id) < position
+    ]
 
-    if (printed_status := query_params.get('printed_status')) and printed_status != 'all':
-        if printed_status == 'printed':
-            filters.append(models.Order.shipments.any(models.Shipment.printed_at.isnot(None)))
-        elif printed_status == 'not_printed':
-            filters.append(or_(
-                ~models.Order.shipments.any(),
-                models.Order.shipments.any(models.Shipment.printed_at.is_(None))
-            ))
 
+def sort_ordering(column, descending: bool, reverse: bool = False):
+    desc = descending != reverse
+    col = column.desc() if desc else column.asc()
+    col = col.nulls_first() if reverse else col.nulls_last()
+    return [col, models.Order.id.desc() if desc else models.Order.id.asc()]
+
+
+def latest_shipment_lateral():
+    """Ultimul shipment al comenzii (după fulfillment_created_at), ca LEFT JOIN LATERAL."""
+    Shipment = models.Shipment
+    return (
+        select(
+            Shipment.awb, Shipment.courier, Shipment.printed_at, Shipment.last_status,
+            Shipment.last_status_at, Shipment.fulfillment_created_at,
+        )
+        .where(Shipment.order_id == models.Order.id)
+        .order_by(Shipment.fulfillment_created_at.desc().nulls_last(), Shipment.id.desc())
+        .limit(1)
+        .lateral('latest_shipment')
+    )
+
+
+def line_items_summary_lateral():
+    """Produsele comenzii pre-agregate: „2x Titlu, 1x Altul”."""
+    LineItem = models.LineItem
+    return (
+        select(
+            func.string_agg(
+                func.concat(LineItem.quantity, 'x ', LineItem.title),
+                aggregate_order_by(literal_column("', '"), LineItem.id),
+            ).label('line_items_str'),
+        )
+        .where(LineItem.order_id == models.Order.id)
+        .lateral('items_summary')
+    )
+
+
+def _order_rows_query(page_ids):
+    """
+    Read model-ul rândurilor din lista de comenzi: exact coloanele folosite de `_order_row.html`,
+    ca tupluri simple. Ultimul shipment vine printr-un LATERAL, produsele și istoricul livrărilor
+    sunt pre-agregate în SQL (string_agg / json_agg), deci nu hidratăm obiecte ORM.
+    """
+    Order, Shipment, LineItem = models.Order, models.Shipment, models.LineItem
+
+    latest = latest_shipment_lateral()
+    summary = line_items_summary_lateral()
+    items = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object('quantity', LineItem.quantity, 'title', LineItem.title, 'sku', LineItem.sku),
+                        LineItem.id,
+                    )
+                ),
+                literal_column("'[]'::json"),
+                type_=JSON,
+            ).label('line_items'),
+        )
+        .where(LineItem.order_id == Order.id)
+        .lateral('items')
+    )
+    history = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object('awb', Shipment.awb, 'courier', Shipment.courier, 'last_status', Shipment.last_status),
+                        Shipment.fulfillment_created_at.desc().nulls_last(), Shipment.id.desc(),
+                    )
+                ),
+                literal_column("'[]'::json"),
+                type_=JSON,
+            ).label('shipments'),
+        )
+        .where(Shipment.order_id == Order.id)
+        .lateral('shipment_history')
+    )
+
+    return (
+        select(
+            Order.id, Order.name, Order.shopify_order_id.label('shopify_id'), Order.created_at,
+            Order.derived_status, Order.financial_status, Order.shopify_status,
+            Order.shipping_name, Order.shipping_address1, Order.shipping_address2, Order.shipping_city,
+            Order.shipping_phone, Order.note,
+            models.Store.name.label('store_name'), models.Store.domain.label('store_domain'),
+            latest.c.awb, latest.c.printed_at,
+            func.coalesce(latest.c.last_status, 'N/A').label('mapped_courier_status'),
+            summary.c.line_items_str, items.c.line_items, history.c.shipments,
+        )
+        .join(page_ids, page_ids.c.id == Order.id)
+        .outerjoin(models.Store, models.Store.id == Order.store_id)
+        .outerjoin(latest, true())
+        .outerjoin(summary, true())
+        .outerjoin(items, true())
+        .outerjoin(history, true())
+    )
+
+
+def resolve_sort(query_params: Any) -> str:
+    sort_by = query_params.get('sort_by', 'created_at_desc')
+    return sort_by if sort_by in SORT_KEYS else 'created_at_desc'
+
+
+async def build_filtered_query(db: AsyncSession, query_params: Any) -> Tuple[Any, List[Any], Dict[str, Any]]:
+    """
+    `SELECT orders.id` cu toate filtrele din UI aplicate, fără ORDER BY / LIMIT
+    (folosit de listă, de numărare și de export), plus predicatele pentru fațete.
+    """
+    query = select(models.Order.id).outerjoin(orders_view, models.Order.id == orders_view.c.id)
+    common, facet_predicates = await _build_predicates(db, query_params)
+    filters = common + list(facet_predicates.values())
     if filters:
         query = query.where(and_(*filters))
+    return query, common, facet_predicates
 
-    count_query = select(func.count()).select_from(query.order_by(None).subquery())
-    total_orders = await db.scalar(count_query)
 
-    sort_by = query_params.get('sort_by', 'created_at_desc')
-    sort_map = {
-        'created_at_desc': models.Order.created_at.desc(),
-        'created_at_asc': models.Order.created_at.asc(),
-        'order_name_desc': models.Order.name.desc(),
-        'order_name_asc': models.Order.name.asc(),
+def page_ids_query(query, sort_by: str, page_size: int, cursor: Optional[Dict[str, Any]] = None, backwards: bool = False):
+    """
+    `SELECT orders.id` al paginii (page_size + 1 rânduri, ca să știm dacă urmează alta), în
+    ordinea de afișare sau inversă. Cu `cursor`, paginarea e keyset: costul unei pagini nu
+    depinde de cât de departe e ea în listă. Rezultatul trebuie reordonat cu `sort_ordering`.
+    """
+    sort_column, descending = SORT_KEYS[sort_by]
+    page_ids = query.order_by(*sort_ordering(sort_column, descending, reverse=backwards)).limit(page_size + 1)
+    if not cursor:
+        return page_ids
+    segments = [
+        page_ids.where(cond)
+        for cond in (_before if backwards else _after)(sort_column, descending, cursor.get("v"), cursor["i"])
+    ]
+    # fiecare segment are propriul ORDER BY ... LIMIT; ordinea finală și limita se aplică în apelant
+    return union_all(*segments) if len(segments) > 1 else segments[0]
+
+
+async def get_filtered_orders(db: AsyncSession, query_params: Any) -> Tuple[List[Row], int, Dict[str, Any], Dict[str, Any]]:
+    """
+    Preia comenzile filtrate, implementând toate filtrele din UI. Filtrele și paginarea lucrează
+    doar pe id-uri; pagina rezultată se încarcă prin read model-ul `_order_rows_query`.
+    Paginarea este keyset pe (created_at, id) / (name, id) prin `cursor`; `page=N` rămâne
+    suportat pentru linkurile existente, iar `page=last` citește ultima pagină în ordinea
+    inversă, fără OFFSET. Întoarce și `page_info` cu cursoarele vecine.
+    """
+    query, common, facet_predicates = await build_filtered_query(db, query_params)
+    total = await count_service.count_orders(db, query, active_filters(query_params))
+    total_orders = total.value
+
+    sort_by = resolve_sort(query_params)
+    sort_column, descending = SORT_KEYS[sort_by]
+
+    try:
+        page_size = min(max(int(query_params.get("per_page", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    last_page = query_params.get("page") == LAST_PAGE
+    try:
+        page = max(int(query_params.get("page", 1)), 1)
+    except ValueError:
+        page = 1
+
+    cursor = decode_cursor(query_params.get("cursor"), sort_by)
+    if cursor:
+        last_page = False
+    backwards = last_page or (bool(cursor) and cursor.get("d") == "prev")
+    ordering = sort_ordering(sort_column, descending, reverse=backwards)
+    page_ids = page_ids_query(query, sort_by, page_size, cursor, backwards)
+    if cursor:
+        page = max(int(cursor.get("p") or 1), 1)
+    elif last_page:
+        # ultima pagină = prima pagină în ordinea inversă, fără OFFSET
+        page = max(math.ceil(total_orders / page_size), 1)
+    elif page > 1:
+        # link vechi ?page=N: OFFSET doar pe id-uri (index-only)
+        page_ids = page_ids.offset((page - 1) * page_size)
+
+    rows = (await db.execute(
+        _order_rows_query(page_ids.subquery('page_ids')).order_by(*ordering).limit(page_size + 1)
+    )).all()
+
+    has_more = len(rows) > page_size
+    orders = list(rows[:page_size])
+    if backwards:
+        orders.reverse()
+
+    if backwards and not has_more:
+        page = 1  # am ajuns la începutul listei
+    has_next = has_more if not backwards else not last_page
+    has_prev = page > 1
+    page_info = {
+        "page": page,
+        "per_page": page_size,
+        "sort_by": sort_by,
+        "total_is_exact": total.exact,
+        "next_cursor": encode_cursor(sort_by, getattr(orders[-1], sort_column.key), orders[-1].id, page + 1)
+        if orders and has_next else None,
+        "prev_cursor": encode_cursor(sort_by, getattr(orders[0], sort_column.key), orders[0].id, page - 1, "prev")
+        if orders and has_prev else None,
     }
-    if sort_by in sort_map:
-        query = query.order_by(sort_map[sort_by])
-
-    page = int(query_params.get("page", 1))
-    page_size = 50
-    query = query.limit(page_size).offset((page - 1) * page_size)
-
-    result = await db.execute(query)
-    unique_results = result.unique().mappings().all()
-
-
-    
-    orders = []
-    for row in unique_results:
-        # Extragem obiectul Order din fiecare rând/dicționar
-        order = row['Order']
-        # Setăm atributul custom pentru statusul curierului
-        order.mapped_courier_status = row['mapped_courier_status']
-        orders.append(order)
-        # Acum, `order.line_items` va fi garantat populat și va ajunge la template
-        
-    filter_counts = {}
-
-    return orders, total_orders, filter_counts
\ No newline at end of file
+
+    filter_counts = await count_service.cached_aggregate(
+        "facets", active_filters(query_params), lambda: _facet_counts(db, common, facet_predicates),
+    )
+
+    return orders, total_orders, filter_counts, page_info
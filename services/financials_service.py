@@ -0,0 +1,79 @@
+# services/financials_service.py
+#
+# Marcarea comenzilor ca plătite în Shopify (orderMarkAsPaid în loturi cu alias-uri, grupat pe
+# magazin) și actualizarea locală a financial_status doar pentru comenzile confirmate.
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services import shopify_service
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+PAID_STATUS = "PAID"  # aceeași formă ca displayFinancialStatus salvat la sincronizare
+
+
+async def mark_orders_paid(db: AsyncSession, order_ids: List[int], store_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Marchează comenzile ca plătite în Shopify și, într-un singur UPDATE, local.
+    Întoarce {"updated", "succeeded": [order_id], "failed": [{"order_id", "error"}]}.
+    """
+    query = select(models.Order.id, models.Order.store_id, models.Order.shopify_order_id).where(
+        models.Order.id.in_(order_ids)
+    )
+    if store_id:
+        query = query.where(models.Order.store_id == store_id)
+    rows = (await db.execute(query)).all()
+
+    failed: List[Dict[str, Any]] = []
+    found = {r.id for r in rows}
+    failed.extend({"order_id": oid, "error": "Comanda nu a fost găsită."} for oid in order_ids if oid not in found)
+
+    by_store: Dict[int, Dict[str, int]] = {}
+    for r in rows:
+        if not r.shopify_order_id:
+            failed.append({"order_id": r.id, "error": "Comanda nu are ID Shopify."})
+            continue
+        by_store.setdefault(r.store_id, {})[str(r.shopify_order_id)] = r.id
+
+    stores = {s.id: s for s in (await db.execute(
+        select(models.Store).where(models.Store.id.in_(list(by_store)))
+    )).scalars().all()} if by_store else {}
+
+    store_ids = [sid for sid in by_store if sid in stores]
+    for sid in by_store:
+        if sid not in stores:
+            failed.extend({"order_id": oid, "error": "Magazinul comenzii nu există."} for oid in by_store[sid].values())
+    results = await asyncio.gather(*(
+        shopify_service.mark_orders_as_paid_batch(
+            stores[sid], list(by_store[sid]), batch_size=settings.shopify_mark_paid_batch_size,
+        )
+        for sid in store_ids
+    ))
+
+    succeeded: List[int] = []
+    for sid, outcome in zip(store_ids, results):
+        for shopify_id, error in outcome.items():
+            oid = by_store[sid][shopify_id]
+            if error is None:
+                succeeded.append(oid)
+            else:
+                failed.append({"order_id": oid, "error": error})
+
+    if succeeded:
+        await db.execute(
+            update(models.Order)
+            .where(models.Order.id.in_(succeeded))
+            .values(financial_status=PAID_STATUS)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    logger.info("Mark as paid: %s reușite, %s eșuate.", len(succeeded), len(failed))
+    return {"updated": len(succeeded), "succeeded": succeeded, "failed": failed}
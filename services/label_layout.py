@@ -0,0 +1,76 @@
+# services/label_layout.py
+#
+# Transformări de pagină pentru etichete (pypdf), fără dependențe de DB sau de restul aplicației:
+# modulul este importat și de procesele din pool-ul de lucru, deci trebuie să rămână ușor.
+
+import io
+from typing import List
+
+from pypdf import PdfReader, PdfWriter, PageObject, Transformation
+
+MM = 72 / 25.4
+A6_SIZE = (105 * MM, 148 * MM)
+A4_SIZE = (210 * MM, 297 * MM)
+
+
+def _place_page(dest: PageObject, src: PageObject, x: float, y: float, width: float, height: float) -> None:
+    """
+    Desenează `src` în dreptunghiul (x, y, width, height) al lui `dest`: rotește cu 90°
+    dacă orientarea diferă, scalează proporțional până încape și centrează.
+    """
+    box = src.mediabox
+    src_w, src_h = float(box.width), float(box.height)
+    t = Transformation().translate(-float(box.left), -float(box.bottom))
+    if (src_w > src_h) != (width > height):
+        t = t.rotate(90).translate(src_h, 0)
+        src_w, src_h = src_h, src_w
+    scale = min(width / src_w, height / src_h)
+    t = t.scale(scale).translate(x + (width - src_w * scale) / 2, y + (height - src_h * scale) / 2)
+    dest.merge_transformed_page(src, t)
+
+
+def _source_pages(pdf_bytes: bytes) -> List[PageObject]:
+    pages = []
+    for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+        if page.get("/Rotate"):
+            page.transfer_rotation_to_content()
+        pages.append(page)
+    return pages
+
+
+def _write(writer: PdfWriter) -> bytes:
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def normalize_to_a6(pdf_bytes: bytes) -> bytes:
+    """Aduce fiecare pagină a etichetei la format A6 portret (scalare/rotire, centrat)."""
+    writer = PdfWriter()
+    for src in _source_pages(pdf_bytes):
+        dest = writer.add_blank_page(width=A6_SIZE[0], height=A6_SIZE[1])
+        _place_page(dest, src, 0, 0, A6_SIZE[0], A6_SIZE[1])
+    return _write(writer)
+
+
+def compose_print_pdf(labels: List[bytes], paper_size: str) -> bytes:
+    """
+    Combină etichetele (deja A6) într-un singur PDF pentru hârtia magazinului:
+    A6 -> o etichetă pe pagină; A4 -> 4 etichete A6 pe fiecare coală (2x2).
+    """
+    pages = [page for pdf_bytes in labels if pdf_bytes for page in _source_pages(pdf_bytes)]
+    writer = PdfWriter()
+    if (paper_size or "A6").upper() != "A4":
+        for src in pages:
+            dest = writer.add_blank_page(width=A6_SIZE[0], height=A6_SIZE[1])
+            _place_page(dest, src, 0, 0, A6_SIZE[0], A6_SIZE[1])
+        return _write(writer) if pages else b""
+
+    cell_w, cell_h = A4_SIZE[0] / 2, A4_SIZE[1] / 2
+    # ordinea de citire: stânga-sus, dreapta-sus, stânga-jos, dreapta-jos
+    cells = [(0, cell_h), (cell_w, cell_h), (0, 0), (cell_w, 0)]
+    for i in range(0, len(pages), 4):
+        dest = writer.add_blank_page(width=A4_SIZE[0], height=A4_SIZE[1])
+        for src, (x, y) in zip(pages[i:i + 4], cells):
+            _place_page(dest, src, x, y, cell_w, cell_h)
+    return _write(writer) if pages else b""
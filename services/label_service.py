@@ -1,8 +1,14 @@
 # /services/label_service.py
 
 import io
+import os
+import re
 import asyncio
-from typing import List, Tuple, Dict, Union
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Tuple, Dict, Union, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from PyPDF2 import PdfMerger
@@ -10,6 +16,163 @@ import models
 
 # Importăm "fabrica" de servicii de curierat, piesa centrală
 from services.couriers import get_courier_service
+from services import label_layout
+
+logger = logging.getLogger(__name__)
+
+# Cache-ul local de etichete: un PDF per AWB, descărcat o singură dată de la curier
+LABEL_CACHE_DIR = Path("awb_archive") / "labels"
+LABEL_FETCH_CONCURRENCY = 8
+
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Pool de procese pentru transformările PDF (CPU-bound), ca să nu blocăm event loop-ul."""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pdf_pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+
+async def run_in_pdf_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pdf_pool(), func, *args)
+
+
+def label_cache_path(awb: str) -> Path:
+    safe_awb = re.sub(r"[^A-Za-z0-9_-]", "_", awb or "")
+    return LABEL_CACHE_DIR / f"{safe_awb}.pdf"
+
+
+def normalized_label_path(awb: str) -> Path:
+    """Varianta A6 normalizată stă lângă eticheta brută primită de la curier."""
+    raw = label_cache_path(awb)
+    return raw.with_name(f"{raw.stem}.A6.pdf")
+
+
+def get_cached_label(awb: str) -> Optional[bytes]:
+    path = label_cache_path(awb)
+    if path.is_file():
+        return path.read_bytes()
+    return None
+
+
+def store_cached_label(awb: str, pdf_bytes: bytes) -> Path:
+    """Scrie eticheta în cache atomic (tmp + rename), ca un cititor concurent să nu vadă un PDF trunchiat."""
+    path = label_cache_path(awb)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".pdf.tmp")
+    tmp_path.write_bytes(pdf_bytes)
+    os.replace(tmp_path, path)
+    return path
+
+
+async def prefetch_labels(db: AsyncSession, shipments: List[models.Shipment]) -> Tuple[int, Dict[str, str]]:
+    """
+    Descarcă în cache etichetele care lipsesc pentru expedierile date.
+    Conturile de curier se încarcă o singură dată, iar descărcările rulează
+    concurent (limitat), fără a folosi sesiunea DB în paralel.
+    Returnează (numărul de etichete noi, {awb: eroare}).
+    """
+    missing = [s for s in shipments if s.awb and not label_cache_path(s.awb).is_file()]
+    if not missing:
+        return 0, {}
+
+    account_keys = {s.account_key for s in missing if s.account_key}
+    res = await db.execute(select(models.CourierAccount).where(models.CourierAccount.account_key.in_(account_keys)))
+    accounts = {a.account_key: a for a in res.scalars().all()}
+
+    semaphore = asyncio.Semaphore(LABEL_FETCH_CONCURRENCY)
+    failed: Dict[str, str] = {}
+
+    async def _fetch(shipment: models.Shipment) -> bool:
+        courier_service = get_courier_service(shipment.courier)
+        if not courier_service:
+            failed[shipment.awb] = f"Serviciu neimplementat pentru '{shipment.courier}'"
+            return False
+        account = accounts.get(shipment.account_key)
+        if not (account and account.credentials):
+            failed[shipment.awb] = f"Credențiale lipsă pentru contul '{shipment.account_key}'"
+            return False
+        async with semaphore:
+            try:
+                pdf_bytes = await courier_service.get_label(
+                    awb=shipment.awb,
+                    creds=account.credentials,
+                    paper_size=shipment.paper_size
+                )
+            except Exception as e:
+                failed[shipment.awb] = str(e)
+                return False
+        if not pdf_bytes:
+            failed[shipment.awb] = "Eticheta nu a putut fi generată de la curier."
+            return False
+        await asyncio.to_thread(store_cached_label, shipment.awb, pdf_bytes)
+        return True
+
+    results = await asyncio.gather(*(_fetch(s) for s in missing))
+    fetched = sum(1 for ok in results if ok)
+    if failed:
+        logger.warning("Etichete nedescărcate în cache: %s", len(failed))
+    return fetched, failed
+
+
+async def normalize_labels(pdf_map: Dict[str, bytes]) -> Dict[str, bytes]:
+    """
+    Returnează etichetele aduse la A6. Normalizarea rulează în pool-ul de procese
+    și rezultatul se păstrează în cache, lângă eticheta brută.
+    """
+    async def _normalize(awb: str, pdf_bytes: bytes) -> Tuple[str, Optional[bytes]]:
+        path = normalized_label_path(awb)
+        if path.is_file():
+            return awb, await asyncio.to_thread(path.read_bytes)
+        try:
+            normalized = await run_in_pdf_pool(label_layout.normalize_to_a6, pdf_bytes)
+        except Exception as e:
+            logger.warning("Normalizare eșuată pentru AWB %s, folosesc eticheta brută: %s", awb, e)
+            return awb, pdf_bytes
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        await asyncio.to_thread(tmp_path.write_bytes, normalized)
+        os.replace(tmp_path, path)
+        return awb, normalized
+
+    results = await asyncio.gather(*(_normalize(awb, pdf) for awb, pdf in pdf_map.items() if pdf))
+    return {awb: pdf for awb, pdf in results if pdf}
+
+
+async def compose_labels_for_paper(pdf_map: Dict[str, bytes], paper_size: str) -> bytes:
+    """Normalizează etichetele și le impune pe hârtia țintă (A6: 1/pagină, A4: 4/coală), în ordinea din `pdf_map`."""
+    normalized = await normalize_labels(pdf_map)
+    ordered = [normalized[awb] for awb in pdf_map if awb in normalized]
+    return await run_in_pdf_pool(label_layout.compose_print_pdf, ordered, paper_size)
+
+
+async def get_labels_for_shipments(db: AsyncSession, shipments: List[models.Shipment]) -> Tuple[Dict[str, bytes], Dict[str, str]]:
+    """Ca `generate_labels_pdf`, dar servește din cache și descarcă doar ce lipsește."""
+    _, failed_awbs_map = await prefetch_labels(db, shipments)
+    awb_to_pdf_map: Dict[str, bytes] = {}
+    for shipment in shipments:
+        if not shipment.awb or shipment.awb in failed_awbs_map:
+            continue
+        pdf_bytes = get_cached_label(shipment.awb)
+        if pdf_bytes:
+            awb_to_pdf_map[shipment.awb] = pdf_bytes
+        else:
+            failed_awbs_map[shipment.awb] = "Eticheta lipsește din cache."
+    return awb_to_pdf_map, failed_awbs_map
 
 async def fetch_label_with_correct_architecture(db: AsyncSession, shipment: models.Shipment) -> Union[bytes, str]:
     """Orchestrează descărcarea unei etichete folosind arhitectura corectă."""
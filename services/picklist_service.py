@@ -0,0 +1,108 @@
+# services/picklist_service.py
+
+import asyncio
+import io
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services import print_service
+
+logger = logging.getLogger(__name__)
+
+# Fonturile DejaVu sunt în rădăcina proiectului și acoperă diacriticele românești
+FONTS_DIR = Path(__file__).resolve().parent.parent
+FONT_REGULAR = "DejaVuSans"
+FONT_BOLD = "DejaVuSans-Bold"
+
+
+def _register_fonts() -> bool:
+    if FONT_REGULAR in pdfmetrics.getRegisteredFontNames():
+        return True
+    try:
+        pdfmetrics.registerFont(TTFont(FONT_REGULAR, str(FONTS_DIR / "DejaVuSans.ttf")))
+        pdfmetrics.registerFont(TTFont(FONT_BOLD, str(FONTS_DIR / "DejaVuSans-Bold.ttf")))
+        return True
+    except Exception as e:
+        logger.warning("Fonturile DejaVu nu au putut fi încărcate (%s); folosesc Helvetica.", e)
+        return False
+
+
+def render_picklist_pdf(stores: List[Dict], title: str) -> bytes:
+    """
+    Randează lista de picking (ieșirea din `get_aggregated_line_items_for_printing`)
+    ca PDF A4. Tabelele se împart automat pe pagini, cu antetul repetat.
+    Funcție sincronă, CPU-bound: se apelează din thread pool.
+    """
+    has_dejavu = _register_fonts()
+    regular = FONT_REGULAR if has_dejavu else "Helvetica"
+    bold = FONT_BOLD if has_dejavu else "Helvetica-Bold"
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle("PickTitle", parent=styles["Title"], fontName=bold, fontSize=14)
+    store_style = ParagraphStyle("PickStore", parent=styles["Heading2"], fontName=bold, fontSize=11)
+    cell_style = ParagraphStyle("PickCell", parent=styles["Normal"], fontName=regular, fontSize=8, leading=10)
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=12 * mm, rightMargin=12 * mm, topMargin=12 * mm, bottomMargin=15 * mm,
+    )
+
+    def _footer(canvas, doc_):
+        canvas.saveState()
+        canvas.setFont(regular, 7)
+        canvas.drawString(12 * mm, 8 * mm, title)
+        canvas.drawRightString(A4[0] - 12 * mm, 8 * mm, f"Pagina {doc_.page}")
+        canvas.restoreState()
+
+    story = [Paragraph(title, title_style), Spacer(1, 4 * mm)]
+    for store in stores:
+        total_qty = sum(p["quantity"] for p in store["products"])
+        story.append(Paragraph(f"{store['store']} — {store['courier']} ({total_qty} buc.)", store_style))
+        rows = [["Cant.", "SKU", "Produs", "✓"]]
+        for product in store["products"]:
+            rows.append([
+                str(product["quantity"]),
+                Paragraph(product["sku"] or "", cell_style),
+                Paragraph(product["title"] or "", cell_style),
+                "",
+            ])
+        table = Table(rows, colWidths=[16 * mm, 45 * mm, 110 * mm, 12 * mm], repeatRows=1)
+        table.setStyle(TableStyle([
+            ("FONTNAME", (0, 0), (-1, 0), bold),
+            ("FONTNAME", (0, 1), (-1, -1), regular),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
+        ]))
+        story.extend([table, Spacer(1, 5 * mm)])
+
+    if not stores:
+        story.append(Paragraph("Niciun produs.", cell_style))
+
+    doc.build(story, onFirstPage=_footer, onLaterPages=_footer)
+    return buffer.getvalue()
+
+
+async def build_picklist_pdf(db: AsyncSession, order_ids: List[int], title: str) -> bytes:
+    """Agregă produsele în SQL și randează PDF-ul în thread pool, fără a bloca event loop-ul."""
+    stores = await print_service.get_aggregated_line_items_for_printing(db, order_ids)
+    return await asyncio.to_thread(render_picklist_pdf, stores, title)
+
+
+def picklist_title(category_name: str, when: datetime = None) -> str:
+    when = when or datetime.now()
+    return f"Listă picking — {category_name} — {when.strftime('%d-%m-%Y %H:%M')}"
@@ -1,82 +1,214 @@
 # services/print_service.py (sau un alt fișier de servicii relevant)
 
-from collections import defaultdict
+import asyncio
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlalchemy import and_, desc, select, null, func
-from typing import List, Dict
+from sqlalchemy.orm import contains_eager
+from sqlalchemy import and_, desc, select, null, func, or_
+from typing import List, Dict, Optional, Tuple
 
 
 import models
+from settings import settings
+from services import label_service
 
-async def get_aggregated_line_items_for_printing(db: AsyncSession, order_ids: List[int]) -> Dict:
+logger = logging.getLogger(__name__)
+
+# Loturile pre-asamblate stau pe disc, identificate după conținut (lista de AWB-uri),
+# așa că un lot care s-a "mutat" după o printare este recunoscut în continuare.
+BATCH_CACHE_DIR = Path("awb_archive") / "batches"
+BATCH_READ_ATTEMPTS = 3
+
+
+def latest_shipment_subquery():
+    """Ultima expediere (id maxim) pentru fiecare comandă."""
+    return (
+        select(models.Shipment.order_id, func.max(models.Shipment.id).label("max_id"))
+        .group_by(models.Shipment.order_id)
+        .subquery("latest_shipment_subq")
+    )
+
+
+def supported_couriers_filter():
+    return or_(models.Shipment.courier.ilike('%dpd%'), models.Shipment.courier.ilike('%sameday%'))
+
+
+async def get_category_batches(db: AsyncSession, category_id: int, batch_size: Optional[int] = None) -> List[List[models.Shipment]]:
+    """
+    Expedierile neprintate ale unei categorii, în ordinea de picking, împărțite
+    în loturi de `print_batch_size`. Lotul N din Print Hub este elementul N-1.
+    """
+    batch_size = batch_size or getattr(settings, "print_batch_size", 250)
+    latest = latest_shipment_subquery()
+    stmt = (
+        select(models.Shipment)
+        .join(latest, models.Shipment.id == latest.c.max_id)
+        .join(models.Order, models.Order.id == models.Shipment.order_id)
+        .join(models.Store, models.Store.id == models.Order.store_id)
+        .join(models.store_category_map, models.store_category_map.c.store_id == models.Store.id)
+        .options(contains_eager(models.Shipment.order).contains_eager(models.Order.store))
+        .where(
+            models.store_category_map.c.category_id == category_id,
+            models.Shipment.printed_at.is_(None),
+            models.Shipment.awb.isnot(None),
+            supported_couriers_filter(),
+        )
+        .order_by(models.Store.name, models.Order.created_at, models.Order.id)
+    )
+    shipments = (await db.execute(stmt)).scalars().unique().all()
+    return [shipments[i:i + batch_size] for i in range(0, len(shipments), batch_size)]
+
+
+def batch_paper_size(shipments: List[models.Shipment]) -> str:
+    """Formatul de hârtie al lotului: cel setat pe majoritatea magazinelor din lot."""
+    sizes = Counter((s.order.store.paper_size or "A6").upper() for s in shipments if s.order and s.order.store)
+    return sizes.most_common(1)[0][0] if sizes else "A6"
+
+
+def batch_pdf_path(category_id: int, shipments: List[models.Shipment]) -> Path:
+    key = batch_paper_size(shipments) + ":" + ",".join(s.awb for s in shipments)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    return BATCH_CACHE_DIR / str(category_id) / f"{digest}.pdf"
+
+
+def picklist_path(batch_path: Path) -> Path:
+    """Lista de picking stă lângă PDF-ul cu etichete al lotului."""
+    return batch_path.with_name(f"{batch_path.stem}.picklist.pdf")
+
+
+async def build_batch_pdf(db: AsyncSession, category_id: int, shipments: List[models.Shipment], category_name: Optional[str] = None) -> Tuple[Optional[Path], Dict[str, str]]:
+    """
+    Asamblează PDF-ul unui lot din cache-ul de etichete (descarcă doar ce lipsește)
+    și îl scrie pe disc, împreună cu lista de picking a lotului.
+    Dacă lotul există deja, nu refacem nimic.
+    """
+    from services import picklist_service
+
+    path = batch_pdf_path(category_id, shipments)
+    if path.is_file() and picklist_path(path).is_file():
+        return path, {}
+
+    pdf_map, failed = await label_service.get_labels_for_shipments(db, shipments)
+    if failed:
+        # Nu păstrăm un lot incomplet: la printare se reîncearcă etichetele lipsă.
+        return None, failed
+
+    # etichetele sunt aduse la A6 și, pentru magazinele pe A4, impuse câte 4 pe coală
+    ordered_map = {s.awb: pdf_map[s.awb] for s in shipments if s.awb in pdf_map}
+    merged = await label_service.compose_labels_for_paper(ordered_map, batch_paper_size(shipments))
+    if not merged:
+        return None, failed
+
+    title = picklist_service.picklist_title(category_name or f"Categoria {category_id}")
+    picklist = await picklist_service.build_picklist_pdf(db, [s.order_id for s in shipments], title)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for target, content in ((picklist_path(path), picklist), (path, merged)):
+        tmp_path = target.with_suffix(".tmp")
+        await asyncio.to_thread(tmp_path.write_bytes, content)
+        tmp_path.replace(target)
+    return path, failed
+
+
+async def load_batch_pdf(db: AsyncSession, category_id: int, shipments: List[models.Shipment], category_name: Optional[str] = None) -> Tuple[Optional[Tuple[bytes, bytes]], Dict[str, str]]:
+    """
+    Conținutul lotului (etichete, listă de picking), citit din cache-ul de loturi.
+    Fișierele din cache sunt comune: `prerender_batches` sau o printare concurentă a aceluiași
+    lot le pot șterge între construire și citire, caz în care lotul se reconstruiește.
+    """
+    failed: Dict[str, str] = {}
+    for _ in range(BATCH_READ_ATTEMPTS):
+        path, failed = await build_batch_pdf(db, category_id, shipments, category_name)
+        if not path:
+            return None, failed
+        try:
+            labels = await asyncio.to_thread(path.read_bytes)
+            picklist = await asyncio.to_thread(picklist_path(path).read_bytes)
+        except FileNotFoundError:
+            logger.info("Lotul %s a fost șters din cache în timpul printării; îl reconstruim.", path.name)
+            continue
+        return (labels, picklist), {}
+    return None, failed
+
+
+async def prerender_batches(db: AsyncSession, ahead: int) -> Dict[str, int]:
+    """
+    Job de fundal: aduce în cache etichetele pentru AWB-urile noi și pre-asamblează
+    următoarele `ahead` loturi pentru fiecare categorie.
+    """
+    categories = (await db.execute(select(models.StoreCategory.id, models.StoreCategory.name))).all()
+    stats = {"categories": len(categories), "labels_fetched": 0, "batches_built": 0, "batches_failed": 0}
+
+    for category_id, category_name in categories:
+        batches = await get_category_batches(db, category_id)
+        fetched, _ = await label_service.prefetch_labels(db, [s for batch in batches for s in batch])
+        stats["labels_fetched"] += fetched
+
+        wanted = set()
+        for shipments in batches[:ahead]:
+            batch_path = batch_pdf_path(category_id, shipments)
+            wanted.update((batch_path, picklist_path(batch_path)))
+        category_dir = BATCH_CACHE_DIR / str(category_id)
+        if category_dir.is_dir():
+            # loturile care nu mai corespund (s-au printat comenzi / au intrat comenzi noi)
+            for stale in category_dir.glob("*.pdf"):
+                if stale not in wanted:
+                    stale.unlink(missing_ok=True)
+
+        for shipments in batches[:ahead]:
+            batch_path = batch_pdf_path(category_id, shipments)
+            if batch_path.is_file() and picklist_path(batch_path).is_file():
+                continue
+            path, failed = await build_batch_pdf(db, category_id, shipments, category_name)
+            if path:
+                stats["batches_built"] += 1
+            else:
+                stats["batches_failed"] += 1
+                logger.warning("Lot nepregătit pentru categoria %s: %s etichete lipsă.", category_id, len(failed))
+
+    return stats
+
+async def get_aggregated_line_items_for_printing(db: AsyncSession, order_ids: List[int]) -> List[Dict]:
     """
     Preia produsele din comenzile specificate, le grupează și le sortează
     conform logicii de business pentru picking.
+    Agregarea se face direct în SQL (GROUP BY magazin, SKU), fără a hidrata comenzile.
     """
-    
-    # 1. Preluăm comenzile și produsele asociate
+    if not order_ids:
+        return []
+
+    # 1. Agregăm cantitățile per (magazin, SKU) într-o singură interogare
+    sku_expr = func.coalesce(models.LineItem.sku, 'SKU_Necunoscut')
     stmt = (
-        select(models.Order)
-        .options(
-            selectinload(models.Order.store),
-            selectinload(models.Order.line_items)
+        select(
+            models.Store.name.label('store'),
+            sku_expr.label('sku'),
+            func.max(models.LineItem.title).label('title'),
+            func.sum(models.LineItem.quantity).label('quantity'),
+            func.max(models.Order.assigned_courier).label('courier'),
         )
-        .where(models.Order.id.in_(order_ids))
+        .join(models.Order, models.Order.id == models.LineItem.order_id)
+        .join(models.Store, models.Store.id == models.Order.store_id)
+        .where(models.LineItem.order_id.in_(order_ids))
+        .group_by(models.Store.name, sku_expr)
+        .order_by(models.Store.name, func.sum(models.LineItem.quantity).desc())
     )
-    result = await db.execute(stmt)
-    orders = result.scalars().unique().all()
-
-    # 2. Agregăm datele
-    # Structura: { 'Nume Magazin': { 'SKU Produs': { 'title': 'Titlu Produs', 'quantity': 5, 'courier': 'DPD' } } }
-    aggregated_data = defaultdict(lambda: defaultdict(lambda: {'quantity': 0}))
-
-    for order in orders:
-        store_name = order.store.name
-        courier = order.assigned_courier or 'N/A'
-        
-        for item in order.line_items:
-            sku = item.sku or 'SKU_Necunoscut'
-            aggregated_data[store_name][sku]['quantity'] += item.quantity
-            aggregated_data[store_name][sku]['title'] = item.title
-            # Presupunem că toate produsele dintr-un magazin merg cu același curier
-            # O logică mai complexă ar putea fi necesară dacă un magazin are mai mulți curieri
-            aggregated_data[store_name][sku]['courier'] = courier
-
-
-    # 3. Sortăm rezultatele conform cerințelor
+    rows = (await db.execute(stmt)).all()
+
+    # 2. Grupăm rândurile (deja sortate) pe magazin
     # Structura finală: [ { 'store': 'Nume Magazin', 'courier': 'DPD', 'products': [ ... ] }, ... ]
-    
-    sorted_stores = []
-    # Sortăm magazinele alfabetic
-    for store_name in sorted(aggregated_data.keys()):
-        store_data = aggregated_data[store_name]
-        
-        # Sortăm produsele din magazin după cantitatea totală, descrescător
-        sorted_products = sorted(
-            store_data.items(),
-            key=lambda item: item[1]['quantity'],
-            reverse=True
-        )
-        
-        # Extragem curierul (va fi același pentru toate produsele din acest magazin)
-        # și formatăm lista de produse
-        courier = 'N/A'
-        product_list = []
-        if sorted_products:
-            courier = sorted_products[0][1].get('courier', 'N/A')
-            product_list = [
-                {'sku': sku, 'title': details['title'], 'quantity': details['quantity']}
-                for sku, details in sorted_products
-            ]
-
-        sorted_stores.append({
-            'store': store_name,
-            'courier': courier,
-            'products': product_list
-        })
-        
+    sorted_stores: List[Dict] = []
+    for row in rows:
+        if not sorted_stores or sorted_stores[-1]['store'] != row.store:
+            sorted_stores.append({'store': row.store, 'courier': 'N/A', 'products': []})
+        store_entry = sorted_stores[-1]
+        # Presupunem că toate produsele dintr-un magazin merg cu același curier
+        if row.courier and store_entry['courier'] == 'N/A':
+            store_entry['courier'] = row.courier
+        store_entry['products'].append({'sku': row.sku, 'title': row.title, 'quantity': int(row.quantity or 0)})
+
     # La final, sortăm întreaga listă de magazine după curier
-    final_sorted_list = sorted(sorted_stores, key=lambda s: s['courier'])
-    
-    return final_sorted_list
\ No newline at end of file
+    return sorted(sorted_stores, key=lambda s: s['courier'])
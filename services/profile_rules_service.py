@@ -0,0 +1,178 @@
+# services/profile_rules_service.py
+#
+# Auto-alocarea profilului de expediție (Order.assigned_profile_id) la sincronizare.
+# Regulile active se compilează o singură dată într-o tabelă de decizie
+# (magazin, metodă de plată) -> reguli candidate în ordinea priorității, cu SKU-urile
+# compilate într-un singur regex per regulă; evaluarea unei comenzi nu mai atinge DB-ul.
+
+import fnmatch
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+logger = logging.getLogger(__name__)
+
+RULES_MAX_AGE_SECONDS = 300
+ASSIGN_CHUNK = 2000
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    rule_id: int
+    profile_id: int
+    min_quantity: Optional[int]
+    max_quantity: Optional[int]
+    sku_regex: Optional["re.Pattern[str]"]
+    sku_only: bool
+
+    def matches(self, skus: Set[str], quantity: int) -> bool:
+        if self.min_quantity is not None and quantity < self.min_quantity:
+            return False
+        if self.max_quantity is not None and quantity > self.max_quantity:
+            return False
+        if self.sku_regex is None:
+            return True
+        if self.sku_only:
+            return bool(skus) and all(self.sku_regex.fullmatch(s) for s in skus)
+        return any(self.sku_regex.fullmatch(s) for s in skus)
+
+
+def _sku_regex(patterns: Optional[Sequence[str]]) -> Optional["re.Pattern[str]"]:
+    patterns = [p.strip() for p in (patterns or []) if p and p.strip()]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns), re.IGNORECASE)
+
+
+class ProfileDecision:
+    """Tabela de decizie compilată din regulile active."""
+
+    def __init__(self, rules: Sequence[models.ShipmentProfileRule], store_categories: Dict[int, Set[int]]):
+        self.compiled_at = time.monotonic()
+        ordered = sorted(rules, key=lambda r: (r.priority if r.priority is not None else 100, r.id))
+        self._payments: Set[str] = {r.payment_method for r in ordered if r.payment_method}
+        self._stores: Set[int] = set(store_categories)
+
+        compiled = [
+            (r, _CompiledRule(
+                rule_id=r.id,
+                profile_id=r.profile_id,
+                min_quantity=r.min_quantity,
+                max_quantity=r.max_quantity,
+                sku_regex=_sku_regex(r.sku_patterns),
+                sku_only=(r.sku_mode or "any") == "only",
+            ))
+            for r in ordered
+        ]
+
+        # cheia None pentru magazin = magazin fără categorii; pentru plată = metodă fără reguli dedicate
+        self._table: Dict[Tuple[Optional[int], Optional[str]], Tuple[_CompiledRule, ...]] = {}
+        for store_id in list(self._stores) + [None]:
+            categories = store_categories.get(store_id, set()) if store_id is not None else set()
+            for payment in list(self._payments) + [None]:
+                self._table[(store_id, payment)] = tuple(
+                    c for r, c in compiled
+                    if (r.store_category_id is None or r.store_category_id in categories)
+                    and (r.payment_method is None or r.payment_method == payment)
+                )
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self._table.values())
+
+    def evaluate(self, store_id: Optional[int], payment: Optional[str], skus: Iterable[str], quantity: int) -> Optional[int]:
+        key = (store_id if store_id in self._stores else None, payment if payment in self._payments else None)
+        sku_set = {s for s in skus if s}
+        for rule in self._table.get(key, ()):
+            if rule.matches(sku_set, quantity or 0):
+                return rule.profile_id
+        return None
+
+
+_decision: Optional[ProfileDecision] = None
+
+
+def invalidate() -> None:
+    """De apelat după orice modificare a regulilor sau a categoriilor de magazine."""
+    global _decision
+    _decision = None
+
+
+async def get_decision(db: AsyncSession) -> ProfileDecision:
+    global _decision
+    if _decision is None or time.monotonic() - _decision.compiled_at > RULES_MAX_AGE_SECONDS:
+        rules = (await db.execute(
+            select(models.ShipmentProfileRule).where(models.ShipmentProfileRule.is_active.is_(True))
+        )).scalars().all()
+        store_categories: Dict[int, Set[int]] = {}
+        for store_id, category_id in (await db.execute(
+            select(models.store_category_map.c.store_id, models.store_category_map.c.category_id)
+        )).all():
+            store_categories.setdefault(store_id, set()).add(category_id)
+        _decision = ProfileDecision(rules, store_categories)
+    return _decision
+
+
+async def assign_profiles(db: AsyncSession, order_ids: List[int], skip_if_no_rules: bool = True) -> int:
+    """
+    Evaluează regulile pentru comenzile date (doar cele fără AWB) și scrie assigned_profile_id
+    cu câte un UPDATE per profil rezultat, doar pe rândurile care se schimbă.
+    Nu face commit: rulează în tranzacția sincronizării. Returnează numărul de comenzi evaluate.
+    """
+    if not order_ids:
+        return 0
+    decision = await get_decision(db)
+    if decision.is_empty and skip_if_no_rules:
+        return 0
+
+    Order, LineItem = models.Order, models.LineItem
+    has_shipment = exists().where(models.Shipment.order_id == Order.id)
+    evaluated = 0
+    for i in range(0, len(order_ids), ASSIGN_CHUNK):
+        chunk = order_ids[i:i + ASSIGN_CHUNK]
+        rows = (await db.execute(
+            select(
+                Order.id,
+                Order.store_id,
+                Order.mapped_payment,
+                func.coalesce(func.sum(LineItem.quantity), 0),
+                func.array_agg(func.distinct(LineItem.sku)),
+            )
+            .outerjoin(LineItem, LineItem.order_id == Order.id)
+            .where(Order.id.in_(chunk), ~has_shipment)
+            .group_by(Order.id)
+        )).all()
+
+        by_profile: Dict[Optional[int], List[int]] = {}
+        for oid, store_id, payment, quantity, skus in rows:
+            profile_id = decision.evaluate(store_id, payment, skus or [], int(quantity))
+            by_profile.setdefault(profile_id, []).append(oid)
+
+        for profile_id, ids in by_profile.items():
+            await db.execute(
+                update(Order)
+                .where(Order.id.in_(ids), Order.assigned_profile_id.is_distinct_from(profile_id))
+                .values(assigned_profile_id=profile_id)
+                .execution_options(synchronize_session=False)
+            )
+        evaluated += len(rows)
+    return evaluated
+
+
+async def reassign_open_orders(db: AsyncSession) -> int:
+    """Reevaluează toate comenzile fără AWB (după modificarea regulilor) și face commit."""
+    invalidate()
+    ids = (await db.execute(
+        select(models.Order.id).where(~exists().where(models.Shipment.order_id == models.Order.id))
+    )).scalars().all()
+    evaluated = await assign_profiles(db, list(ids), skip_if_no_rules=False)
+    await db.commit()
+    logger.info("Profiluri reevaluate pentru %s comenzi deschise.", evaluated)
+    return evaluated
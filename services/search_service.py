@@ -0,0 +1,87 @@
+# services/search_service.py
+#
+# Căutarea din lista de comenzi (`order_q`). Întâi potriviri exacte pe index B-tree
+# (AWB, număr comandă), apoi căutare fuzzy pe indecșii GIN pg_trgm peste expresiile
+# normalizate de mai jos — expresiile trebuie să rămână identice cu cele din migrare.
+
+import re
+from typing import Any, List, Optional
+
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+MIN_PHONE_DIGITS = 4
+
+# expresiile indexate (vezi migrarea add_order_search_trigram_indexes); constantele sunt literale,
+# nu parametri, altfel planul generic al unui prepared statement nu mai recunoaște indexul
+name_expr = func.lower(models.Order.name)
+customer_expr = func.lower(models.Order.customer)
+phone_expr = func.regexp_replace(
+    models.Order.shipping_phone, literal_column("'[^0-9]'"), literal_column("''"), literal_column("'g'"),
+)
+awb_expr = func.lower(models.Shipment.awb)
+
+_AWB_RE = re.compile(r"^[A-Za-z0-9]{8,}$")
+_ORDER_NO_RE = re.compile(r"^#?[A-Za-z]{0,4}-?\d{3,7}$")
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _phone_digits(term: str) -> Optional[str]:
+    """Cifrele unui termen care arată ca un telefon; +40 / 0 din față se ignoră."""
+    if not re.fullmatch(r"[\d\s+().\-/]+", term):
+        return None
+    digits = re.sub(r"\D", "", term)
+    if len(digits) == 11 and digits.startswith("40"):
+        digits = digits[2:]
+    elif len(digits) == 10 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+async def _exact_order_ids(db: AsyncSession, term: str) -> List[int]:
+    compact = re.sub(r"\s+", "", term)
+    if _AWB_RE.match(compact):
+        ids = (await db.execute(
+            select(models.Shipment.order_id).where(models.Shipment.awb == compact)
+        )).scalars().all()
+        if ids:
+            return list(ids)
+    if _ORDER_NO_RE.match(compact):
+        candidates = {compact, compact.lstrip("#"), f"#{compact.lstrip('#')}"}
+        ids = (await db.execute(
+            select(models.Order.id).where(models.Order.name.in_(candidates))
+        )).scalars().all()
+        if ids:
+            return list(ids)
+    return []
+
+
+async def search_predicate(db: AsyncSession, raw_term: str) -> Optional[Any]:
+    """
+    Predicatul pentru `order_q`: `Order.id IN (...)` când AWB-ul sau numărul comenzii se potrivesc
+    exact, altfel LIKE pe expresiile cu index trigram (AWB printr-un semi-join, nu EXISTS corelat).
+    """
+    term = (raw_term or "").strip()
+    if not term:
+        return None
+
+    exact = await _exact_order_ids(db, term)
+    if exact:
+        return models.Order.id.in_(exact)
+
+    pattern = f"%{_escape_like(term.lower())}%"
+    clauses = [
+        name_expr.like(pattern, escape="\\"),
+        customer_expr.like(pattern, escape="\\"),
+        models.Order.id.in_(
+            select(models.Shipment.order_id).where(awb_expr.like(pattern, escape="\\"))
+        ),
+    ]
+    if digits := _phone_digits(term):
+        clauses.append(phone_expr.like(f"%{digits}%"))
+    return or_(*clauses)
@@ -0,0 +1,230 @@
+# services/shopify_fulfillment_service.py
+#
+# Notificarea Shopify despre AWB-urile create (fulfillment + tracking), prin outbox-ul persistent
+# shopify_fulfillment_outbox. Rândurile se scriu în tranzacția AWB-ului și se golesc grupat pe
+# magazin: magazinele rulează în paralel (limitat), loturile unui magazin rulează secvențial și
+# respectă bugetul de cost GraphQL. Reîncercările sunt idempotente: înainte de fulfillmentCreate
+# verificăm dacă AWB-ul apare deja pe un fulfillment al comenzii.
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import AsyncSessionLocal
+from services import shopify_service
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+CLAIM_LEASE_MINUTES = 5
+MAX_BACKOFF_MINUTES = 360
+
+
+async def enqueue_shipments(db: AsyncSession, shipment_ids: List[int]) -> None:
+    """Adaugă în outbox shipment-urile date (o dată per shipment). Nu face commit."""
+    if not shipment_ids:
+        return
+    Shipment, Order = models.Shipment, models.Order
+    source = (
+        select(Shipment.id, Shipment.order_id, Order.store_id)
+        .join(Order, Order.id == Shipment.order_id)
+        .where(Shipment.id.in_(shipment_ids), Order.shopify_order_id.is_not(None))
+    )
+    await db.execute(
+        pg_insert(models.ShopifyFulfillmentOutbox)
+        .from_select(["shipment_id", "order_id", "store_id"], source)
+        .on_conflict_do_nothing(index_elements=["shipment_id"])
+    )
+
+
+async def _claim_due(limit: int, shipment_ids: Optional[List[int]] = None) -> List[Any]:
+    """Rezervă (lease) rândurile scadente și le întoarce cu datele necesare trimiterii."""
+    Outbox = models.ShopifyFulfillmentOutbox
+    due = (
+        select(Outbox.id)
+        .where(Outbox.status == "pending", Outbox.next_attempt_at <= func.now())
+        .order_by(Outbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if shipment_ids is not None:
+        due = due.where(Outbox.shipment_id.in_(shipment_ids))
+
+    async with AsyncSessionLocal() as session:
+        claimed = (await session.execute(
+            update(Outbox)
+            .where(Outbox.id.in_(due.scalar_subquery()))
+            .values(
+                attempts=Outbox.attempts + 1,
+                next_attempt_at=func.now() + timedelta(minutes=CLAIM_LEASE_MINUTES),
+            )
+            .returning(Outbox.id)
+        )).scalars().all()
+        await session.commit()
+        if not claimed:
+            return []
+
+        return (await session.execute(
+            select(
+                Outbox.id,
+                Outbox.store_id,
+                Outbox.attempts,
+                models.Shipment.id.label("shipment_id"),
+                models.Shipment.awb,
+                models.Shipment.courier,
+                models.Shipment.shopify_fulfillment_id,
+                models.Order.shopify_order_id,
+                models.CourierAccount.tracking_url,
+            )
+            .join(models.Shipment, models.Shipment.id == Outbox.shipment_id)
+            .join(models.Order, models.Order.id == Outbox.order_id)
+            .outerjoin(models.CourierAccount, models.CourierAccount.account_key == models.Shipment.account_key)
+            .where(Outbox.id.in_(claimed))
+        )).all()
+
+
+def _tracking_info(row: Any) -> Dict[str, Any]:
+    courier = row.courier or ""
+    company = {v: k for k, v in settings.COURIER_MAP.items()}.get(courier, courier)
+    template = row.tracking_url or next(
+        (url for name, url in settings.COURIER_TRACKING_MAP.items() if courier.lower().startswith(name.lower())),
+        None,
+    )
+    info: Dict[str, Any] = {"company": company, "number": row.awb}
+    if template:
+        info["url"] = template.replace("{awb}", row.awb) if "{awb}" in template else f"{template}{row.awb}"
+    return info
+
+
+async def _push_batch(store: models.Store, rows: List[Any]) -> List[Dict[str, Any]]:
+    """Un lot al unui magazin: o interogare de stare + câte o mutație cu alias-uri per tip."""
+    outcomes: List[Dict[str, Any]] = []
+    state = await shopify_service.fetch_fulfillment_state(store, sorted({r.shopify_order_id for r in rows}))
+
+    creates: Dict[str, Dict[str, Any]] = {}
+    updates: Dict[str, Dict[str, Any]] = {}
+    by_alias: Dict[str, Any] = {}
+    consumed: set = set()
+    for r in rows:
+        order_state = state.get(str(r.shopify_order_id))
+        alias = f"f{r.id}"
+        if order_state is None:
+            outcomes.append({"row": r, "error": "Comanda nu există în Shopify."})
+            continue
+        existing = order_state["fulfillment_by_awb"].get(r.awb)
+        if existing:
+            # trimis la o încercare anterioară (sau manual în Shopify)
+            outcomes.append({"row": r, "fulfillment_id": existing})
+            continue
+        by_alias[alias] = r
+        if r.shopify_fulfillment_id:
+            updates[alias] = {"fulfillment_id": r.shopify_fulfillment_id, "tracking": _tracking_info(r)}
+            continue
+        open_fos = [fo for fo in order_state["open_fulfillment_orders"] if fo not in consumed]
+        if not open_fos:
+            by_alias.pop(alias)
+            outcomes.append({"row": r, "error": "Comanda nu are fulfillment orders deschise."})
+            continue
+        consumed.update(open_fos)
+        creates[alias] = {
+            "lineItemsByFulfillmentOrder": [{"fulfillmentOrderId": fo} for fo in open_fos],
+            "trackingInfo": _tracking_info(r),
+            "notifyCustomer": settings.shopify_notify_customer,
+        }
+
+    results = await shopify_service.create_fulfillments(store, creates)
+    results.update(await shopify_service.update_fulfillment_tracking(store, updates, settings.shopify_notify_customer))
+    for alias, res in results.items():
+        outcomes.append({"row": by_alias[alias], **res})
+    return outcomes
+
+
+async def _push_store(store: models.Store, rows: List[Any], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    outcomes: List[Dict[str, Any]] = []
+    size = max(1, settings.shopify_fulfillment_batch_size)
+    async with semaphore:
+        for i in range(0, len(rows), size):
+            batch = rows[i:i + size]
+            try:
+                outcomes.extend(await _push_batch(store, batch))
+            except Exception as e:
+                logger.warning("Push-back Shopify eșuat pentru %s (lot de %s): %s", store.domain, len(batch), e)
+                outcomes.extend({"row": r, "error": str(e)[:1000]} for r in batch)
+    return outcomes
+
+
+async def _record(outcomes: List[Dict[str, Any]]) -> None:
+    """Scrie rezultatele în outbox (un UPDATE executemany) și leagă shipment-urile de fulfillment."""
+    now = datetime.now(timezone.utc)
+    outbox_rows, shipment_rows = [], []
+    for o in outcomes:
+        r = o["row"]
+        if o.get("fulfillment_id"):
+            outbox_rows.append({
+                "id": r.id, "status": "sent", "shopify_fulfillment_id": o["fulfillment_id"], "last_error": None,
+            })
+            if not r.shopify_fulfillment_id:
+                shipment_rows.append({"id": r.shipment_id, "shopify_fulfillment_id": o["fulfillment_id"]})
+        else:
+            exhausted = o.get("final") or r.attempts >= settings.shopify_pushback_max_attempts
+            outbox_rows.append({
+                "id": r.id,
+                "status": "failed" if exhausted else "pending",
+                "last_error": o.get("error"),
+                "next_attempt_at": now + timedelta(minutes=min(2 ** r.attempts, MAX_BACKOFF_MINUTES)),
+            })
+
+    async with AsyncSessionLocal() as session:
+        # rândurile au chei diferite (sent / pending), deci grupăm pe set de coloane
+        for keys in {tuple(sorted(row)) for row in outbox_rows}:
+            await session.execute(
+                update(models.ShopifyFulfillmentOutbox),
+                [row for row in outbox_rows if tuple(sorted(row)) == keys],
+            )
+        await session.commit()
+    if shipment_rows:
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(update(models.Shipment), shipment_rows)
+                await session.commit()
+        except Exception as e:
+            # sincronizarea a adus deja fulfillment-ul ca shipment separat; outbox-ul rămâne `sent`
+            logger.warning("Nu am putut lega shipment-urile de fulfillment-urile Shopify: %s", e)
+
+
+async def push_pending(limit: int = 500, shipment_ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """Golește rândurile scadente din outbox. Întoarce {"sent", "failed"} pentru rularea curentă."""
+    rows = await _claim_due(limit, shipment_ids)
+    if not rows:
+        return {"sent": 0, "failed": 0}
+
+    by_store: Dict[int, List[Any]] = {}
+    for r in rows:
+        by_store.setdefault(r.store_id, []).append(r)
+    async with AsyncSessionLocal() as session:
+        stores = {s.id: s for s in (await session.execute(
+            select(models.Store).where(models.Store.id.in_(list(by_store)))
+        )).scalars().all()}
+
+    semaphore = asyncio.Semaphore(max(1, settings.shopify_pushback_store_concurrency))
+    results = await asyncio.gather(
+        *(_push_store(stores[sid], store_rows, semaphore) for sid, store_rows in by_store.items() if sid in stores)
+    )
+    outcomes = [o for store_outcomes in results for o in store_outcomes]
+    # magazinul a fost șters: reîncercările nu pot reuși, rândurile trec direct în `failed`
+    outcomes.extend(
+        {"row": r, "error": "Magazinul comenzii nu există.", "final": True}
+        for sid, store_rows in by_store.items() if sid not in stores for r in store_rows
+    )
+    await _record(outcomes)
+
+    sent = sum(1 for o in outcomes if o.get("fulfillment_id"))
+    stats = {"sent": sent, "failed": len(outcomes) - sent}
+    logger.info("Push-back Shopify: %s", stats)
+    return stats
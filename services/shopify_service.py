@@ -1,7 +1,8 @@
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -285,3 +286,235 @@ async def mark_order_as_paid(db: AsyncSession, store_id: int, shopify_order_id:
     if errs:
         # <- aici era paranteza în plus în varianta ta
         raise RuntimeError("; ".join(e.get("message", "Unknown error") for e in errs))
+
+
+# --------------------
+# Buget de cost GraphQL per magazin + fulfillment în loturi
+# --------------------
+
+class _CostBudget:
+    """
+    Oglinda locală a „leaky bucket”-ului GraphQL Shopify pentru un magazin. Înainte de un apel
+    așteptăm până când punctele estimate sunt disponibile; după apel ne resincronizăm din
+    `extensions.cost.throttleStatus`.
+    """
+
+    def __init__(self, maximum: float = 1000.0, restore_rate: float = 50.0):
+        self.maximum = maximum
+        self.restore_rate = restore_rate
+        self.available = maximum
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(self.maximum, self.available + (now - self.updated) * self.restore_rate)
+        self.updated = now
+
+    async def acquire(self, cost: float) -> None:
+        async with self.lock:
+            cost = min(cost, self.maximum)
+            self._refill()
+            if self.available < cost:
+                await asyncio.sleep((cost - self.available) / self.restore_rate)
+                self._refill()
+            self.available -= cost
+
+    def sync(self, extensions: Dict[str, Any]) -> None:
+        status = ((extensions or {}).get("cost") or {}).get("throttleStatus") or {}
+        if status:
+            self.maximum = float(status.get("maximumAvailable") or self.maximum)
+            self.restore_rate = float(status.get("restoreRate") or self.restore_rate)
+            self.available = float(status.get("currentlyAvailable", self.available))
+            self.updated = time.monotonic()
+
+
+_cost_budgets: Dict[int, _CostBudget] = {}
+
+
+async def graphql_budgeted(store: models.Store, query: str, variables: Dict[str, Any], estimated_cost: float) -> Dict[str, Any]:
+    """POST GraphQL care respectă bugetul de cost al magazinului; reîncearcă la THROTTLED."""
+    data, errors = await graphql_budgeted_partial(store, query, variables, estimated_cost)
+    if errors:
+        raise RuntimeError("; ".join(e.get("message", "Unknown error") for e in errors))
+    return data
+
+
+async def graphql_budgeted_partial(
+    store: models.Store, query: str, variables: Dict[str, Any], estimated_cost: float,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Ca `graphql_budgeted`, dar întoarce (data, errors) în loc să ridice la erorile de top-level:
+    într-un document cu mai multe mutații (alias-uri) celelalte au rulat deja și trebuie contabilizate.
+    """
+    budget = _cost_budgets.setdefault(store.id, _CostBudget())
+    client = get_shopify_client(store)
+    for _ in range(5):
+        await budget.acquire(estimated_cost)
+        r = await client.post("graphql.json", json={"query": query, "variables": variables})
+        r.raise_for_status()
+        payload = r.json()
+        budget.sync(payload.get("extensions") or {})
+        errors = payload.get("errors") or []
+        if any((e.get("extensions") or {}).get("code") == "THROTTLED" for e in errors):
+            _logger.warning("Shopify throttling pentru %s; aștept refacerea bugetului.", store.domain)
+            continue
+        return payload.get("data") or {}, errors
+    raise RuntimeError(f"Shopify {store.domain}: THROTTLED după 5 încercări.")
+
+
+_FULFILLMENT_STATE_QUERY = """
+query($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on Order {
+      id
+      fulfillments(first: 20) { id trackingInfo { number } }
+      fulfillmentOrders(first: 10) { nodes { id status } }
+    }
+  }
+}
+"""
+
+
+async def fetch_fulfillment_state(store: models.Store, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Pentru un lot de comenzi (ID-uri numerice Shopify) întoarce
+    {order_id: {"open_fulfillment_orders": [...gid], "fulfillment_by_awb": {awb: fulfillment_id}}}.
+    """
+    data = await graphql_budgeted(
+        store, _FULFILLMENT_STATE_QUERY,
+        {"ids": [f"gid://shopify/Order/{oid}" for oid in order_ids]},
+        estimated_cost=2 + 32 * len(order_ids),
+    )
+    state: Dict[str, Dict[str, Any]] = {}
+    for node in data.get("nodes") or []:
+        if not node:
+            continue
+        by_awb = {}
+        for f in node.get("fulfillments") or []:
+            for info in f.get("trackingInfo") or []:
+                if info.get("number"):
+                    by_awb[info["number"]] = f["id"].split("/")[-1]
+        state[node["id"].split("/")[-1]] = {
+            "open_fulfillment_orders": [
+                fo["id"] for fo in ((node.get("fulfillmentOrders") or {}).get("nodes") or [])
+                if (fo.get("status") or "").upper() in ("OPEN", "IN_PROGRESS")
+            ],
+            "fulfillment_by_awb": by_awb,
+        }
+    return state
+
+
+async def create_fulfillments(store: models.Store, inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Trimite mai multe `fulfillmentCreate` într-un singur document GraphQL cu alias-uri.
+    `inputs` = {alias: FulfillmentInput}; întoarce {alias: {"fulfillment_id" | "error"}}.
+    """
+    if not inputs:
+        return {}
+    aliases = list(inputs)
+    header = ", ".join(f"${a}: FulfillmentInput!" for a in aliases)
+    body = "\n".join(
+        f"  {a}: fulfillmentCreate(fulfillment: ${a}) {{ fulfillment {{ id }} userErrors {{ field message }} }}"
+        for a in aliases
+    )
+    data = await graphql_budgeted(
+        store, f"mutation({header}) {{\n{body}\n}}", inputs, estimated_cost=10 * len(aliases),
+    )
+    results: Dict[str, Dict[str, Any]] = {}
+    for a in aliases:
+        res = data.get(a) or {}
+        errs = res.get("userErrors") or []
+        fulfillment = res.get("fulfillment") or {}
+        if errs or not fulfillment.get("id"):
+            results[a] = {"error": "; ".join(e.get("message", "Unknown error") for e in errs) or "Răspuns gol de la Shopify."}
+        else:
+            results[a] = {"fulfillment_id": fulfillment["id"].split("/")[-1]}
+    return results
+
+
+async def update_fulfillment_tracking(store: models.Store, updates: Dict[str, Dict[str, Any]], notify_customer: bool) -> Dict[str, Dict[str, Any]]:
+    """
+    `fulfillmentTrackingInfoUpdate` în lot (alias-uri), pentru fulfillment-urile existente.
+    `updates` = {alias: {"fulfillment_id": "123", "tracking": {company, number, url}}}.
+    """
+    if not updates:
+        return {}
+    aliases = list(updates)
+    header = ", ".join(f"${a}_id: ID!, ${a}_t: FulfillmentTrackingInput!" for a in aliases)
+    body = "\n".join(
+        f"  {a}: fulfillmentTrackingInfoUpdate(fulfillmentId: ${a}_id, trackingInfoInput: ${a}_t, "
+        f"notifyCustomer: {'true' if notify_customer else 'false'}) {{ fulfillment {{ id }} userErrors {{ field message }} }}"
+        for a in aliases
+    )
+    variables: Dict[str, Any] = {}
+    for a, u in updates.items():
+        variables[f"{a}_id"] = f"gid://shopify/Fulfillment/{u['fulfillment_id']}"
+        variables[f"{a}_t"] = u["tracking"]
+    data = await graphql_budgeted(
+        store, f"mutation({header}) {{\n{body}\n}}", variables, estimated_cost=10 * len(aliases),
+    )
+    results: Dict[str, Dict[str, Any]] = {}
+    for a, u in updates.items():
+        errs = (data.get(a) or {}).get("userErrors") or []
+        results[a] = (
+            {"error": "; ".join(e.get("message", "Unknown error") for e in errs)} if errs
+            else {"fulfillment_id": u["fulfillment_id"]}
+        )
+    return results
+
+
+async def mark_orders_as_paid_batch(store: models.Store, shopify_order_ids: List[str], batch_size: int = 25) -> Dict[str, Optional[str]]:
+    """
+    `orderMarkAsPaid` pentru multe comenzi: câte `batch_size` mutații cu alias-uri într-un document,
+    loturile rulând concurent în limita bugetului de cost al magazinului.
+    Întoarce {shopify_order_id: None dacă a reușit, altfel mesajul de eroare}.
+    """
+    async def _chunk(ids: List[str]) -> Dict[str, Optional[str]]:
+        aliases = {f"o{i}": oid for i, oid in enumerate(ids)}
+        header = ", ".join(f"${a}: OrderMarkAsPaidInput!" for a in aliases)
+        body = "\n".join(
+            f"  {a}: orderMarkAsPaid(input: ${a}) {{ order {{ id displayFinancialStatus }} userErrors {{ field message }} }}"
+            for a in aliases
+        )
+        variables = {a: {"id": f"gid://shopify/Order/{oid}"} for a, oid in aliases.items()}
+        try:
+            data, errors = await graphql_budgeted_partial(
+                store, f"mutation({header}) {{\n{body}\n}}", variables, estimated_cost=10 * len(aliases),
+            )
+        except Exception as ex:
+            _logger.warning("orderMarkAsPaid în lot eșuat pentru %s: %s", store.domain, ex)
+            return {oid: str(ex)[:500] for oid in ids}
+
+        # o eroare de top-level aparține alias-ului din path[0]; restul mutațiilor au rulat normal
+        by_alias: Dict[str, List[str]] = {}
+        unattributed: List[str] = []
+        for e in errors:
+            path = e.get("path") or []
+            message = e.get("message", "Unknown error")
+            if path and path[0] in aliases:
+                by_alias.setdefault(path[0], []).append(message)
+            else:
+                unattributed.append(message)
+        if errors:
+            _logger.warning("orderMarkAsPaid pentru %s: erori GraphQL în lot: %s", store.domain, errors)
+
+        out: Dict[str, Optional[str]] = {}
+        for a, oid in aliases.items():
+            res = data.get(a) or {}
+            errs = res.get("userErrors") or []
+            if a in by_alias:
+                out[oid] = "; ".join(by_alias[a])
+            elif errs:
+                out[oid] = "; ".join(e.get("message", "Unknown error") for e in errs)
+            elif not (res.get("order") or {}).get("id"):
+                out[oid] = "; ".join(unattributed) or "Răspuns gol de la Shopify."
+            else:
+                out[oid] = None
+        return out
+
+    size = max(1, batch_size)
+    results: Dict[str, Optional[str]] = {}
+    for part in await asyncio.gather(*(_chunk(shopify_order_ids[i:i + size]) for i in range(0, len(shopify_order_ids), size))):
+        results.update(part)
+    return results
@@ -0,0 +1,198 @@
+# services/sku_catalog_service.py
+#
+# Catalogul de greutăți/dimensiuni per SKU și estimarea greutății + numărului de colete
+# pentru comenzi. Estimarea pentru un lot de comenzi = o singură interogare agregată
+# (line_items LEFT JOIN sku_catalog); rezultatul se memorează per set de (SKU, cantitate).
+
+import csv
+import io
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import IO, Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK = 2000
+ESTIMATE_CACHE_SIZE = 10000
+ESTIMATE_CACHE_MAX_AGE_SECONDS = 600
+
+# aliasuri acceptate în antetul CSV
+_COLUMNS = {
+    "sku": ("sku", "cod", "cod produs"),
+    "weight_kg": ("weight_kg", "weight", "greutate", "greutate_kg"),
+    "length_cm": ("length_cm", "length", "lungime", "lungime_cm"),
+    "width_cm": ("width_cm", "width", "latime", "latime_cm"),
+    "height_cm": ("height_cm", "height", "inaltime", "inaltime_cm"),
+    "units_per_parcel": ("units_per_parcel", "buc_per_colet", "bucati_per_colet"),
+}
+
+
+@dataclass(frozen=True)
+class WeightEstimate:
+    total_weight: float
+    parcels_count: int
+    complete: bool  # toate SKU-urile comenzii au fost găsite în catalog
+
+
+SkuSetKey = Tuple[Tuple[str, int], ...]
+
+_estimates: "OrderedDict[SkuSetKey, Optional[WeightEstimate]]" = OrderedDict()
+_estimates_since = time.monotonic()
+
+
+def clear_cache() -> None:
+    global _estimates_since
+    _estimates.clear()
+    _estimates_since = time.monotonic()
+
+
+def estimate_items(items: Sequence[Tuple[str, int, Optional[float], Optional[int]]]) -> Optional[WeightEstimate]:
+    """
+    items = [(sku, cantitate, weight_kg, units_per_parcel)]. None dacă niciun SKU nu e în catalog.
+    SKU-urile cu `units_per_parcel` ocupă ceil(cant / units_per_parcel) colete; restul se combină
+    într-un colet comun. Coletele se înmulțesc dacă greutatea depășește limita per colet.
+    """
+    known = [i for i in items if i[2] is not None]
+    if not known:
+        return None
+
+    weight = sum(qty * w for _, qty, w, _ in known)
+    dedicated = sum(math.ceil(qty / upp) for _, qty, w, upp in known if upp)
+    loose = any(not upp for _, qty, w, upp in known) or len(known) < len(items)
+    parcels = dedicated + (1 if loose else 0)
+    if settings.max_parcel_weight_kg > 0:
+        parcels = max(parcels, math.ceil(weight / settings.max_parcel_weight_kg))
+    parcels = max(parcels, 1)
+    weight += settings.packaging_weight_kg * parcels
+    return WeightEstimate(
+        total_weight=round(max(weight, 0.1), 3),
+        parcels_count=parcels,
+        complete=len(known) == len(items),
+    )
+
+
+def _cached_estimate(key: SkuSetKey, items) -> Optional[WeightEstimate]:
+    if key in _estimates:
+        _estimates.move_to_end(key)
+        return _estimates[key]
+    estimate = estimate_items(items)
+    _estimates[key] = estimate
+    if len(_estimates) > ESTIMATE_CACHE_SIZE:
+        _estimates.popitem(last=False)
+    return estimate
+
+
+async def estimate_orders(db: AsyncSession, order_ids: List[int]) -> Dict[int, WeightEstimate]:
+    """Estimări pentru un lot de comenzi, dintr-o singură interogare agregată."""
+    if not order_ids:
+        return {}
+    if time.monotonic() - _estimates_since > ESTIMATE_CACHE_MAX_AGE_SECONDS:
+        clear_cache()  # catalogul poate fi reimportat din alt proces
+
+    LineItem, Sku = models.LineItem, models.SkuCatalogItem
+    rows = (await db.execute(
+        select(
+            LineItem.order_id,
+            LineItem.sku,
+            func.sum(LineItem.quantity),
+            Sku.weight_kg,
+            Sku.units_per_parcel,
+        )
+        .outerjoin(Sku, Sku.sku == LineItem.sku)
+        .where(LineItem.order_id.in_(order_ids))
+        .group_by(LineItem.order_id, LineItem.sku, Sku.weight_kg, Sku.units_per_parcel)
+    )).all()
+
+    per_order: Dict[int, List[Tuple[str, int, Optional[float], Optional[int]]]] = {}
+    for order_id, sku, qty, weight_kg, upp in rows:
+        per_order.setdefault(order_id, []).append((sku or "", int(qty or 0), weight_kg, upp))
+
+    estimates: Dict[int, WeightEstimate] = {}
+    for order_id, items in per_order.items():
+        key = tuple(sorted((sku, qty) for sku, qty, _, _ in items))
+        estimate = _cached_estimate(key, items)
+        if estimate is not None:
+            estimates[order_id] = estimate
+    return estimates
+
+
+def _parse_float(v: Any) -> Optional[float]:
+    v = (str(v or "")).strip().replace(",", ".")
+    if not v:
+        return None
+    return float(v)
+
+
+def _parse_row(row: Dict[str, str]) -> Dict[str, Any]:
+    lowered = {(k or "").strip().lower(): v for k, v in row.items()}
+    get = lambda field: next((lowered[a] for a in _COLUMNS[field] if a in lowered), None)
+
+    sku = (get("sku") or "").strip()
+    weight = _parse_float(get("weight_kg"))
+    if not sku or weight is None or weight < 0:
+        raise ValueError("lipsește SKU-ul sau greutatea")
+    upp = (get("units_per_parcel") or "").strip()
+    return {
+        "sku": sku[:128],
+        "weight_kg": weight,
+        "length_cm": _parse_float(get("length_cm")),
+        "width_cm": _parse_float(get("width_cm")),
+        "height_cm": _parse_float(get("height_cm")),
+        "units_per_parcel": int(upp) if upp else None,
+    }
+
+
+async def _upsert(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    stmt = pg_insert(models.SkuCatalogItem).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["sku"],
+        set_={c: getattr(stmt.excluded, c) for c in rows[0] if c != "sku"} | {"updated_at": func.now()},
+    )
+    await db.execute(stmt)
+
+
+async def import_csv(db: AsyncSession, stream: IO[bytes]) -> Dict[str, Any]:
+    """
+    Import în bloc din CSV (separator , sau ;), citit în flux și scris în loturi de upsert.
+    Un SKU care apare de mai multe ori păstrează ultima valoare.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;").delimiter if sample else ","
+    except csv.Error:
+        # o singură coloană sau rânduri neregulate încurcă sniffer-ul; alegem separatorul cel mai frecvent
+        delimiter = max(",;", key=sample.count)
+    text.seek(0)
+
+    imported, errors = 0, []
+    pending: Dict[str, Dict[str, Any]] = {}
+    for line_no, row in enumerate(csv.DictReader(text, delimiter=delimiter), start=2):
+        try:
+            item = _parse_row(row)
+        except (ValueError, TypeError) as e:
+            errors.append(f"Linia {line_no}: {e}")
+            continue
+        pending[item["sku"]] = item
+        if len(pending) >= IMPORT_CHUNK:
+            await _upsert(db, list(pending.values()))
+            imported += len(pending)
+            pending.clear()
+    if pending:
+        await _upsert(db, list(pending.values()))
+        imported += len(pending)
+    await db.commit()
+    clear_cache()
+
+    logger.info("Catalog SKU importat: %s rânduri, %s erori.", imported, len(errors))
+    return {"imported": imported, "errors": errors[:50], "error_count": len(errors)}
@@ -0,0 +1,190 @@
+# services/stats_service.py
+#
+# Rollup-ul zilnic `daily_order_stats` pentru dashboard. După fiecare lot de sincronizare și
+# după actualizările de tracking recalculăm doar zilele (locale) ale comenzilor atinse:
+# DELETE + INSERT ... SELECT ... GROUP BY pe acele zile, într-o singură tranzacție.
+# Dashboard-ul citește exclusiv din rollup, niciodată din orders / shipments.
+
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, and_, any_, bindparam, delete, func, literal_column, select, text, true
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services.filter_service import latest_shipment_lateral, orders_view
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TZ = "Europe/Bucharest"
+COD_PAYMENT = "ramburs"  # cheia „Ramburs” din config/payment_map.json
+NO_STATUS = "fara_status"
+DELIVERED, REFUSED = "delivered", "refused"
+
+# ziua locală a comenzii; aceeași expresie la filtrare și la grupare (literal, nu parametru,
+# ca SELECT și GROUP BY să fie identice)
+day_expr = func.date(func.timezone(literal_column(f"'{LOCAL_TZ}'"), models.Order.created_at))
+
+
+def _utc_bounds(days: List[date]):
+    """[prima zi 00:00, ultima zi + 1 00:00) în ora locală, ca să poată folosi indexul pe created_at."""
+    tz = ZoneInfo(LOCAL_TZ)
+    return (
+        datetime.combine(min(days), time.min, tzinfo=tz),
+        datetime.combine(max(days) + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def _rollup_select(days: List[date]):
+    Order = models.Order
+    latest = latest_shipment_lateral()
+    status = func.coalesce(orders_view.c.mapped_courier_status, literal_column(f"'{NO_STATUS}'"))
+    courier = func.coalesce(latest.c.courier, Order.assigned_courier, literal_column("''"))
+    is_cod = func.lower(Order.mapped_payment) == COD_PAYMENT
+    delivered_with_times = and_(
+        orders_view.c.mapped_courier_status == DELIVERED,
+        latest.c.last_status_at.is_not(None),
+        latest.c.fulfillment_created_at.is_not(None),
+    )
+    delivery_seconds = func.extract('epoch', latest.c.last_status_at - latest.c.fulfillment_created_at)
+    start, end = _utc_bounds(days)
+
+    return (
+        select(
+            day_expr.label('day'),
+            Order.store_id,
+            courier.label('courier'),
+            status.label('status'),
+            func.count().label('orders_count'),
+            func.coalesce(func.sum(Order.total_price), 0).label('revenue_total'),
+            func.count().filter(is_cod).label('cod_count'),
+            func.coalesce(func.sum(Order.total_price).filter(is_cod), 0).label('cod_total'),
+            func.count(latest.c.awb).label('shipped_count'),
+            func.coalesce(func.sum(delivery_seconds).filter(delivered_with_times), 0).label('delivery_seconds_total'),
+            func.count().filter(delivered_with_times).label('delivery_samples'),
+        )
+        .select_from(Order)
+        .outerjoin(orders_view, orders_view.c.id == Order.id)
+        .outerjoin(latest, true())
+        .where(
+            Order.store_id.is_not(None),
+            Order.created_at >= start,
+            Order.created_at < end,
+            day_expr == any_(bindparam('days', days, type_=ARRAY(Date))),
+        )
+        .group_by(day_expr, Order.store_id, courier, status)
+    )
+
+
+async def refresh_days(db: AsyncSession, days: Iterable[date]) -> int:
+    """Recalculează rollup-ul pentru zilele date și face commit. Întoarce numărul de linii scrise."""
+    days = sorted(set(d for d in days if d))
+    if not days:
+        return 0
+    Stats = models.DailyOrderStats
+    # sincronizarea și tracking-ul pot recalcula aceeași zi în paralel: serializăm scurt
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext('daily_order_stats'))"))
+    await db.execute(delete(Stats).where(Stats.day == any_(bindparam('days', days, type_=ARRAY(Date)))))
+    columns = [
+        'day', 'store_id', 'courier', 'status', 'orders_count', 'revenue_total', 'cod_count', 'cod_total',
+        'shipped_count', 'delivery_seconds_total', 'delivery_samples',
+    ]
+    result = await db.execute(
+        models.DailyOrderStats.__table__.insert().from_select(columns, _rollup_select(days))
+    )
+    await db.commit()
+    return result.rowcount or 0
+
+
+async def refresh_for_orders(db: AsyncSession, order_ids: List[int]) -> int:
+    """Recalculează zilele comenzilor date (după un lot de sincronizare / tracking)."""
+    if not order_ids:
+        return 0
+    days = (await db.execute(
+        select(day_expr).where(models.Order.id.in_(order_ids), models.Order.created_at.is_not(None)).distinct()
+    )).scalars().all()
+    written = await refresh_days(db, days)
+    logger.debug("daily_order_stats: %s zile recalculate (%s linii).", len(days), written)
+    return written
+
+
+async def rebuild_recent(db: AsyncSession, days: Optional[int] = None) -> int:
+    """Plasă de siguranță (cron nocturn / umplere inițială): recalculează ultimele N zile."""
+    days = days or settings.daily_stats_rebuild_days
+    today = datetime.now(ZoneInfo(LOCAL_TZ)).date()
+    written = await refresh_days(db, [today - timedelta(days=i) for i in range(days)])
+    logger.info("daily_order_stats: reconstruite ultimele %s zile (%s linii).", days, written)
+    return written
+
+
+def _rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    shipped = row["shipped"] or 0
+    samples = row.pop("delivery_samples")
+    seconds = row.pop("delivery_seconds_total")
+    row["delivered_rate"] = round(row["delivered"] / shipped, 4) if shipped else None
+    row["refused_rate"] = round(row["refused"] / shipped, 4) if shipped else None
+    row["avg_delivery_hours"] = round(seconds / samples / 3600, 1) if samples else None
+    row["cod_total"] = round(row["cod_total"], 2)
+    row["revenue_total"] = round(row["revenue_total"], 2)
+    return row
+
+
+async def dashboard(
+    db: AsyncSession,
+    date_from: date,
+    date_to: date,
+    store_id: Optional[int] = None,
+    courier: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Totaluri, serie zilnică și defalcări pe magazin / curier / status — doar din rollup."""
+    Stats = models.DailyOrderStats
+    conditions = [Stats.day >= date_from, Stats.day <= date_to]
+    if store_id:
+        conditions.append(Stats.store_id == store_id)
+    if courier is not None:
+        conditions.append(Stats.courier == courier)
+
+    metrics = [
+        func.sum(Stats.orders_count).label('orders'),
+        func.sum(Stats.revenue_total).label('revenue_total'),
+        func.sum(Stats.cod_count).label('cod_orders'),
+        func.sum(Stats.cod_total).label('cod_total'),
+        func.sum(Stats.shipped_count).label('shipped'),
+        func.coalesce(func.sum(Stats.orders_count).filter(Stats.status == DELIVERED), 0).label('delivered'),
+        func.coalesce(func.sum(Stats.orders_count).filter(Stats.status == REFUSED), 0).label('refused'),
+        func.sum(Stats.delivery_seconds_total).label('delivery_seconds_total'),
+        func.sum(Stats.delivery_samples).label('delivery_samples'),
+    ]
+
+    async def grouped(*keys) -> List[Dict[str, Any]]:
+        query = select(*keys, *metrics).where(*conditions)
+        if keys:
+            query = query.group_by(*keys).order_by(*keys)
+        return [_rates(dict(r._mapping)) for r in (await db.execute(query)).all() if r.orders is not None]
+
+    stores = dict((await db.execute(select(models.Store.id, models.Store.name))).all())
+    by_store = await grouped(Stats.store_id)
+    for row in by_store:
+        row["store_name"] = stores.get(row["store_id"])
+
+    by_status = [
+        {"status": r.status, "orders": int(r.orders)}
+        for r in (await db.execute(
+            select(Stats.status, func.sum(Stats.orders_count).label('orders'))
+            .where(*conditions).group_by(Stats.status).order_by(func.sum(Stats.orders_count).desc())
+        )).all()
+    ]
+    totals = await grouped()
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "totals": totals[0] if totals else None,
+        "by_day": [{**row, "day": row["day"].isoformat()} for row in await grouped(Stats.day)],
+        "by_store": by_store,
+        "by_courier": await grouped(Stats.courier),
+        "by_status": by_status,
+    }
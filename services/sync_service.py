@@ -10,7 +10,7 @@ from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 import models
 from settings import settings
-from services import shopify_service, address_service, courier_service
+from services import shopify_service, address_service, courier_service, profile_rules_service, count_service, stats_service
 from websocket_manager import manager
 from database import AsyncSessionLocal
 
@@ -183,6 +183,14 @@ async def _process_and_insert_orders_in_batches(
             s_stmt = s_stmt.on_conflict_do_update(index_elements=["shopify_fulfillment_id"], set_=s_update)
             await db.execute(s_stmt)
 
+        # profilul de expediție, din regulile compilate (UPDATE-uri pe loturi, aceeași tranzacție);
+        # savepoint: o eroare SQL aici nu trebuie să abandoneze tranzacția întregului lot
+        try:
+            async with db.begin_nested():
+                await profile_rules_service.assign_profiles(db, list(order_id_map.values()))
+        except Exception:
+            logger.exception("Alocarea automată a profilurilor a eșuat pentru lotul curent")
+
         # validarea adreselor – doar dacă am PII din Shopify
         if include_pii:
             for oid in order_id_map.values():
@@ -194,6 +202,12 @@ async def _process_and_insert_orders_in_batches(
                         logger.exception("Validare adresă eșuată pentru %s", order.name)
 
         await db.commit()
+        await count_service.invalidate()
+        try:
+            await stats_service.refresh_for_orders(db, list(order_id_map.values()))
+        except Exception:
+            await db.rollback()
+            logger.exception("Actualizarea daily_order_stats a eșuat pentru lotul curent")
         total += len(to_upsert_orders)
         logger.info("Lotul a fost salvat. Total procesate până acum: %s", total)
 
@@ -260,6 +274,7 @@ async def full_sync_for_stores(
     if with_couriers:
         async with AsyncSessionLocal() as db:
             await courier_service.track_and_update_shipments(db, full_sync=False)
+        await count_service.invalidate()
 
 
 async def run_orders_sync(db: AsyncSession, days: int, full_sync: bool = False) -> None:
@@ -292,3 +307,4 @@ async def run_orders_sync(db: AsyncSession, days: int, full_sync: bool = False)
 
 async def run_couriers_sync(db: AsyncSession, full_sync: bool = False) -> None:
     await courier_service.track_and_update_shipments(db, full_sync=full_sync)
+    await count_service.invalidate()
@@ -18,6 +18,7 @@ from services.utils import (
 
 import models
 from settings import settings
+from services import profile_rules_service, count_service
 
 async def verify_webhook(request: Request, store_domain: str) -> bool:
     """Verifică dacă un webhook primit de la Shopify este autentic."""
@@ -56,7 +57,10 @@ async def handle_order_update(payload: dict, db: AsyncSession):
         # Actualizează mapările pe baza noilor date
         order.mapped_payment = get_payment_mapping(payload.get('payment_gateway_names', []))
         order.assigned_courier = get_courier_mapping(payload.get('tags', []))
-        
+
+        await db.flush()
+        await profile_rules_service.assign_profiles(db, [order.id])
         await db.commit()
+        await count_service.invalidate()
     else:
         logging.warning(f"Webhook primit pentru o comandă inexistentă în DB: {shopify_order_id}")
\ No newline at end of file
@@ -2,8 +2,8 @@
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from typing import List, Dict, Any, Optional
-import json
-from pathlib import Path
+
+from config_loader import config_loader
 
 # Nu mai avem nevoie de modelul ShopifyStore aici, deoarece datele vin din DB
 
@@ -35,9 +35,29 @@ class Settings(BaseSettings):
     SYNC_INTERVAL_ORDERS_MINUTES: int = 15
     SYNC_INTERVAL_COURIERS_MINUTES: int = 5
     CORS_ORIGINS: List[str] = ["*"]
+    awb_create_concurrency: int = 4
+    awb_request_stale_minutes: int = 10
+    redis_url: str = "redis://localhost:6379"
+    awb_job_ttl_hours: int = 24
+    awb_job_max_orders: int = 1000
+    courier_catalog_ttl_hours: int = 24
+    max_parcel_weight_kg: float = 31.5
+    packaging_weight_kg: float = 0.2
+    shopify_fulfillment_batch_size: int = 10
+    shopify_pushback_store_concurrency: int = 3
+    shopify_pushback_max_attempts: int = 8
+    shopify_notify_customer: bool = True
+    shopify_mark_paid_batch_size: int = 25
+    cod_amount_tolerance: float = 0.05
+    order_count_cache_ttl_seconds: int = 60
+    order_count_cap: int = 10000
+    daily_stats_rebuild_days: int = 35
 
     print_batch_size: int = 250
+    prerender_batches_ahead: int = 2
     archive_retention_days: int = 7
+    archive_compact_after_days: int = 2
+    archive_max_total_mb: int = 5000
     
     DPD_CREDS: Optional[Dict[str, Dict[str, str]]] = None
     SAMEDAY_CREDS: Optional[Dict[str, str]] = None
@@ -49,18 +69,17 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-def load_json_config(file_path: str) -> Any:
-    path = Path(file_path)
-    if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+def apply_json_configs() -> None:
+    """Copiază configurările din registru în `settings`; rulează și la fiecare reîncărcare."""
+    settings.PAYMENT_MAP = config_loader.payment_map()
+    settings.COURIER_STATUS_MAP = config_loader.courier_status_map()
+    settings.COURIER_MAP = config_loader.courier_map()
+
+    settings.DPD_CREDS = config_loader.courier_credentials('dpd')
+    settings.SAMEDAY_CREDS = config_loader.courier_credentials('sameday')
+    settings.ECONT_CREDS = config_loader.courier_credentials('econt')
 
-# Încărcăm DOAR fișierele de configurare statice
-settings.PAYMENT_MAP = load_json_config('config/payment_map.json')
-settings.COURIER_STATUS_MAP = load_json_config('config/courier_status_map.json')
-settings.COURIER_MAP = load_json_config('config/courier_map.json')
 
-settings.DPD_CREDS = load_json_config('config/dpd.json')
-settings.SAMEDAY_CREDS = load_json_config('config/sameday.json')
-settings.ECONT_CREDS = load_json_config('config/econt.json')
\ No newline at end of file
+# Încărcăm DOAR fișierele de configurare statice (din registrul comun, citit o singură dată)
+apply_json_configs()
+config_loader.on_reload(apply_json_configs)
@@ -168,7 +168,47 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // ---- Reconciliere ramburs (borderou curier)
+  const codForm   = document.getElementById('codImportForm');
+  const codResult = document.getElementById('codImportResult');
+
+  async function importCodRemittance(ev) {
+    ev.preventDefault();
+    const btn = document.getElementById('codImportBtn');
+    btn.disabled = true;
+    codResult.textContent = 'Se procesează…';
+    try {
+      const res = await fetch('/financials/cod-import', { method: 'POST', body: new FormData(codForm) });
+      const data = await res.json();
+      if (!res.ok) throw new Error(data.detail || `${res.status} ${res.statusText}`);
+
+      const lines = [
+        `${data.rows} rânduri, ${data.awbs} AWB-uri, total încasat ${data.total_received} RON.`,
+        `Potrivite: ${data.matched} · Diferențe de sumă: ${data.mismatched_count} · AWB necunoscute: ${data.unknown_count} · Deja plătite: ${data.already_paid}`,
+      ];
+      if (data.marked) {
+        lines.push(`Marcate ca plătite: ${data.marked.updated}; eșuate: ${data.marked.failed.length}.`);
+      }
+      data.mismatched.slice(0, 50).forEach(m => {
+        lines.push(`⚠ ${m.name}: așteptat ${m.expected ?? '-'}, încasat ${m.received} (${m.awbs.join(', ')})`);
+      });
+      if (data.unknown_awbs.length) lines.push(`AWB necunoscute: ${data.unknown_awbs.slice(0, 50).join(', ')}`);
+      codResult.replaceChildren(...lines.map(l => {
+        const div = document.createElement('div');
+        div.textContent = l;
+        return div;
+      }));
+      if (data.marked) await loadOrders();
+    } catch (e) {
+      console.error('cod-import error:', e);
+      codResult.textContent = `Eroare: ${e.message}`;
+    } finally {
+      btn.disabled = false;
+    }
+  }
+
   // ---- Events
+  if (codForm) codForm.addEventListener('submit', importCodRemittance);
   [storeFilter, courierFilter, fromInput, toInput, statusMulti].forEach(el => {
     if (el) el.addEventListener('change', loadOrders);
   });
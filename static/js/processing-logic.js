@@ -18,6 +18,7 @@
   const selCourier   = q('#courierAccountKey');         // <select name="courier_account_key" id="courierAccountKey">
   const inpParcels   = q('#parcelsCount');              // <input name="parcels_count" id="parcelsCount">
   const inpWeight    = q('#totalWeight');               // <input name="total_weight" id="totalWeight">
+  const chkEstimate  = q('#estimateWeight');            // <input type="checkbox" id="estimateWeight">
   const inpCOD       = q('#codAmount');                 // <input name="cod_amount" id="codAmount">
   const selPayer     = q('#payer');                     // <select name="payer" id="payer">
   const inpThird     = q('#third_party_client_id');     // <input name="third_party_client_id" id="third_party_client_id"> (optional)
@@ -145,6 +146,17 @@
   // cancel
   btnCancel?.addEventListener('click', (e) => { e.preventDefault(); hideModal(); });
 
+  // job ARQ: progresul vine și pe /ws/status; aici doar așteptăm rezultatul final
+  async function waitForAwbJob(statusUrl) {
+    while (true) {
+      await new Promise(r => setTimeout(r, 1500));
+      const r = await fetch(statusUrl);
+      if (!r.ok) throw new Error('Nu pot citi starea jobului de creare AWB.');
+      const st = await r.json();
+      if (!['queued', 'running'].includes(st.status)) return st;
+    }
+  }
+
   // submit
   form?.addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -193,6 +205,7 @@
       service_id,
       parcels_count,
       total_weight,
+      estimate_weight: !!chkEstimate?.checked,
       cod_amount,
       payer,
       third_party_client_id
@@ -216,9 +229,20 @@
         throw new Error(msg);
       }
 
-      console.log('[awb] success:', data);
-      alert('AWB creat cu succes!');
       hideModal();
+      const jobs = data.jobs || (data.job_id ? [data] : []);
+      const finished = [];
+      for (const j of jobs) finished.push(await waitForAwbJob(j.status_url || `/actions/create-awb/jobs/${j.job_id}`));
+      const errs = (data.skipped || []).concat(...finished.map(j => j.errors || []));
+      const okCount = finished.reduce((n, j) => n + (j.created_awbs || []).length, 0);
+      const broken = finished.find(j => j.status === 'failed' || j.status === 'lost');
+      if (broken) {
+        alert('Jobul de creare AWB nu s-a finalizat. ' + (broken.error || ''));
+      } else if (errs.length) {
+        alert(`AWB create: ${okCount}. Erori: ${errs.length}\n` + errs.slice(0, 10).map(e => `#${e.order_id}: ${e.error}`).join('\n'));
+      } else {
+        alert(`AWB create cu succes: ${okCount}.`);
+      }
       location.reload();
     } catch (err) {
       console.error('[awb] submit error:', err);
@@ -1,8 +1,13 @@
 # worker.py
 
+import asyncio
+
+from arq import cron, func
 from arq.connections import RedisSettings
 from database import AsyncSessionLocal
-from services import sync_service
+from services import sync_service, print_service, archive_service, label_service, awb_job_service, courier_catalog_service, dpd_nomenclature_service, shopify_fulfillment_service, stats_service
+from settings import settings
+from config_loader import config_loader
 
 # =================================================================
 # TASK-UL ASINCRON
@@ -29,21 +34,99 @@ async def sync_orders_task(ctx, store_id: int):
     finally:
         await db_session.close()
 
+async def prerender_label_batches_task(ctx):
+    """
+    Task periodic: descarcă în cache etichetele AWB-urilor nou create și
+    pre-asamblează următoarele loturi din Print Hub, ca la printare PDF-ul să fie gata.
+    """
+    async with AsyncSessionLocal() as db_session:
+        try:
+            stats = await print_service.prerender_batches(db_session, ahead=settings.prerender_batches_ahead)
+            print(f"Pre-render loturi finalizat: {stats}")
+            return stats
+        except Exception as e:
+            print(f"EROARE la pre-render loturi: {e}")
+
+async def archive_lifecycle_task(ctx):
+    """Task zilnic: indexează, deduplică, compactează și curăță arhiva de PDF-uri AWB."""
+    async with AsyncSessionLocal() as db_session:
+        try:
+            stats = await archive_service.run_archive_lifecycle(db_session)
+            print(f"Ciclul de arhivă finalizat: {stats}")
+            return stats
+        except Exception as e:
+            print(f"EROARE în ciclul de arhivă: {e}")
+
+async def refresh_courier_catalog_task(ctx):
+    """Task periodic: ține cald catalogul DPD (servicii, destinații, localități) din tabela courier_catalog."""
+    async with AsyncSessionLocal() as db_session:
+        try:
+            stats = await courier_catalog_service.refresh_catalog(db_session)
+            print(f"Catalog curier reîmprospătat: {stats}")
+            return stats
+        except Exception as e:
+            print(f"EROARE la reîmprospătarea catalogului curier: {e}")
+
+async def refresh_dpd_nomenclature_task(ctx):
+    """Task zilnic: descarcă nomenclatorul DPD (localități + străzi) în tabelele locale dpd_sites / dpd_streets."""
+    async with AsyncSessionLocal() as db_session:
+        try:
+            stats = await dpd_nomenclature_service.refresh_nomenclature(db_session)
+            print(f"Nomenclator DPD reîmprospătat: {stats}")
+            return stats
+        except Exception as e:
+            print(f"EROARE la reîmprospătarea nomenclatorului DPD: {e}")
+
+async def push_shopify_fulfillments_task(ctx):
+    """Task periodic: golește outbox-ul de notificări către Shopify (fulfillment + tracking)."""
+    try:
+        stats = await shopify_fulfillment_service.push_pending()
+        print(f"Push-back Shopify: {stats}")
+        return stats
+    except Exception as e:
+        print(f"EROARE la notificarea Shopify: {e}")
+
+async def rebuild_daily_stats_task(ctx):
+    """Task nocturn: reconstruiește rollup-ul daily_order_stats pe ultimele zile (plasă de siguranță)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            written = await stats_service.rebuild_recent(db)
+        print(f"daily_order_stats reconstruit: {written} linii.")
+        return written
+    except Exception as e:
+        print(f"EROARE la reconstruirea daily_order_stats: {e}")
+
+async def create_awbs_task(ctx, order_ids, account_key, options_by_order, idempotency_key=None):
+    """Creează AWB-uri în masă; progresul per comandă ajunge în UI prin canalul Redis -> WebSocket."""
+    return await awb_job_service.run_bulk_create_job(
+        ctx["redis"], ctx["job_id"], order_ids, account_key, options_by_order, idempotency_key,
+    )
+
 # =================================================================
 # CONFIGURAREA WORKER-ULUI
 # =================================================================
 async def startup(ctx):
-    """Funcție de pornire (nu mai este necesară gestionarea sesiunii aici)."""
-    pass
+    """Funcție de pornire: pornim doar reîncărcarea configurărilor din config/."""
+    ctx["config_watcher"] = asyncio.create_task(config_loader.watch())
 
 async def shutdown(ctx):
-    """Funcție de oprire."""
-    pass
+    """Funcție de oprire: închidem pool-ul de procese folosit la normalizarea etichetelor."""
+    label_service.shutdown_pdf_pool()
+    if ctx.get("config_watcher"):
+        ctx["config_watcher"].cancel()
 
 class WorkerSettings:
     """Configurarea worker-ului ARQ."""
-    functions = [sync_orders_task] # Lista de task-uri
+    functions = [sync_orders_task, prerender_label_batches_task, archive_lifecycle_task, func(create_awbs_task, timeout=awb_job_service.job_timeout_seconds()), refresh_courier_catalog_task, func(refresh_dpd_nomenclature_task, timeout=dpd_nomenclature_service.REFRESH_JOB_TIMEOUT_SECONDS), push_shopify_fulfillments_task, rebuild_daily_stats_task] # Lista de task-uri
+    cron_jobs = [
+        cron(prerender_label_batches_task, minute=set(range(0, 60, 5)), unique=True),
+        cron(archive_lifecycle_task, hour=3, minute=30, unique=True),
+        cron(refresh_courier_catalog_task, minute=15, unique=True),
+        cron(refresh_dpd_nomenclature_task, hour=4, minute=10, unique=True, timeout=dpd_nomenclature_service.REFRESH_JOB_TIMEOUT_SECONDS),
+        cron(push_shopify_fulfillments_task, minute=set(range(60)), unique=True),
+        cron(rebuild_daily_stats_task, hour=2, minute=40, unique=True),
+    ]
     on_startup = startup
     on_shutdown = shutdown
-    # Asigură-te că serverul Redis rulează pe această adresă
-    redis_settings = RedisSettings(host='localhost', port=6379)
\ No newline at end of file
+    # Asigură-te că serverul Redis rulează pe această adresă (settings.redis_url)
+    redis_settings = RedisSettings.from_dsn(settings.redis_url)
\ No newline at end of file